@@ -0,0 +1,940 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+import toReel
+
+# -------------------------------
+# Benchmark: analysis pass throughput per MoveNet batch size
+# -------------------------------
+def bench_batch(input_video, batch_sizes, max_frames):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    frames = min(total_frames, max_frames) if max_frames else total_frames
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {frames} frames analyzed)")
+
+    # Warm up both inference paths so graph tracing is not counted
+    toReel.warm_up_model(batch_size=max(batch_sizes))
+
+    results = []
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        toReel.analyze_video(input_video, fps, frames, batch_size=batch_size, max_frames=frames)
+        elapsed = time.perf_counter() - start
+        results.append((batch_size, frames / elapsed))
+        print()
+
+    baseline_fps = results[0][1]
+    print(f"{'batch':>6} {'fps':>10} {'speedup':>8}")
+    for batch_size, frames_per_second in results:
+        print(f"{batch_size:>6} {frames_per_second:>10.2f} {frames_per_second / baseline_fps:>7.2f}x")
+    best_size, best_fps = max(results, key=lambda result: result[1])
+    print(f"model: {toReel.model_id()}; fastest batch size {best_size} "
+          f"({best_fps / baseline_fps - 1:+.1%} over batch size {results[0][0]})")
+    return results
+
+# -------------------------------
+# Benchmark: analysis cache miss vs. hit
+# -------------------------------
+def bench_cache(input_video, cache_dir):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    cache = toReel.AnalysisCache(cache_dir)
+    cache_path = cache.path(cache.key(input_video))
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    toReel.warm_up_model()
+
+    timings = []
+    for label in ('miss', 'hit'):
+        start = time.perf_counter()
+        toReel.analyze_video(input_video, fps, total_frames, cache=cache)
+        timings.append((label, time.perf_counter() - start))
+        print()
+
+    for label, elapsed in timings:
+        print(f"{label:>5}: {elapsed * 1000:10.1f} ms ({total_frames / elapsed:.1f} fps)")
+    print(f"cache entry: {os.path.getsize(cache_path) / 1024**2:.1f} MB")
+    return timings
+
+# -------------------------------
+# Benchmark: MovementPlanner memory and time on long inputs
+# -------------------------------
+def synthetic_detections(frames, seed=0, scene_every=900, miss_rate=0.2):
+    """Deterministic (cluster, frame_diff) stream: a random walk with periodic cuts and misses."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.01, frames)
+    misses = rng.random(frames) < miss_rate
+    x = 0.5
+    for frame_num in range(frames):
+        x = min(max(x + steps[frame_num], 0.0), 1.0)
+        frame_diff = toReel.SCENE_CHANGE_THRESHOLD + 1 if frame_num and frame_num % scene_every == 0 else 0
+        cluster = None if misses[frame_num] else (0, np.float32(x), np.float32(0.5), np.float32(0.9))
+        yield cluster, frame_diff
+
+def measure_planner(frames, fps):
+    """(plan seconds, smooth seconds, peak traced bytes) for `frames` synthetic detections."""
+    detections = list(synthetic_detections(frames))
+
+    def run():
+        planner = toReel.MovementPlanner(fps, frames)
+        start = time.perf_counter()
+        for frame_num, (cluster, frame_diff) in enumerate(detections):
+            planner.plan_movement(frame_num, cluster, frame_diff, toReel.SCENE_CHANGE_THRESHOLD)
+        plan_time = time.perf_counter() - start
+        start = time.perf_counter()
+        planner.interpolate_and_smooth(frames)
+        return plan_time, time.perf_counter() - start
+
+    # Timings without tracemalloc (it slows every allocation), then a traced run for memory
+    plan_time, smooth_time = run()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return plan_time, smooth_time, peak
+
+def bench_planner(hours, fps):
+    frames = int(hours * 3600 * fps)
+    print(f"Planning {frames} frames ({hours} h @ {fps} fps)")
+    plan_time, smooth_time, peak = measure_planner(frames, fps)
+
+    print(f"plan:   {plan_time:8.2f} s")
+    print(f"smooth: {smooth_time:8.2f} s")
+    print(f"peak traced memory: {peak / 1024**2:.1f} MB")
+    return plan_time, smooth_time, peak
+
+# -------------------------------
+# Benchmark: keypoint filtering and clustering, Python loops vs. NumPy
+# -------------------------------
+def synthetic_keypoints(frames, people=6, seed=0):
+    """MoveNet-shaped output with people crowded together, so clusters merge, and some empty frames."""
+    rng = np.random.default_rng(seed)
+    keypoints = rng.random((frames, people, 56)).astype(np.float32)
+    center = rng.random((frames, 1, 2)).astype(np.float32)
+    keypoints[:, :, :2] = center + rng.normal(0, 0.03, (frames, people, 2)).astype(np.float32)
+    keypoints[rng.random(frames) < 0.1, :, 2] = 0
+    return keypoints
+
+def python_best_cluster(keypoints):
+    """The per-frame list comprehension, cluster_people and max() that best_clusters replaces."""
+    people = [(i, kp) for i, kp in enumerate(keypoints) if kp[2] > toReel.DETECTION_CONFIDENCE_THRESHOLD]
+    merged_people = toReel.cluster_people(people, threshold=0.05)
+    if not merged_people:
+        return None
+    return max(merged_people, key=lambda c: c[3])
+
+def bench_clusters(frames, batch_sizes):
+    keypoints = synthetic_keypoints(frames)
+    print(f"Clustering {frames} frames of {keypoints.shape[1]} detections")
+
+    start = time.perf_counter()
+    expected = [python_best_cluster(frame_keypoints) for frame_keypoints in keypoints]
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clusters = [toReel.select_best_cluster(frame_keypoints) for frame_keypoints in keypoints]
+    results = [('python, per frame', python_time, True),
+               ('select_best_cluster', time.perf_counter() - start, clusters == expected)]
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        rows = np.concatenate([toReel.best_clusters(keypoints[i:i + batch_size]) for i in range(0, frames, batch_size)])
+        clusters = [toReel.cluster_tuple(row) for row in rows]
+        elapsed = time.perf_counter() - start
+        results.append((f"best_clusters {batch_size}", elapsed, clusters == expected))
+
+    print(f"{'':>21} {'time ms':>9} {'us/frame':>9} {'speedup':>8} {'equal':>6}")
+    for name, elapsed, equal in results:
+        print(f"{name:>21} {elapsed * 1000:>9.1f} {elapsed / frames * 1e6:>9.2f} {python_time / elapsed:>7.2f}x "
+              f"{'yes' if equal else 'NO':>6}")
+    return results
+
+# -------------------------------
+# Benchmark: strided analysis speed and crop deviation vs. every frame
+# -------------------------------
+def timed_crop_path(input_video, frames, **analysis_options):
+    """Run the analysis pass and return (seconds, crop window left edge per frame)."""
+    width, height, fps, _ = toReel.get_video_metadata(input_video)
+    crop_width = int(height * toReel.ASPECT_RATIO)
+    start = time.perf_counter()
+    planner, _ = toReel.analyze_video(input_video, fps, frames, max_frames=frames, **analysis_options)
+    elapsed = time.perf_counter() - start
+    print()
+    crop_starts = np.array([toReel.compute_crop_start(center, width, crop_width)
+                            for center in planner.interpolate_and_smooth(frames)])
+    return elapsed, crop_starts
+
+def bench_stride(input_video, strides, adaptive, tolerance, max_frames):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    frames = min(total_frames, max_frames) if max_frames else total_frames
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {frames} frames analyzed)")
+    toReel.warm_up_model()
+
+    def run(stride, adaptive_stride=False):
+        return timed_crop_path(input_video, frames, stride=stride, adaptive_stride=adaptive_stride)
+
+    baseline_time, baseline_crops = run(1)
+    runs = [(f"{stride}", stride, False) for stride in strides]
+    if adaptive:
+        runs += [(f"{stride}a", stride, True) for stride in strides]
+
+    results = []
+    for label, stride, adaptive_stride in runs:
+        elapsed, crops = run(stride, adaptive_stride)
+        # Deviation is measured on the crop window's left edge, in pixels
+        deviation = np.abs(crops - baseline_crops)
+        results.append((label, elapsed, deviation.max(), deviation.mean()))
+
+    max_allowed = tolerance * width
+    print(f"{'stride':>7} {'time s':>8} {'speedup':>8} {'max px':>7} {'mean px':>8}  within {max_allowed:.0f} px")
+    print(f"{'1':>7} {baseline_time:>8.2f} {1:>7.2f}x {0:>7} {0:>8.2f}  yes")
+    for label, elapsed, max_deviation, mean_deviation in results:
+        print(f"{label:>7} {elapsed:>8.2f} {baseline_time / elapsed:>7.2f}x {max_deviation:>7} "
+              f"{mean_deviation:>8.2f}  {'yes' if max_deviation <= max_allowed else 'NO'}")
+    return results
+
+# -------------------------------
+# Benchmark: motion-gated inference skipping
+# -------------------------------
+def bench_gate(input_video, thresholds, max_skip, max_frames):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    frames = min(total_frames, max_frames) if max_frames else total_frames
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {frames} frames analyzed)")
+    toReel.warm_up_model()
+
+    baseline_time, baseline_crops = timed_crop_path(input_video, frames)
+    results = []
+    for motion_gate in ('global', 'subject'):
+        for threshold in thresholds:
+            elapsed, crops = timed_crop_path(input_video, frames, motion_gate=motion_gate,
+                                             motion_threshold=threshold, max_skip=max_skip)
+            deviation = np.abs(crops - baseline_crops)
+            results.append((motion_gate, threshold, elapsed, deviation.max(), deviation.mean()))
+
+    print(f"{'gate':>8} {'thresh':>7} {'time s':>8} {'speedup':>8} {'max px':>7} {'mean px':>8}")
+    print(f"{'off':>8} {'-':>7} {baseline_time:>8.2f} {1:>7.2f}x {0:>7} {0:>8.2f}")
+    for motion_gate, threshold, elapsed, max_deviation, mean_deviation in results:
+        print(f"{motion_gate:>8} {threshold:>7g} {elapsed:>8.2f} {baseline_time / elapsed:>7.2f}x "
+              f"{max_deviation:>7} {mean_deviation:>8.2f}")
+    return results
+
+# -------------------------------
+# Benchmark: scene detection cost, full-resolution MSE vs. signatures
+# -------------------------------
+RESOLUTIONS = {'720p': (1280, 720), '1080p': (1920, 1080), '4k': (3840, 2160)}
+
+# The threshold the full-resolution MSE was tuned for, before scores came from signatures
+FULL_FRAME_SCENE_THRESHOLD = 3000
+# Detail of the synthetic scenes: noise amplitude at 1/320, 1/80, 1/20 and 1/5 of the width
+SCENE_TEXTURES = {
+    'fine': (60, 20, 10, 5),
+    'mixed': (60, 35, 20, 10),
+    'coarse': (20, 30, 40, 30),
+}
+
+def mse(imageA, imageB):
+    """Mean squared error of two full-resolution images: the scene score SceneChangeDetector replaced."""
+    err = np.sum((imageA.astype("float") - imageB.astype("float")) ** 2)
+    err /= float(imageA.shape[0] * imageA.shape[1])
+    return err
+
+def textured_scene(width, height, amplitudes, rng, level=(110, 140)):
+    """A grey scene with noise at four scales; cuts between two of them keep the same mean brightness."""
+    image = np.zeros((height, width))
+    for divisor, amplitude in zip((320, 80, 20, 5), amplitudes):
+        noise = rng.normal(0, 1, (max(2, height * divisor // width), divisor))
+        image += amplitude * cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    image += rng.uniform(*level) - image.mean()
+    return cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+def compare_scene_detectors(width, height, texture, pan_speeds, cuts=10, seed=0):
+    """
+    Cuts between textured scenes of the same brightness, then pans across one scene at
+    `pan_speeds` (pixels per frame at 1280 wide). Returns rows of (case, frames or cuts,
+    found by the full-frame MSE at its old threshold, found by SceneChangeDetector).
+    """
+    rng = np.random.default_rng(seed)
+    amplitudes = SCENE_TEXTURES[texture]
+
+    def count(frames):
+        detector = toReel.SceneChangeDetector()
+        full_found = signature_found = 0
+        prev_gray = None
+        for frame in frames:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if prev_gray is not None and mse(prev_gray, gray) > FULL_FRAME_SCENE_THRESHOLD:
+                full_found += 1
+            prev_gray = gray
+            if detector.is_scene_change(detector.update(frame)):
+                signature_found += 1
+        return full_found, signature_found
+
+    rows = [(f"{texture} cuts", cuts, *count(textured_scene(width, height, amplitudes, rng) for _ in range(cuts + 1)))]
+    for speed in pan_speeds:
+        step = max(1, round(speed * width / 1280))
+        wide = textured_scene(width + step * 20, height, amplitudes, rng)
+        pan = (np.ascontiguousarray(wide[:, i * step:i * step + width]) for i in range(21))
+        rows.append((f"{texture} pan {speed}px", 20, *count(pan)))
+    return rows
+
+def bench_scene(resolutions, frames, input_video):
+    rng = np.random.default_rng(0)
+    print(f"{'res':>6} {'mse us':>10} {'signature us':>13} {'speedup':>8}")
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        # Two alternating noisy frames so nothing is cached between iterations
+        pair = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(2)]
+
+        start = time.perf_counter()
+        prev_gray = None
+        for i in range(frames):
+            gray = cv2.cvtColor(pair[i % 2], cv2.COLOR_BGR2GRAY)
+            if prev_gray is not None:
+                mse(prev_gray, gray)
+            prev_gray = gray
+        mse_time = (time.perf_counter() - start) / frames
+
+        detector = toReel.SceneChangeDetector()
+        for i in range(frames):
+            detector.update(pair[i % 2])
+        signature_time = detector.seconds / detector.frames
+        print(f"{name:>6} {mse_time * 1e6:>10.0f} {signature_time * 1e6:>13.0f} {mse_time / signature_time:>7.1f}x")
+
+    # Calibration: the signature threshold should find the cuts the full-frame MSE found
+    print(f"\nscene cuts found, full-frame MSE > {FULL_FRAME_SCENE_THRESHOLD} vs. "
+          f"signature > {toReel.SCENE_CHANGE_THRESHOLD} (720p, same brightness across cuts)")
+    print(f"{'case':>18} {'of':>4} {'full':>6} {'signature':>10}")
+    for texture in SCENE_TEXTURES:
+        for case, total, full_found, signature_found in compare_scene_detectors(1280, 720, texture, (4, 8, 16)):
+            print(f"{case:>18} {total:>4} {full_found:>6} {signature_found:>10}")
+
+    if input_video:
+        # Cuts found by each method on a real clip, each with its own threshold
+        full_cuts, signature_cuts = [], []
+        detector = toReel.SceneChangeDetector()
+        prev_gray = None
+        for frame_num, frame in enumerate(toReel.read_frames(input_video)):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if prev_gray is not None and mse(prev_gray, gray) > FULL_FRAME_SCENE_THRESHOLD:
+                full_cuts.append(frame_num)
+            prev_gray = gray
+            if detector.is_scene_change(detector.update(frame)):
+                signature_cuts.append(frame_num)
+        print(f"cuts (full-res mse):  {full_cuts}")
+        print(f"cuts (signature):     {signature_cuts}")
+        print(detector.report())
+
+# -------------------------------
+# Benchmark: first-pass decode, full resolution vs. scaled ffmpeg pipe
+# -------------------------------
+def bench_decode(input_video, max_frames):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    frames = min(total_frames, max_frames) if max_frames else total_frames
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {frames} frames decoded)")
+
+    # Decode plus the per-frame work the first pass does on every frame
+    timings = {}
+    for decoder in ('opencv', 'ffmpeg'):
+        detector = toReel.SceneChangeDetector()
+        frame_bytes = 0
+        start = time.perf_counter()
+        for frame in toReel.read_analysis_frames(input_video, fps, frames, decoder=decoder):
+            detector.update(frame)
+            toReel.resize_for_movenet(frame)
+            frame_bytes = frame.nbytes
+        timings[decoder] = time.perf_counter() - start
+        print(f"{decoder:>7}: {frames / timings[decoder]:8.1f} fps, {frame_bytes / 1024:8.0f} KB per frame")
+    print(f"speedup: {timings['opencv'] / timings['ffmpeg']:.2f}x")
+
+    # Effect on the crop path of analyzing downscaled frames
+    toReel.warm_up_model()
+    _, opencv_crops = timed_crop_path(input_video, frames, decoder='opencv')
+    _, ffmpeg_crops = timed_crop_path(input_video, frames, decoder='ffmpeg')
+    deviation = np.abs(ffmpeg_crops - opencv_crops)
+    print(f"crop deviation: max {deviation.max()} px, mean {deviation.mean():.2f} px")
+    return timings
+
+# -------------------------------
+# Benchmark: parallel chunked analysis scaling
+# -------------------------------
+def bench_parallel(input_video, max_workers, max_frames):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    frames = min(total_frames, max_frames) if max_frames else total_frames
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {frames} frames analyzed, {os.cpu_count()} CPUs)")
+    toReel.warm_up_model()
+
+    results = []
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        if workers > 1:
+            # Spawn the pool and load MoveNet in every process before timing
+            pool = toReel.get_analysis_pool(workers)
+            list(pool.map(toReel.warm_up_model, [toReel.DEFAULT_BATCH_SIZE] * workers))
+        elapsed, crops = timed_crop_path(input_video, frames, workers=workers)
+        if baseline is None:
+            baseline = (elapsed, crops)
+        results.append((workers, elapsed, np.array_equal(crops, baseline[1])))
+
+    print(f"{'workers':>8} {'time s':>8} {'fps':>8} {'speedup':>8} {'efficiency':>11} {'same path':>10}")
+    for workers, elapsed, same in results:
+        speedup = baseline[0] / elapsed
+        print(f"{workers:>8} {elapsed:>8.2f} {frames / elapsed:>8.1f} {speedup:>7.2f}x {speedup / workers:>10.0%} "
+              f"{'yes' if same else 'NO':>10}")
+    return results
+
+# -------------------------------
+# Benchmark: parallel crop rendering scaling
+# -------------------------------
+def bench_render(input_video, max_workers):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {total_frames} frames, {os.cpu_count()} CPUs)")
+    toReel.warm_up_model()
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        # Every run after the first replays the cached analysis, so only the crop pass differs
+        cache = toReel.AnalysisCache(os.path.join(out_dir, 'cache'))
+        profile_path = os.path.join(out_dir, 'profile.json')
+        for workers in range(1, max_workers + 1):
+            output = os.path.join(out_dir, f"render_{workers}.mp4")
+            if workers > 1:
+                pool = toReel.get_process_pool(workers)
+                list(pool.map(abs, range(workers)))  # spawn the workers before timing
+            # One worker is the serial crop loop of process_video
+            toReel.process_video(input_video, output, progress_path=None, cache=cache, render_workers=workers,
+                                 profile_path=profile_path)
+            with open(profile_path) as f:
+                elapsed = json.load(f)['passes']['crop']['seconds']
+            rendered = sum(1 for _ in toReel.read_frames(output))
+            results.append((workers, elapsed, rendered))
+            print()
+
+    baseline = results[0][1]
+    print(f"{'workers':>8} {'crop s':>8} {'fps':>8} {'speedup':>8} {'frames':>8}")
+    for workers, elapsed, rendered in results:
+        print(f"{workers:>8} {elapsed:>8.2f} {total_frames / elapsed:>8.1f} {baseline / elapsed:>7.2f}x {rendered:>8}")
+    return results
+
+# -------------------------------
+# Benchmark: two-pass vs. single-pass time to first output frame
+# -------------------------------
+def bench_stream(input_video, max_lookahead):
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {total_frames} frames)")
+    toReel.warm_up_model(batch_size=toReel.DEFAULT_BATCH_SIZE)
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, single_pass in (('two-pass', False), ('single-pass', True)):
+            output = os.path.join(out_dir, f"{name}.mp4")
+            first_output = None
+
+            def on_progress(progress, status):
+                nonlocal first_output
+                if first_output is None and status.startswith("Generating"):
+                    first_output = time.perf_counter() - start
+
+            # Both modes analyze full-resolution frames so their outputs are comparable
+            start = time.perf_counter()
+            toReel.process_video(input_video, output, progress_callback=on_progress, analysis_decoder='opencv',
+                                 single_pass=single_pass, max_lookahead_seconds=max_lookahead)
+            elapsed = time.perf_counter() - start
+            with open(output, 'rb') as f:
+                digest = hashlib.md5(f.read()).hexdigest()
+            results.append((name, first_output, elapsed, sum(1 for _ in toReel.read_frames(output)), digest))
+            print()
+
+    print(f"{'mode':>12} {'first s':>8} {'total s':>8} {'frames':>8}  md5")
+    for name, first_output, elapsed, frames, digest in results:
+        print(f"{name:>12} {first_output:>8.2f} {elapsed:>8.2f} {frames:>8}  {digest}")
+    print("outputs identical" if results[0][4] == results[1][4] else
+          "outputs differ (expected only when the lookahead cap was hit)")
+    return results
+
+# -------------------------------
+# Benchmark: MoveNet backends, keypoint parity and throughput
+# -------------------------------
+def parse_model_spec(text):
+    """'tflite:movenet.tflite' -> ('tflite', 'movenet.tflite'); a bare path picks the backend from its extension."""
+    backend, separator, model_path = text.partition(':')
+    if separator and backend in toReel.MODEL_BACKENDS:
+        return backend, model_path
+    return toReel.resolve_backend('auto', text), text
+
+def best_cluster_x(keypoints):
+    """Per frame x of the cluster the planner would follow (NaN when nobody is detected)."""
+    return toReel.best_clusters(keypoints)[:, 1].astype(np.float64)
+
+def bench_backends(input_video, models, max_frames, threads, tolerance):
+    frames = [toReel.resize_for_movenet(frame) for frame in toReel.read_frames(input_video, max_frames or None)]
+    print(f"Input: {input_video} ({len(frames)} frames, {threads or 'default'} threads)")
+
+    results = []
+    reference = None
+    for backend, model_path in models:
+        model = toReel.load_backend(backend, model_path, threads)
+        model.infer(frames[:1])  # load and trace before timing
+        start = time.perf_counter()
+        keypoints = np.concatenate([model.infer([frame]) for frame in frames])
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = keypoints
+            reference_x = best_cluster_x(keypoints)
+
+        # Keypoint coordinates wherever the reference is confident, matched by instance slot
+        people = reference[:, :, :51].reshape(len(frames), -1, 17, 3)
+        candidate = keypoints[:, :, :51].reshape(len(frames), -1, 17, 3)
+        confident = people[..., 2] > toReel.DETECTION_CONFIDENCE_THRESHOLD
+        keypoint_deviation = np.abs(candidate[..., :2] - people[..., :2])[confident].max(initial=0.0)
+        # What the crop actually follows: the best cluster's x, and whether anybody was found
+        cluster_x = best_cluster_x(keypoints)
+        same_presence = np.array_equal(np.isnan(cluster_x), np.isnan(reference_x))
+        cluster_deviation = np.nanmax(np.abs(cluster_x - reference_x), initial=0.0)
+        results.append((backend, os.path.basename(model_path.rstrip('/')), len(frames) / elapsed,
+                        keypoint_deviation, cluster_deviation, same_presence and cluster_deviation <= tolerance))
+
+    baseline = results[0][2]
+    print(f"{'backend':>11} {'model':>28} {'fps':>8} {'speedup':>8} {'kp dev':>8} {'x dev':>8} {'parity':>7}")
+    for backend, model_name, fps, keypoint_deviation, cluster_deviation, parity in results:
+        print(f"{backend:>11} {model_name[-28:]:>28} {fps:>8.1f} {fps / baseline:>7.2f}x "
+              f"{keypoint_deviation:>8.4f} {cluster_deviation:>8.4f} {'ok' if parity else 'FAIL':>7}")
+    return results
+
+# -------------------------------
+# Benchmark: profiling overhead, disabled vs. enabled
+# -------------------------------
+def bench_profile(input_video, calls, runs):
+    # Cost of one stage() block on its own, which is what every hot-path call site pays
+    for name, profiler in (('disabled', toReel.NULL_PROFILER), ('enabled', toReel.StageProfiler())):
+        start = time.perf_counter()
+        for _ in range(calls):
+            with profiler.stage('bench'):
+                pass
+        print(f"{name:>9}: {(time.perf_counter() - start) / calls * 1e9:8.0f} ns per stage")
+
+    if not input_video:
+        return
+    width, height, fps, total_frames = toReel.get_video_metadata(input_video)
+    print(f"Input: {input_video} ({width}x{height} @ {fps:.2f} fps, {total_frames} frames, best of {runs})")
+    toReel.warm_up_model(batch_size=toReel.DEFAULT_BATCH_SIZE)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name in ('disabled', 'enabled'):
+            profile_path = os.path.join(out_dir, 'profile.json') if name == 'enabled' else None
+            best = None
+            for _ in range(runs):
+                start = time.perf_counter()
+                toReel.process_video(input_video, os.path.join(out_dir, 'out.mp4'), profile_path=profile_path)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                print()
+            timings[name] = best
+
+    print(f"{'profiling':>9} {'time s':>8} {'fps':>8}")
+    for name, elapsed in timings.items():
+        print(f"{name:>9} {elapsed:>8.2f} {total_frames / elapsed:>8.1f}")
+    print(f"overhead: {timings['enabled'] / timings['disabled'] - 1:+.1%}")
+    return timings
+
+# -------------------------------
+# Benchmark suite: synthetic clips, stub or real model, JSON baselines
+# -------------------------------
+SUITE_CLIPS_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'reels', 'bench')
+SUITE_FPS = 30
+
+def synthetic_cut_frames(frames, fps, cuts_per_minute, rng):
+    """Frame numbers of the scene cuts: evenly spread, with some jitter."""
+    count = int(round(frames / fps / 60 * cuts_per_minute))
+    spacing = frames / (count + 1)
+    jitter = rng.uniform(-0.25, 0.25, count) * spacing
+    return sorted({int(spacing * (i + 1) + jitter[i]) for i in range(count)})
+
+def synthetic_scene(width, height, scene_num, rng):
+    """A textured grey background, dark and light in turn so every cut registers, and 1-2 subjects."""
+    level = rng.integers(20, 70) if scene_num % 2 == 0 else rng.integers(170, 220)
+    texture = cv2.resize(rng.normal(0, 6, (height // 8 + 1, width // 8 + 1)), (width, height))
+    background = cv2.cvtColor(np.clip(level + texture, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+    subjects = []
+    for _ in range(rng.integers(1, 3)):
+        center = rng.uniform(0.2, 0.8)
+        subjects.append({
+            'color': tuple(int(channel) for channel in rng.permutation([0, 60, 230])),
+            'size': (int(width * rng.uniform(0.06, 0.12)), int(height * rng.uniform(0.45, 0.7))),
+            'center': center,
+            'amplitude': rng.uniform(0.02, min(center, 1 - center) - 0.05),
+            'period': rng.uniform(2.0, 8.0),
+            'phase': rng.uniform(0, 2 * np.pi),
+        })
+    return background, subjects
+
+def make_synthetic_video(path, width, height, seconds, cuts_per_minute, fps=SUITE_FPS, seed=0):
+    """Write a clip of coloured shapes swaying across grey scenes (what StubBackend detects), with hard cuts."""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * fps)
+    cuts = set(synthetic_cut_frames(frames, fps, cuts_per_minute, rng))
+    scene_num = 0
+    background, subjects = synthetic_scene(width, height, scene_num, rng)
+    writer = toReel.open_video_writer(path, fps, (width, height), encoding={'preset': 'ultrafast'})
+    try:
+        for frame_num in range(frames):
+            if frame_num in cuts:
+                scene_num += 1
+                background, subjects = synthetic_scene(width, height, scene_num, rng)
+            frame = background.copy()
+            for subject in subjects:
+                subject_width, subject_height = subject['size']
+                x = width * (subject['center'] + subject['amplitude'] *
+                             np.sin(2 * np.pi * frame_num / fps / subject['period'] + subject['phase']))
+                top = (height - subject_height) // 2
+                cv2.rectangle(frame, (int(x - subject_width / 2), top), (int(x + subject_width / 2), top + subject_height),
+                              subject['color'], -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return frames, sorted(cuts)
+
+def suite_clip(clips_dir, resolution, seconds, cuts_per_minute):
+    """(name, path) of a synthetic clip, generated on first use and reused after that."""
+    width, height = RESOLUTIONS[resolution]
+    name = f"{resolution}-{seconds:g}s-{cuts_per_minute:g}cpm"
+    path = os.path.join(clips_dir, f"synthetic-{name}.mp4")
+    if not os.path.exists(path):
+        os.makedirs(clips_dir, exist_ok=True)
+        print(f"Generating {path}")
+        partial_path = f"{path}.part.mp4"
+        make_synthetic_video(partial_path, width, height, seconds, cuts_per_minute)
+        os.replace(partial_path, path)
+    return name, path
+
+def suite_process_video(clip):
+    """process_video on one clip: throughput of each pass, time to first output frame, peak memory."""
+    _, _, _, total_frames = toReel.get_video_metadata(clip)
+    toReel.warm_up_model(batch_size=toReel.DEFAULT_BATCH_SIZE)
+    first_output = None
+
+    def on_progress(progress, status):
+        nonlocal first_output
+        if first_output is None and status.startswith("Generating"):
+            first_output = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        profile_path = os.path.join(out_dir, 'profile.json')
+        start = time.perf_counter()
+        toReel.process_video(clip, os.path.join(out_dir, 'out.mp4'), progress_path=None,
+                             progress_callback=on_progress, profile_path=profile_path)
+        elapsed = time.perf_counter() - start
+        with open(profile_path) as f:
+            profile = json.load(f)
+    return {
+        'seconds': elapsed,
+        'fps': total_frames / elapsed,
+        'analysis_fps': profile['passes']['analysis']['fps'],
+        'crop_fps': profile['passes']['crop']['fps'],
+        'first_output_seconds': first_output if first_output is not None else elapsed,
+        'movenet_p95_ms': profile['stages']['analysis.movenet']['p95_ms'],
+        'peak_rss_mb': profile['peak_rss_bytes'] / 1024**2,
+        'ffmpeg_peak_rss_mb': profile['peak_rss_children_bytes'] / 1024**2,
+    }
+
+def suite_multiple_outputs(clip):
+    """process_multiple_outputs with two overlapping ranges and one apart from them."""
+    _, _, _, total_frames = toReel.get_video_metadata(clip)
+    toReel.warm_up_model(batch_size=toReel.DEFAULT_BATCH_SIZE)
+    ranges = [(0, total_frames // 2), (total_frames // 3, 2 * total_frames // 3), (3 * total_frames // 4, total_frames)]
+    with tempfile.TemporaryDirectory() as out_dir:
+        outputs_and_ranges = []
+        for clip_num, (start_frame, end_frame) in enumerate(ranges):
+            outputs_and_ranges += [os.path.join(out_dir, f"out{clip_num}.mp4"), f"{start_frame}-{end_frame}"]
+        start = time.perf_counter()
+        toReel.process_multiple_outputs(clip, outputs_and_ranges, progress_path=None)
+        elapsed = time.perf_counter() - start
+    output_frames = sum(end_frame - start_frame for start_frame, end_frame in ranges)
+    return {
+        'seconds': elapsed,
+        'fps': output_frames / elapsed,
+        'peak_rss_mb': toReel.peak_rss_bytes() / 1024**2,
+    }
+
+def suite_planner(frames):
+    """MovementPlanner over `frames` synthetic detections."""
+    plan_time, smooth_time, peak = measure_planner(frames, SUITE_FPS)
+    return {
+        'plan_us_per_frame': plan_time / frames * 1e6,
+        'smooth_seconds': smooth_time,
+        'peak_traced_mb': peak / 1024**2,
+    }
+
+def suite_cluster_people(frames):
+    """cluster_people latency per frame of crowded synthetic detections."""
+    keypoints = synthetic_keypoints(frames)
+    latencies = np.empty(frames)
+    for frame_num, frame_keypoints in enumerate(keypoints):
+        people = [(i, kp) for i, kp in enumerate(frame_keypoints) if kp[2] > toReel.DETECTION_CONFIDENCE_THRESHOLD]
+        start = time.perf_counter()
+        toReel.cluster_people(people, threshold=0.05)
+        latencies[frame_num] = time.perf_counter() - start
+    return {
+        'fps': frames / latencies.sum(),
+        'p50_us': float(np.percentile(latencies, 50) * 1e6),
+        'p95_us': float(np.percentile(latencies, 95) * 1e6),
+    }
+
+def run_isolated(function, *args):
+    """Run one case in a fresh process, so its peak RSS and warm-up are its own."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+def higher_is_better(metric):
+    # Throughputs end in fps; every other metric is a time or a size
+    return metric.endswith('fps')
+
+def best_of(runs):
+    return {metric: (max if higher_is_better(metric) else min)(run[metric] for run in runs) for metric in runs[0]}
+
+def suite_environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'model': toReel.model_id(),
+    }
+
+def compare_to_baseline(results, baseline, threshold):
+    """(case, metric, baseline, current, change, regressed) for every metric both runs have."""
+    rows = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline['cases'].get(case, {}).get(metric)
+            if not old:
+                continue
+            change = value / old - 1
+            regressed = change < -threshold if higher_is_better(metric) else change > threshold
+            rows.append((case, metric, old, value, change, regressed))
+    return rows
+
+def bench_suite(resolutions, seconds, cuts_per_minute, model, model_path, runs, clips_dir, planner_frames,
+                cluster_frames, baseline_path, save_path, threshold):
+    # Spawned cases read the model choice from the environment, like analysis workers
+    if model == 'stub':
+        toReel.configure_model(backend='stub')
+    elif model_path:
+        toReel.configure_model(backend='auto', model_path=model_path)
+    environment = suite_environment()
+    print(f"Model: {environment['model']}, {environment['cpus']} CPUs, best of {runs}")
+
+    cases = []
+    for resolution in resolutions:
+        for clip_seconds in seconds:
+            for cuts in cuts_per_minute:
+                name, clip = suite_clip(clips_dir, resolution, clip_seconds, cuts)
+                cases.append((f"process_video/{name}", suite_process_video, clip))
+                cases.append((f"multiple_outputs/{name}", suite_multiple_outputs, clip))
+    cases.append((f"planner/{planner_frames}", suite_planner, planner_frames))
+    cases.append((f"cluster_people/{cluster_frames}", suite_cluster_people, cluster_frames))
+
+    results = {}
+    for case, function, argument in cases:
+        print(f"\n=== {case}")
+        results[case] = best_of([run_isolated(function, argument) for _ in range(runs)])
+
+    print()
+    for case, metrics in results.items():
+        print(f"{case:<40} " + "  ".join(f"{metric} {value:.4g}" for metric, value in metrics.items()))
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment, 'cases': results}
+    if save_path:
+        toReel.write_json_atomic(save_path, report)
+        print(f"Saved baseline: {save_path}")
+    if not baseline_path:
+        return report
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    changed = [key for key in environment if key != 'platform' and baseline['environment'].get(key) != environment[key]]
+    if changed:
+        print(f"warning: baseline was recorded with a different {', '.join(changed)}")
+    rows = compare_to_baseline(results, baseline, threshold)
+    print(f"\n{'case':<40} {'metric':>22} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, metric, old, value, change, regressed in rows:
+        print(f"{case:<40} {metric:>22} {old:>10.4g} {value:>10.4g} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    regressions = sum(1 for row in rows if row[5])
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    if regressions:
+        sys.exit(1)
+    return report
+
+# -------------------------------
+# Benchmark: CLI cold start
+# -------------------------------
+STARTUP_TARGET_SECONDS = 1.0  # for everything up to argument validation
+
+def bench_startup(runs, target, warm_up):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(script_dir, 'toReel.py')
+    # (name, command, held to the target)
+    commands = [
+        ('import toReel', [sys.executable, '-c', 'import toReel'], True),
+        ('--help', [sys.executable, script, '--help'], True),
+        ('argument error', [sys.executable, script, '-i', 'missing.mp4'], True),
+        ('import server', [sys.executable, '-c', 'import server'], True),
+    ]
+    if warm_up:
+        commands.append(('model warm-up', [sys.executable, '-c', 'import toReel; toReel.warm_up_model()'], False))
+
+    check = subprocess.run([sys.executable, '-c', "import sys, toReel; print('tensorflow' in sys.modules)"],
+                           cwd=script_dir, capture_output=True, text=True)
+    print(f"TensorFlow imported by 'import toReel': {check.stdout.strip() or check.stderr.strip()}")
+
+    results = []
+    for name, cmd, held_to_target in commands:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=script_dir, capture_output=True)
+            timings.append(time.perf_counter() - start)
+        results.append((name, float(np.median(timings)), min(timings), max(timings), held_to_target))
+
+    print(f"{'command':>16} {'median s':>9} {'min s':>7} {'max s':>7}  target {target:g} s")
+    for name, median, fastest, slowest, held_to_target in results:
+        verdict = ('ok' if median <= target else 'SLOW') if held_to_target else '-'
+        print(f"{name:>16} {median:>9.3f} {fastest:>7.3f} {slowest:>7.3f}  {verdict}")
+    return results
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmarks for toReel.py')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch_parser = subparsers.add_parser('batch', help='Analysis pass frames per second by MoveNet batch size')
+    batch_parser.add_argument('-i', '--input', required=True, help='Input video file (e.g. a 1080p clip)')
+    batch_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16], help='Batch sizes to compare; the first is the baseline')
+    batch_parser.add_argument('--max-frames', type=int, default=600, help='Frames to analyze per run (0 for the whole video)')
+
+    cache_parser = subparsers.add_parser('cache', help='Analysis pass time with a cold vs. warm analysis cache')
+    cache_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    cache_parser.add_argument('--cache-dir', default=toReel.CACHE_DIR, help='Analysis cache directory')
+
+    planner_parser = subparsers.add_parser('planner', help='MovementPlanner time and peak memory on synthetic multi-hour input')
+    planner_parser.add_argument('--hours', type=float, default=3.0, help='Simulated video length in hours')
+    planner_parser.add_argument('--fps', type=float, default=30.0, help='Simulated frame rate')
+
+    stride_parser = subparsers.add_parser('stride', help='Strided analysis speedup and crop path deviation from full-rate analysis')
+    stride_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    stride_parser.add_argument('--strides', type=int, nargs='+', default=[2, 3, 5], help='Strides to compare against stride 1')
+    stride_parser.add_argument('--adaptive', action='store_true', help='Also run each stride with --adaptive-stride')
+    stride_parser.add_argument('--tolerance', type=float, default=0.02, help='Allowed crop deviation as a fraction of the frame width (default: 0.02)')
+    stride_parser.add_argument('--max-frames', type=int, default=0, help='Frames to analyze per run (0 for the whole video)')
+
+    gate_parser = subparsers.add_parser('gate', help='Motion-gated analysis speedup and crop path deviation from running MoveNet on every frame')
+    gate_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    gate_parser.add_argument('--thresholds', type=float, nargs='+', default=[5.0, toReel.MOTION_GATE_THRESHOLD, 25.0], help='Motion thresholds to compare')
+    gate_parser.add_argument('--max-skip', type=int, default=toReel.MOTION_GATE_MAX_SKIP, help='Most consecutive frames that may be skipped')
+    gate_parser.add_argument('--max-frames', type=int, default=0, help='Frames to analyze per run (0 for the whole video)')
+
+    scene_parser = subparsers.add_parser('scene', help='Per-frame scene detection cost of full-resolution MSE vs. downscaled signatures')
+    scene_parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS), help='Synthetic frame sizes to time')
+    scene_parser.add_argument('--frames', type=int, default=100, help='Frames per resolution')
+    scene_parser.add_argument('-i', '--input', help='Optional video to compare detected cuts on')
+
+    decode_parser = subparsers.add_parser('decode', help='First-pass decode throughput at full resolution (OpenCV) vs. scaled (ffmpeg)')
+    decode_parser.add_argument('-i', '--input', required=True, help='Input video file (e.g. a 1080p or 4K clip)')
+    decode_parser.add_argument('--max-frames', type=int, default=600, help='Frames to decode per run (0 for the whole video)')
+
+    parallel_parser = subparsers.add_parser('parallel', help='Analysis pass scaling from 1 to N worker processes')
+    parallel_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    parallel_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='Largest worker count to try (default: CPU count)')
+    parallel_parser.add_argument('--max-frames', type=int, default=0, help='Frames to analyze per run (0 for the whole video)')
+
+    render_parser = subparsers.add_parser('render', help='Crop pass scaling from 1 to N render processes')
+    render_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    render_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='Largest worker count to try (default: CPU count)')
+
+    stream_parser = subparsers.add_parser('stream', help='Time to first output frame and total time, two-pass vs. --single-pass')
+    stream_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    stream_parser.add_argument('--max-lookahead', type=float, default=toReel.STREAM_MAX_LOOKAHEAD_SECONDS, help='Single-pass lookahead cap in seconds')
+
+    backends_parser = subparsers.add_parser('backends', help='MoveNet backend throughput and keypoint parity against the first model')
+    backends_parser.add_argument('-i', '--input', required=True, help='Input video file')
+    backends_parser.add_argument('-m', '--models', type=parse_model_spec, nargs='+', required=True, help='[backend:]path per model, e.g. model tflite:movenet.tflite onnx:movenet.onnx; the first is the reference')
+    backends_parser.add_argument('--threads', type=int, default=0, help='Inference threads for every backend (0 = backend default)')
+    backends_parser.add_argument('--tolerance', type=float, default=0.01, help='Allowed deviation of the followed x, normalized (default: 0.01)')
+    backends_parser.add_argument('--max-frames', type=int, default=300, help='Frames to run through each model (0 for the whole video)')
+
+    clusters_parser = subparsers.add_parser('clusters', help='Keypoint filtering and clustering: per-frame Python loops vs. NumPy batches')
+    clusters_parser.add_argument('--frames', type=int, default=100000, help='Synthetic frames to cluster')
+    clusters_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, toReel.CLUSTER_VECTORIZE_MIN_FRAMES, 1024, 100000], help='Frames per best_clusters call')
+
+    profile_parser = subparsers.add_parser('profile', help='Cost of --profile-file: per-stage overhead and whole-run time, disabled vs. enabled')
+    profile_parser.add_argument('-i', '--input', help='Optional video to time process_video on')
+    profile_parser.add_argument('--calls', type=int, default=1000000, help='stage() blocks to time per mode')
+    profile_parser.add_argument('--runs', type=int, default=3, help='process_video runs per mode (the best is kept)')
+
+    suite_parser = subparsers.add_parser('suite', help='Synthetic clips through process_video, process_multiple_outputs, MovementPlanner and cluster_people, with JSON baselines')
+    suite_parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=['720p', '1080p'], help='Synthetic clip sizes')
+    suite_parser.add_argument('--seconds', type=float, nargs='+', default=[10.0], help='Synthetic clip lengths')
+    suite_parser.add_argument('--cuts-per-minute', type=float, nargs='+', default=[0.0, 12.0], help='Scene cut densities')
+    suite_parser.add_argument('--model', choices=['stub', 'real'], default='stub', help='Deterministic stub detector (default) or the configured MoveNet model')
+    suite_parser.add_argument('--model-path', help='Model for --model real (default: $REELS_MODEL_PATH or ./model)')
+    suite_parser.add_argument('--runs', type=int, default=3, help='Runs per case; the best value of each metric is kept')
+    suite_parser.add_argument('--clips-dir', default=SUITE_CLIPS_DIR, help='Where generated clips are kept between runs')
+    suite_parser.add_argument('--planner-frames', type=int, default=SUITE_FPS * 3600, help='Synthetic frames for the MovementPlanner case')
+    suite_parser.add_argument('--cluster-frames', type=int, default=20000, help='Synthetic frames for the cluster_people case')
+    suite_parser.add_argument('--baseline', help='Baseline JSON to compare against; exits 1 on a regression')
+    suite_parser.add_argument('--save', help='Write this run as a baseline JSON')
+    suite_parser.add_argument('--threshold', type=float, default=0.15, help='Relative change that counts as a regression (default: 0.15)')
+
+    startup_parser = subparsers.add_parser('startup', help='Cold start of the CLI and server: import, --help and argument errors, against a time target')
+    startup_parser.add_argument('--runs', type=int, default=5, help='Launches per command (the median is reported)')
+    startup_parser.add_argument('--target', type=float, default=STARTUP_TARGET_SECONDS, help=f'Seconds allowed up to argument validation (default: {STARTUP_TARGET_SECONDS:g})')
+    startup_parser.add_argument('--warm-up', action='store_true', help='Also time importing TensorFlow, loading the model and the first inference')
+
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    if args.command == 'batch':
+        bench_batch(args.input, args.batch_sizes, args.max_frames)
+    elif args.command == 'cache':
+        bench_cache(args.input, args.cache_dir)
+    elif args.command == 'planner':
+        bench_planner(args.hours, args.fps)
+    elif args.command == 'stride':
+        bench_stride(args.input, args.strides, args.adaptive, args.tolerance, args.max_frames)
+    elif args.command == 'gate':
+        bench_gate(args.input, args.thresholds, args.max_skip, args.max_frames)
+    elif args.command == 'scene':
+        bench_scene(args.resolutions, args.frames, args.input)
+    elif args.command == 'decode':
+        bench_decode(args.input, args.max_frames)
+    elif args.command == 'parallel':
+        bench_parallel(args.input, args.max_workers, args.max_frames)
+    elif args.command == 'render':
+        bench_render(args.input, args.max_workers)
+    elif args.command == 'stream':
+        bench_stream(args.input, args.max_lookahead)
+    elif args.command == 'backends':
+        bench_backends(args.input, args.models, args.max_frames, args.threads, args.tolerance)
+    elif args.command == 'clusters':
+        bench_clusters(args.frames, args.batch_sizes)
+    elif args.command == 'profile':
+        bench_profile(args.input, args.calls, args.runs)
+    elif args.command == 'startup':
+        bench_startup(args.runs, args.target, args.warm_up)
+    elif args.command == 'suite':
+        bench_suite(args.resolutions, args.seconds, args.cuts_per_minute, args.model, args.model_path, args.runs,
+                    args.clips_dir, args.planner_frames, args.cluster_frames, args.baseline, args.save, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+from concurrent.futures import Future, ThreadPoolExecutor
 import subprocess
 import os
 from pathlib import Path
 import traceback
 import logging
-import cv2
+import shutil
+import threading
+import time
+import uuid
+import hashlib
 import json
+import store
+import worker
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -15,118 +22,648 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Directory where toReel.py is located
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Create uploads directory if it doesn't exist
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+UPLOAD_DIR = os.path.join(SCRIPT_DIR, 'uploads')
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Every job renders into its own directory under uploads/jobs/<job_id>
+JOBS_DIR = os.path.join(UPLOAD_DIR, 'jobs')
+os.makedirs(JOBS_DIR, exist_ok=True)
+
+# Uploads and finished outputs, stored once per content hash under uploads/store
+upload_store = store.ContentStore(os.path.join(UPLOAD_DIR, 'store'))
+# Stored outputs are only reused for the toReel.py that made them
+with open(os.path.join(SCRIPT_DIR, 'toReel.py'), 'rb') as script_file:
+    SCRIPT_VERSION = hashlib.sha256(script_file.read()).hexdigest()
+
+# Model of the one-off toReel.py fallback, which reads the same environment
+LOCAL_MODEL = worker.model_settings(os.environ.get('REELS_MODEL_BACKEND', 'auto'),
+                                    os.environ.get('REELS_MODEL_PATH', os.path.join(SCRIPT_DIR, 'model')))
+# Job spec fields that name this job's files; every other field changes what is rendered
+JOB_FILE_FIELDS = ('command', 'job_id', 'input', 'output', 'multiple_outputs', 'progress_path', 'profile_path',
+                   'content_hash')
+
+# Uploads and finished job directories older than this are removed
+RETENTION_SECONDS = int(os.environ.get('REELS_RETENTION_SECONDS', 24 * 60 * 60))
+
+# Jobs time their pipeline stages into <workdir>/profile.json (feeds /metrics); 0 turns it off
+PROFILE_JOBS = os.environ.get('REELS_PROFILE_JOBS', '1') != '0'
+
+# -------------------------------
+# Job subsystem
+# -------------------------------
+job_executor = ThreadPoolExecutor(max_workers=worker.MAX_CONCURRENT_JOBS, thread_name_prefix='job')
+jobs = {}
+jobs_lock = threading.Lock()
+# Notified whenever a job's status or progress changes (used by /jobs/<id>/events)
+jobs_changed = threading.Condition(jobs_lock)
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+# Seconds between keep-alive comments on idle event streams
+EVENT_STREAM_KEEPALIVE = 15
+
 def clean_upload_directory():
-    """Remove all files from the upload directory."""
+    """
+    Remove loose uploads and finished jobs older than RETENTION_SECONDS. Expired
+    jobs unpin their outputs; the store evicts by its own size budget.
+    """
+    cutoff = time.time() - RETENTION_SECONDS
     for file in os.listdir(UPLOAD_DIR):
         file_path = os.path.join(UPLOAD_DIR, file)
         try:
-            if os.path.isfile(file_path):
+            if os.path.isfile(file_path) and os.path.getmtime(file_path) < cutoff:
                 os.unlink(file_path)
         except Exception as e:
             logger.error(f"Error deleting {file_path}: {e}")
 
+    with jobs_lock:
+        expired = [job_id for job_id, job in jobs.items()
+                   if job['status'] in FINISHED_STATUSES and job['finished_at'] < cutoff]
+        expired_jobs = [jobs.pop(job_id) for job_id in expired]
+    for job in expired_jobs:
+        for digest in job['output_pins']:
+            upload_store.release(digest)
+        shutil.rmtree(job['workdir'], ignore_errors=True)
+    if expired_jobs:
+        upload_store.evict()
+
+def timestamp_to_seconds(timestamp):
+    # Convert "MM:SS" format to seconds
+    if not timestamp:
+        # For empty start, return 0. For empty end, return total duration
+        return 0
+    parts = timestamp.split(':')
+    if len(parts) == 2:
+        minutes, seconds = map(float, parts)
+        return minutes * 60 + seconds
+    return float(timestamp)
+
+def parse_frame_rate(rate):
+    """'30000/1001' -> 29.97; 0.0 for ffprobe's '0/0' or a missing value."""
+    numerator, _, denominator = (rate or '0/0').partition('/')
+    denominator = float(denominator or 1)
+    return float(numerator) / denominator if denominator else 0.0
+
+def probe_video(path):
+    """
+    (fps, total_frames) of the first video stream. ffprobe only reads the container
+    headers, and keeps OpenCV out of the server; OpenCV is the fallback where
+    ffprobe is not installed.
+    """
+    try:
+        result = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-of', 'json',
+                                 '-show_entries', 'stream=r_frame_rate,avg_frame_rate,nb_frames,duration:format=duration',
+                                 path], capture_output=True, text=True)
+    except FileNotFoundError:
+        import cv2
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise Exception("Could not open video file")
+        fps, total_frames = cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        return fps, total_frames
+
+    streams = json.loads(result.stdout or '{}').get('streams') if result.returncode == 0 else None
+    if not streams:
+        raise Exception("Could not open video file")
+    stream = streams[0]
+    fps = parse_frame_rate(stream.get('r_frame_rate')) or parse_frame_rate(stream.get('avg_frame_rate'))
+    if not fps:
+        raise Exception("Could not read the video frame rate")
+    if str(stream.get('nb_frames', '')).isdigit():
+        return fps, int(stream['nb_frames'])
+    # Matroska/WebM streams carry no frame count, only a duration
+    duration = float(stream.get('duration') or json.loads(result.stdout).get('format', {}).get('duration') or 0)
+    return fps, int(round(duration * fps))
+
+def build_job_spec(job_id, data, workdir):
+    """
+    Turn a /jobs request body into the worker job, the equivalent CLI command
+    (used when no worker is running) and the list of output paths.
+    """
+    input_path = data.get('input_path')
+    output_type = data.get('output_type', 'single')  # 'single' or 'multiple'
+    extension = os.path.splitext(input_path)[1] or '.mp4'
+    progress_path = os.path.join(workdir, 'progress.json')
+    profile_options = {'profile_path': os.path.join(workdir, 'profile.json')} if PROFILE_JOBS else {}
+    profile_args = ["--profile-file", profile_options['profile_path']] if PROFILE_JOBS else []
+
+    if not os.path.isfile(input_path):
+        raise Exception("Could not open video file")
+
+    if output_type == 'single':
+        output_path = os.path.join(workdir, f"output{extension}")
+        spec = {'command': 'run', 'job_id': job_id, 'input': input_path, 'output': output_path, **profile_options}
+        cmd = ["python", "toReel.py", "-i", input_path, "-o", output_path, "--progress-file", progress_path, *profile_args]
+        return spec, cmd, [output_path]
+
+    # Handle multiple crops with new argument format
+    crops = data.get('crops', [])
+    if not crops:
+        raise ValueError("No crops provided")
+    # Get video metadata to calculate frames from timestamps
+    fps, total_frames = probe_video(input_path)
+    total_duration = total_frames / fps
+    spec = {'command': 'run', 'job_id': job_id, 'input': input_path, 'multiple_outputs': [], **profile_options}
+    cmd = ["python", "toReel.py", "-i", input_path, "--progress-file", progress_path, *profile_args, "-mo"]
+    output_paths = []
+
+    for i, crop in enumerate(crops):
+        output_path = os.path.join(workdir, f"output_{i+1}{extension}")
+
+        # Convert timestamp to seconds, then to frames
+        start_seconds = timestamp_to_seconds(crop['start'])
+        end_seconds = timestamp_to_seconds(crop['end']) or total_duration
+
+        start_frame = int(start_seconds * fps)
+        end_frame = int(end_seconds * fps)
+
+        # Add output path and frame range for each crop
+        cmd.extend([output_path, f"{start_frame}-{end_frame}"])
+        spec['multiple_outputs'].extend([output_path, f"{start_frame}-{end_frame}"])
+        output_paths.append(output_path)
+    return spec, cmd, output_paths
+
+def finish_job(job, status, error=None):
+    with jobs_lock:
+        job['status'] = status
+        job['error'] = error
+        job['finished_at'] = time.time()
+        jobs_changed.notify_all()
+    release_input_pin(job)
+    record_job_metrics(job, status)
+
+def release_input_pin(job):
+    digest, job['input_pin'] = job['input_pin'], None
+    if digest is not None:
+        upload_store.release(digest)
+
+def job_result_key(job, model):
+    """
+    Key of the job's outputs in the store: its input, toReel.py, the model and every
+    spec field that affects the output (frame ranges, output containers, options).
+    """
+    spec = job['spec']
+    outputs = [spec['output']] if 'output' in spec else spec['multiple_outputs'][0::2]
+    return upload_store.result_key(spec['content_hash'], script=SCRIPT_VERSION, model=model,
+                                   ranges=spec.get('multiple_outputs', [])[1::2],
+                                   extensions=[os.path.splitext(path)[1].lower() for path in outputs],
+                                   options={key: value for key, value in spec.items() if key not in JOB_FILE_FIELDS})
+
+def store_job_outputs(job, model):
+    """
+    Move a completed job's outputs into the store, pinned until the job expires, and
+    index them under the result key for the model that made them. Raises before
+    storing anything when an output is missing, so the job fails instead.
+    """
+    missing = [path for path in job['outputs'] if not os.path.exists(path)]
+    if missing:
+        raise Exception(f"Job did not write {', '.join(os.path.basename(path) for path in missing)}")
+    stored = []
+    for path in job['outputs']:
+        digest, stored_path, _ = upload_store.put_file(path)
+        upload_store.acquire(digest)
+        job['output_pins'].append(digest)
+        stored.append((digest, stored_path))
+    job['outputs'] = [stored_path for _, stored_path in stored]
+    if 'content_hash' in job['spec']:
+        job['result_key'] = job_result_key(job, model)
+        upload_store.save_result(job['result_key'], [digest for digest, _ in stored])
+
+def read_job_profile(job):
+    """The job's stage timing report, or None when it was not profiled (or wrote nothing)."""
+    profile_path = job['spec'].get('profile_path')
+    if not profile_path:
+        return None
+    try:
+        with open(profile_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def update_job_progress(job, progress, status):
+    with jobs_lock:
+        job['progress'] = progress
+        job['message'] = status
+        jobs_changed.notify_all()
+
+def run_job(job_id):
+    """Runs on a job_executor thread."""
+    job = jobs[job_id]
+    with jobs_lock:
+        if job['status'] == 'cancelled':
+            return
+        job['status'] = 'running'
+        job['started_at'] = time.time()
+        jobs_changed.notify_all()
+
+    try:
+        # Prefer the long-lived worker (model already loaded and warm); fall back
+        # to a one-off toReel.py process when no worker is running.
+        try:
+            logger.info(f"Submitting job to worker: {job['spec']}")
+            reply = worker.submit_job(job['spec'], on_progress=lambda progress, status: update_job_progress(job, progress, status))
+            model = reply.get('model')
+        except ConnectionRefusedError:
+            logger.info(f"No worker available, running command: {' '.join(job['cmd'])}")
+            process = subprocess.Popen(job['cmd'], cwd=SCRIPT_DIR)
+            with jobs_lock:
+                job['process'] = process
+                cancelled = job['cancel_requested']
+            if cancelled:
+                process.terminate()
+            returncode = process.wait()
+            if job['cancel_requested']:
+                raise worker.WorkerJobCancelled("Job cancelled")
+            if returncode != 0:
+                raise Exception(f"Script failed with return code: {returncode}")
+            model = LOCAL_MODEL
+        store_job_outputs(job, model)
+        finish_job(job, 'completed')
+    except worker.WorkerJobCancelled:
+        finish_job(job, 'cancelled')
+    except Exception as e:
+        logger.error(f"Error running job {job_id}: {str(e)}\n{traceback.format_exc()}")
+        finish_job(job, 'failed', str(e))
+
+def submit_job(data):
+    job_id = uuid.uuid4().hex
+    # Pin the upload before anything reads it, so eviction cannot pull it out from under the job
+    input_digest = upload_store.digest_of(data.get('input_path') or '')
+    if input_digest is not None:
+        upload_store.acquire(input_digest)
+        if upload_store.find(input_digest) is None:
+            upload_store.release(input_digest)
+            raise Exception("Upload was evicted from the store; upload the file again")
+    workdir = os.path.join(JOBS_DIR, job_id)
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        spec, cmd, output_paths = build_job_spec(job_id, data, workdir)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if input_digest is not None:
+            upload_store.release(input_digest)
+        raise
+    if input_digest is not None:
+        # The worker keys its analysis cache on this too, instead of hashing the file again
+        spec['content_hash'] = input_digest
+
+    job = {
+        'id': job_id,
+        'status': 'queued',
+        'error': None,
+        'workdir': workdir,
+        'spec': spec,
+        'cmd': cmd,
+        'outputs': output_paths,
+        'output_type': data.get('output_type', 'single'),
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'cancel_requested': False,
+        'process': None,
+        # Filled in from worker progress messages; None until the first one arrives
+        'progress': None,
+        'message': None,
+        # Store digests this job holds: its input until it finishes, its outputs until it expires
+        'input_pin': input_digest,
+        'output_pins': [],
+        # Looked up at submission; set again when the outputs are stored, for the model that ran the job
+        'result_key': None,
+    }
+
+    # The same upload with the same ranges and options was rendered on the model
+    # that would run it now (the worker's, or the fallback's): answer from the store
+    stored = None
+    if input_digest is not None:
+        job['result_key'] = job_result_key(job, worker.worker_model() or LOCAL_MODEL)
+        stored = upload_store.load_result(job['result_key'])
+    if stored is not None:
+        for digest, _ in stored:
+            upload_store.acquire(digest)
+            job['output_pins'].append(digest)
+        job['outputs'] = [path for _, path in stored]
+        job['started_at'] = time.time()
+        with jobs_lock:
+            jobs[job_id] = job
+        finish_job(job, 'completed')
+        with metrics_lock:
+            job_metrics['store_result_hits'] += 1
+        job['future'] = Future()
+        job['future'].set_result(None)
+        return job
+
+    with jobs_lock:
+        jobs[job_id] = job
+    job['future'] = job_executor.submit(run_job, job_id)
+    return job
+
+def read_job_progress(job):
+    if job['status'] == 'completed':
+        return {'progress': 100, 'status': 'Done'}
+    if job['progress'] is not None:
+        return {'progress': job['progress'], 'status': job['message']}
+    # Subprocess fallback: toReel.py writes throttled updates to the job's progress file
+    try:
+        with open(os.path.join(job['workdir'], 'progress.json'), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        # Missing before the first frame; may be mid-write while a frame is reported
+        return {'progress': 0, 'status': 'Queued...' if job['status'] == 'queued' else 'Initializing...'}
+
+def output_url(path):
+    return '/uploads/' + Path(os.path.relpath(path, UPLOAD_DIR)).as_posix()
+
+def job_summary(job):
+    progress = read_job_progress(job)
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'error': job['error'],
+        'progress': progress.get('progress', 0),
+        'message': progress.get('status', ''),
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+
+# -------------------------------
+# Metrics: job counts and stage timings of finished jobs, in Prometheus text format
+# -------------------------------
+metrics_lock = threading.Lock()
+job_metrics = {
+    'finished': {},        # status -> jobs finished with it
+    'stage_seconds': {},   # stage -> seconds summed over every profiled job
+    'stage_calls': {},
+    'pass_seconds': {},    # pass -> seconds summed over every profiled job
+    'pass_frames': {},
+    'last_profile': None,  # report of the most recently finished profiled job
+    'store_uploads': {},   # 'new' or 'deduplicated' -> uploads
+    'store_result_hits': 0,  # jobs answered with stored outputs
+}
+
+def record_job_metrics(job, status):
+    profile = read_job_profile(job)
+    with metrics_lock:
+        job_metrics['finished'][status] = job_metrics['finished'].get(status, 0) + 1
+        if profile is None:
+            return
+        for stage, stats in profile['stages'].items():
+            job_metrics['stage_seconds'][stage] = job_metrics['stage_seconds'].get(stage, 0.0) + stats['total_s']
+            job_metrics['stage_calls'][stage] = job_metrics['stage_calls'].get(stage, 0) + stats['count']
+        for name, entry in profile['passes'].items():
+            job_metrics['pass_seconds'][name] = job_metrics['pass_seconds'].get(name, 0.0) + entry['seconds']
+            job_metrics['pass_frames'][name] = job_metrics['pass_frames'].get(name, 0) + entry['frames']
+        job_metrics['last_profile'] = profile
+
+def render_metrics():
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    with jobs_lock:
+        by_status = {}
+        for job in jobs.values():
+            by_status[job['status']] = by_status.get(job['status'], 0) + 1
+    with metrics_lock:
+        finished = dict(job_metrics['finished'])
+        stage_seconds = dict(job_metrics['stage_seconds'])
+        stage_calls = dict(job_metrics['stage_calls'])
+        pass_seconds = dict(job_metrics['pass_seconds'])
+        pass_frames = dict(job_metrics['pass_frames'])
+        last_profile = job_metrics['last_profile']
+
+    metric('reels_jobs', 'gauge', 'Jobs currently known to the server, by status.',
+           [({'status': status}, count) for status, count in sorted(by_status.items())])
+    metric('reels_jobs_finished_total', 'counter', 'Jobs finished since the server started, by final status.',
+           [({'status': status}, count) for status, count in sorted(finished.items())])
+
+    # Per-call quantiles exist per job only, so they are gauges of the latest job; the
+    # totals are counters over all jobs (rate(seconds) / rate(calls) is the mean)
+    metric('reels_stage_seconds_total', 'counter', 'Seconds spent in each pipeline stage over all profiled jobs.',
+           [({'stage': stage}, seconds) for stage, seconds in sorted(stage_seconds.items())])
+    metric('reels_stage_calls_total', 'counter', 'Calls of each pipeline stage over all profiled jobs.',
+           [({'stage': stage}, calls) for stage, calls in sorted(stage_calls.items())])
+    if last_profile is not None:
+        stage_samples = []
+        for stage, stats in sorted(last_profile['stages'].items()):
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                stage_samples.append(({'stage': stage, 'quantile': quantile}, stats[key] / 1000))
+        metric('reels_last_job_stage_seconds', 'gauge', 'Time per call of each pipeline stage in the latest profiled job, by quantile.',
+               stage_samples)
+
+    metric('reels_pass_seconds_total', 'counter', 'Wall-clock seconds spent in each pass over all profiled jobs.',
+           [({'pass': name}, seconds) for name, seconds in sorted(pass_seconds.items())])
+    metric('reels_pass_frames_total', 'counter', 'Frames processed by each pass over all profiled jobs.',
+           [({'pass': name}, frames) for name, frames in sorted(pass_frames.items())])
+    if last_profile is not None:
+        metric('reels_pass_fps', 'gauge', 'Frames per second of each pass in the latest profiled job.',
+               [({'pass': name}, entry['fps']) for name, entry in sorted(last_profile['passes'].items())])
+        if last_profile['peak_rss_bytes'] is not None:
+            metric('reels_job_peak_rss_bytes', 'gauge', 'Peak resident memory of the process that ran the latest profiled job.',
+                   [({}, last_profile['peak_rss_bytes'])])
+
+    blobs, stored_bytes, pinned = upload_store.usage()
+    with metrics_lock:
+        uploads = dict(job_metrics['store_uploads'])
+        result_hits = job_metrics['store_result_hits']
+    metric('reels_store_blobs', 'gauge', 'Uploads and outputs in the content store.', [({}, blobs)])
+    metric('reels_store_bytes', 'gauge', 'Bytes used by the content store.', [({}, stored_bytes)])
+    metric('reels_store_max_bytes', 'gauge', 'Size budget of the content store.', [({}, upload_store.max_bytes)])
+    metric('reels_store_pinned_blobs', 'gauge', 'Blobs pinned by queued, running or unexpired jobs.', [({}, pinned)])
+    metric('reels_store_uploads_total', 'counter', 'Uploads received, by whether the content was already stored.',
+           [({'result': result}, count) for result, count in sorted(uploads.items())])
+    metric('reels_store_result_hits_total', 'counter', 'Jobs answered with outputs stored by an identical earlier job.',
+           [({}, result_hits)])
+    return '\n'.join(lines) + '\n'
+
+def get_job_or_404(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+    if job is None:
+        return None, (jsonify({"error": f"Unknown job: {job_id}"}), 404)
+    return job, None
+
+# -------------------------------
+# Routes
+# -------------------------------
 @app.route('/save-file', methods=['POST'])
 def save_file():
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
-        
+
         file = request.files['file']
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        # Clean up the uploads directory before saving new file
+        # Drop expired jobs; recent ones may belong to other users
         clean_upload_directory()
 
-        # Save file
-        filepath = os.path.join(UPLOAD_DIR, file.filename)
-        file.save(filepath)
-        logger.info(f"Saved file to: {filepath}")
-        
+        # Hashed while it is written in chunks; identical content resolves to the stored copy
+        digest, filepath, deduplicated = upload_store.put_stream(file.stream, file.filename)
+        with metrics_lock:
+            result = 'deduplicated' if deduplicated else 'new'
+            job_metrics['store_uploads'][result] = job_metrics['store_uploads'].get(result, 0) + 1
+        logger.info(f"Saved file to: {filepath}{' (already stored)' if deduplicated else ''}")
+
         return jsonify({
             "message": "File saved successfully",
-            "filepath": filepath
+            "filepath": filepath,
+            "sha256": digest,
+            "deduplicated": deduplicated
         })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/run-script', methods=['POST'])
-def run_script():
+@app.route('/blobs/<digest>', methods=['GET'])
+def find_blob(digest):
+    """Lets a client that hashed its file first skip uploading content the store already has."""
+    path = upload_store.find(digest.lower()) if store.is_digest(digest.lower()) else None
+    if path is None:
+        return jsonify({"error": "Not stored"}), 404
+    # The client skips the upload and submits a job for this blob next
+    upload_store.hold(digest.lower())
+    return jsonify({"filepath": path, "sha256": digest.lower(), "size": os.path.getsize(path)})
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
     try:
-        data = request.json
-        input_path = data.get('input_path')
-        output_type = data.get('output_type', 'single')  # 'single' or 'multiple'
-        
-        # Get video metadata to calculate frames from timestamps
-        cap = cv2.VideoCapture(input_path)
-        if not cap.isOpened():
-            raise Exception("Could not open video file")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        total_duration = total_frames / fps
-        cap.release()
+        job = submit_job(request.json)
+        return jsonify(job_summary(job)), 202
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    with jobs_lock:
+        all_jobs = sorted(jobs.values(), key=lambda job: job['created_at'])
+    return jsonify({"jobs": [job_summary(job) for job in all_jobs]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job, error = get_job_or_404(job_id)
+    if error:
+        return error
+    return jsonify(job_summary(job))
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream of job summaries, pushed whenever they change."""
+    job, error = get_job_or_404(job_id)
+    if error:
+        return error
+
+    def generate():
+        last_sent = None
+        last_event_time = time.monotonic()
+        while True:
+            summary = job_summary(job)
+            if summary != last_sent:
+                yield f"data: {json.dumps(summary)}\n\n"
+                last_sent = summary
+                last_event_time = time.monotonic()
+            elif time.monotonic() - last_event_time >= EVENT_STREAM_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_event_time = time.monotonic()
+            if summary['status'] in FINISHED_STATUSES:
+                return
+            # Woken early by worker progress; the timeout covers the subprocess
+            # fallback, whose progress only lands in the job's progress file
+            with jobs_changed:
+                jobs_changed.wait(timeout=1.0)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-        def timestamp_to_seconds(timestamp):
-            # Convert "MM:SS" format to seconds
-            if not timestamp:
-                # For empty start, return 0. For empty end, return total duration
-                return 0
-            parts = timestamp.split(':')
-            if len(parts) == 2:
-                minutes, seconds = map(float, parts)
-                return minutes * 60 + seconds
-            return float(timestamp)
-
-        # Get the directory where toReel.py is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        os.chdir(script_dir)
-
-        if output_type == 'single':
-            output_path = os.path.join(UPLOAD_DIR, f"output.{input_path.split('.')[-1]}")
-            cmd = ["python", "toReel.py", "-i", input_path, "-o", output_path]
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job, error = get_job_or_404(job_id)
+    if error:
+        return error
+
+    with jobs_lock:
+        if job['status'] in FINISHED_STATUSES:
+            return jsonify(job_summary(job)), 409
+        job['cancel_requested'] = True
+        process = job['process']
+        cancelled_while_queued = job['status'] == 'queued'
+        if cancelled_while_queued:
+            # run_job checks this before starting
+            job['status'] = 'cancelled'
+            job['finished_at'] = time.time()
+            jobs_changed.notify_all()
+    if cancelled_while_queued:
+        release_input_pin(job)
+        record_job_metrics(job, 'cancelled')
+
+    if job['status'] == 'running':
+        if process is not None:
+            process.terminate()
         else:
-            # Handle multiple crops with new argument format
-            crops = data.get('crops', [])
-            cmd = ["python", "toReel.py", "-i", input_path, "-mo"]
-            
-            for i, crop in enumerate(crops):
-                output_name = f"output_{i+1}.{input_path.split('.')[-1]}"
-                output_path = os.path.join(UPLOAD_DIR, output_name)
-                
-                # Convert timestamp to seconds, then to frames
-                start_seconds = timestamp_to_seconds(crop['start'])
-                end_seconds = timestamp_to_seconds(crop['end']) or total_duration
-                
-                start_frame = int(start_seconds * fps)
-                end_frame = int(end_seconds * fps)
-                
-                # Add output path and frame range for each crop
-                cmd.extend([output_path, f"{start_frame}-{end_frame}"])
-
-        logger.info(f"Running command: {' '.join(cmd)}")
-        result = subprocess.run(cmd)
-        
-        if result.returncode != 0:
-            raise Exception(f"Script failed with return code: {result.returncode}")
+            try:
+                worker.request_cancel(job_id)
+            except (ConnectionRefusedError, OSError, EOFError) as e:
+                logger.error(f"Could not reach worker to cancel {job_id}: {e}")
+    return jsonify(job_summary(job))
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    job, error = get_job_or_404(job_id)
+    if error:
+        return error
+    if job['status'] != 'completed':
+        return jsonify({"error": f"Job is {job['status']}", **job_summary(job)}), 409
+    return jsonify({
+        "job_id": job_id,
+        "outputs": [{"path": path, "url": output_url(path)}
+                    for path in job['outputs'] if os.path.exists(path)]
+    })
+
+@app.route('/jobs/<job_id>/profile', methods=['GET'])
+def job_profile(job_id):
+    """Per-stage timings, fps per pass and peak RSS of the job (written when it ends)."""
+    job, error = get_job_or_404(job_id)
+    if error:
+        return error
+    profile = read_job_profile(job)
+    if profile is None:
+        return jsonify({"error": "No profile for this job", **job_summary(job)}), 404
+    return jsonify(profile)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/run-script', methods=['POST'])
+def run_script():
+    """Blocking wrapper around the job API, kept for existing callers."""
+    try:
+        job = submit_job(request.json)
+        job['future'].result()
+        if job['status'] != 'completed':
+            raise Exception(job['error'] or f"Job {job['status']}")
 
         # Return appropriate response based on output type
-        if output_type == 'single':
+        if job['output_type'] == 'single':
             return jsonify({
                 "message": "Success",
-                "output": output_path
+                "output": job['outputs'][0]
             })
         else:
             # For multiple crops, return all output paths
-            output_files = [c[1] for c in zip(crops, [os.path.join(UPLOAD_DIR, f"output_{i+1}.{input_path.split('.')[-1]}") for i, _ in enumerate(crops)])]
             return jsonify({
                 "message": "Success",
-                "outputs": output_files
+                "outputs": job['outputs']
             })
 
     except Exception as e:
@@ -138,17 +675,17 @@ def run_script():
 def serve_file(filename):
     return send_from_directory(UPLOAD_DIR, filename)
 
-# Add new endpoint to get progress
+# Progress of the most recently submitted job (per-job progress lives at /jobs/<job_id>)
 @app.route('/get-progress', methods=['GET'])
 def get_progress():
     try:
-        with open('progress.json', 'r') as f:
-            progress_data = json.load(f)
-        return jsonify(progress_data)
-    except FileNotFoundError:
-        return jsonify({'progress': 0, 'status': 'Initializing...'})
+        with jobs_lock:
+            latest = max(jobs.values(), key=lambda job: job['created_at'], default=None)
+        if latest is None:
+            return jsonify({'progress': 0, 'status': 'Initializing...'})
+        return jsonify(read_job_progress(latest))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='localhost', port=8000, debug=True)
\ No newline at end of file
+    app.run(host='localhost', port=8000, debug=True)
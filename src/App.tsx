@@ -165,21 +165,6 @@ function App() {
     setStatusMessage("Initializing...");
     appendToConsole('Starting video processing...');
     
-    // Start polling for progress immediately
-    const progressInterval = setInterval(async () => {
-      try {
-        const progressResponse = await fetch('http://localhost:8000/get-progress');
-        const progressData = await progressResponse.json();
-        
-        if (progressData.progress) {
-          setProcessingProgress(progressData.progress);
-          setStatusMessage(progressData.status);
-        }
-      } catch (error) {
-        console.error('Error fetching progress:', error);
-      }
-    }, 1000);
-    
     try {
       const requestBody = {
         input_path: savedFilePath,
@@ -194,8 +179,8 @@ function App() {
         })
       };
 
-      // Start the processing
-      const processResponse = await fetch('http://localhost:8000/run-script', {
+      // Submit the job; rendering happens in the background on the server
+      const submitResponse = await fetch('http://localhost:8000/jobs', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -203,19 +188,51 @@ function App() {
         body: JSON.stringify(requestBody)
       });
 
-      const data = await processResponse.json();
-      
-      if (processResponse.ok) {
+      const submitted = await submitResponse.json();
+      if (!submitResponse.ok) {
+        throw new Error(submitted.error || 'Failed to submit job');
+      }
+      appendToConsole(`Job submitted: ${submitted.job_id}`);
+
+      // Follow the job's pushed progress events until it finishes
+      const job = await new Promise<{ status: string; error: string | null }>((resolve, reject) => {
+        const events = new EventSource(`http://localhost:8000/jobs/${submitted.job_id}/events`);
+        events.onmessage = (event) => {
+          const statusData = JSON.parse(event.data);
+
+          if (statusData.progress) {
+            setProcessingProgress(statusData.progress);
+            setStatusMessage(statusData.message);
+          }
+          if (['completed', 'failed', 'cancelled'].includes(statusData.status)) {
+            events.close();
+            resolve(statusData);
+          }
+        };
+        events.onerror = () => {
+          events.close();
+          reject(new Error('Lost connection to the progress stream'));
+        };
+      });
+
+      if (job.status !== 'completed') {
+        throw new Error(job.error || `Job ${job.status}`);
+      }
+
+      const resultsResponse = await fetch(`http://localhost:8000/jobs/${submitted.job_id}/results`);
+      const data = await resultsResponse.json();
+
+      if (resultsResponse.ok) {
+        const urls: string[] = data.outputs.map((output: { url: string }) => `http://localhost:8000${output.url}`);
+        setOutputPaths(urls);
         if (mode === 'manual') {
           appendToConsole('Multiple reels created successfully!');
-          setOutputPaths(data.outputs || []);
-          data.outputs?.forEach((output: string, index: number) => {
-            appendToConsole(`Reel ${index + 1} saved as: ${output}`);
+          data.outputs.forEach((output: { path: string }, index: number) => {
+            appendToConsole(`Reel ${index + 1} saved as: ${output.path}`);
           });
         } else {
           appendToConsole('Single reel created successfully!');
-          setOutputPaths([data.output]);
-          appendToConsole(`Output saved as: ${data.output}`);
+          appendToConsole(`Output saved as: ${data.outputs[0]?.path}`);
         }
         setCurrentPage('preview');
       } else {
@@ -224,8 +241,7 @@ function App() {
     } catch (error) {
       appendToConsole(`Error processing video: ${error instanceof Error ? error.message : 'Unknown error'}`);
     } finally {
-      // Clear the interval and reset states
-      clearInterval(progressInterval);
+      // Reset states
       setIsProcessing(false);
       setProcessingProgress(0);
     }
@@ -276,7 +292,7 @@ function App() {
               <div className="reel-number">{index + 1}</div>
               <div className="reel-video-container">
                 <video
-                  src={`http://localhost:8000/uploads/output_${index + 1}.mp4`}
+                  src={outputPath}
                   controls
                   className="reel-video"
                   playsInline
@@ -0,0 +1,202 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# -------------------------------
+# Constants
+# -------------------------------
+STORE_MAX_BYTES = int(os.environ.get('REELS_STORE_MAX_BYTES', 20 * 1024**3))  # disk budget for uploads and outputs
+STORE_CHUNK_SIZE = 1024 * 1024  # bytes read, hashed and written at a time
+# Uploads are safe from eviction this long, until the job that uses them pins them
+STORE_UPLOAD_GRACE_SECONDS = int(os.environ.get('REELS_STORE_UPLOAD_GRACE_SECONDS', 60 * 60))
+
+def is_digest(text):
+    return len(text) == 64 and all(char in '0123456789abcdef' for char in text)
+
+# -------------------------------
+# Content-addressed store for uploads and job outputs (used by server.py)
+# -------------------------------
+class ContentStore:
+    """
+    Files stored once under their SHA-256: <root>/<sha256><ext>, never modified after.
+    Uploading the same content twice resolves to the existing blob. Blobs are pinned
+    by reference count while jobs use them, and unpinned ones are evicted least
+    recently used first (mtime, touched on use) once the store exceeds `max_bytes`.
+    Fresh uploads are held for `upload_grace` seconds, as the job that will pin them
+    is submitted in a later request.
+    Job outputs are stored the same way and indexed under a result key derived from
+    the input's hash, so an identical job can be answered from the store.
+    """
+    def __init__(self, root, max_bytes=STORE_MAX_BYTES, upload_grace=STORE_UPLOAD_GRACE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.upload_grace = upload_grace
+        self.results_dir = os.path.join(root, 'results')
+        self.temp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.results_dir, exist_ok=True)
+        os.makedirs(self.temp_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.refs = {}  # digest -> pins held by jobs (in memory: no job survives a restart)
+        self.held_until = {}  # digest -> time.time() until which an upload is not evicted
+        # Leftovers of uploads interrupted by a crash or restart
+        for name in os.listdir(self.temp_dir):
+            os.remove(os.path.join(self.temp_dir, name))
+
+    def path(self, digest, extension=''):
+        return os.path.join(self.root, f"{digest}{extension}")
+
+    def digest_of(self, path):
+        """The digest of a path inside the store, or None for anything else."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.root):
+            return None
+        digest = os.path.splitext(os.path.basename(path))[0]
+        return digest if is_digest(digest) else None
+
+    def find(self, digest, touch=True):
+        """Path of the stored blob with this digest, or None. Finding it counts as a use for LRU purposes."""
+        for path in glob.glob(os.path.join(self.root, f"{digest}*")):
+            if os.path.splitext(os.path.basename(path))[0] != digest:
+                continue
+            try:
+                if touch:
+                    os.utime(path)
+            except FileNotFoundError:
+                return None
+            return path
+        return None
+
+    def put_stream(self, stream, filename):
+        """
+        Copy `stream` into the store in chunks, hashing as it is written.
+        Returns (digest, path, deduplicated). The blob keeps the extension of
+        `filename`, which ffmpeg and the output naming go by.
+        """
+        extension = os.path.splitext(os.path.basename(filename))[1].lower()
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=self.temp_dir, delete=False) as temp:
+            try:
+                for chunk in iter(lambda: stream.read(STORE_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                temp.close()
+                os.remove(temp.name)
+                raise
+        self.hold(digest.hexdigest())
+        return self._add(temp.name, digest.hexdigest(), extension)
+
+    def put_file(self, source_path):
+        """Move a finished file (a job output) into the store. Returns (digest, path, deduplicated)."""
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STORE_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return self._add(source_path, digest.hexdigest(), os.path.splitext(source_path)[1].lower())
+
+    def _add(self, source_path, digest, extension):
+        with self.lock:
+            existing = self.find(digest)
+            if existing is not None:
+                os.remove(source_path)
+                return digest, existing, True
+            path = self.path(digest, extension)
+            os.replace(source_path, path)
+            os.utime(path)
+        # Never the blob just added, which the caller is about to use
+        self.evict(keep=digest)
+        return digest, path, False
+
+    def hold(self, digest):
+        """Keep a blob from eviction for `upload_grace` seconds (an upload, or one a client found instead of uploading)."""
+        with self.lock:
+            self.held_until[digest] = time.time() + self.upload_grace
+
+    def acquire(self, digest):
+        """Pin a blob so eviction leaves it alone until release()."""
+        with self.lock:
+            self.refs[digest] = self.refs.get(digest, 0) + 1
+
+    def release(self, digest):
+        with self.lock:
+            count = self.refs.get(digest, 0) - 1
+            if count > 0:
+                self.refs[digest] = count
+            else:
+                self.refs.pop(digest, None)
+
+    def result_key(self, input_digest, **params):
+        return hashlib.sha256(f"{input_digest}|{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+    def save_result(self, key, output_digests):
+        path = os.path.join(self.results_dir, f"{key}.json")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(output_digests, f)
+        os.replace(temp_path, path)
+
+    def load_result(self, key, touch=True):
+        """Stored outputs of an earlier identical job as [(digest, path), ...], or None if any is gone."""
+        try:
+            with open(os.path.join(self.results_dir, f"{key}.json"), 'r') as f:
+                output_digests = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        outputs = [(digest, self.find(digest, touch)) for digest in output_digests]
+        if any(path is None for _, path in outputs):
+            return None
+        return outputs
+
+    def usage(self):
+        """(blobs, bytes, pinned blobs) currently in the store."""
+        entries = self._entries()
+        with self.lock:
+            pinned = sum(1 for _, _, _, digest in entries if digest in self.refs)
+        return len(entries), sum(size for _, size, _, _ in entries), pinned
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if os.path.isfile(path):
+                entries.append((stat.st_mtime, stat.st_size, path, os.path.splitext(name)[0]))
+        return entries
+
+    def evict(self, keep=None):
+        """Drop unpinned, unheld blobs (other than `keep`), least recently used first, until the store fits its budget."""
+        evicted = 0
+        with self.lock:
+            now = time.time()
+            self.held_until = {digest: until for digest, until in self.held_until.items() if until > now}
+            entries = self._entries()
+            total = sum(size for _, size, _, _ in entries)
+            for _, size, path, digest in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if digest in self.refs or digest in self.held_until or digest == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+        if evicted:
+            self.prune_results()
+        return evicted
+
+    def prune_results(self):
+        """Remove result entries whose outputs were evicted."""
+        for name in os.listdir(self.results_dir):
+            if name.endswith('.json') and self.load_result(name[:-len('.json')], touch=False) is None:
+                try:
+                    os.remove(os.path.join(self.results_dir, name))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# The scripts live at the repository root and are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import toReel
+
+def write_clip(path, frames=90, size=(320, 180), fps=30, cut_frames=(30, 61)):
+    """
+    Motion-JPEG clip (every frame intra-coded, so seeking is exact) of a coloured
+    block sweeping across grey scenes that alternate dark and light at `cut_frames`.
+    """
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    assert writer.isOpened()
+    scene = 0
+    for frame_num in range(frames):
+        if frame_num in cut_frames:
+            scene += 1
+        frame = np.full((height, width, 3), 40 if scene % 2 == 0 else 200, dtype=np.uint8)
+        # One sweep over the whole clip: a block jumping back would score like a cut
+        x = int(width * (0.2 + 0.6 * frame_num / frames))
+        cv2.rectangle(frame, (x - 12, height // 4), (x + 12, 3 * height // 4), (0, 60, 230), -1)
+        # Frame number as a stripe pattern, so tests can tell which frame was decoded
+        for bit in range(8):
+            frame[height - 8:, bit * 8:bit * 8 + 8] = 255 if frame_num >> bit & 1 else 0
+        writer.write(frame)
+    writer.release()
+    return path
+
+@pytest.fixture
+def stub_model():
+    """The deterministic stub detector instead of MoveNet, restored afterwards."""
+    backend, model_path = toReel.MODEL_BACKEND, toReel.MODEL_PATH
+    toReel.configure_model(backend='stub')
+    yield
+    toReel.configure_model(backend=backend, model_path=model_path)
+
+@pytest.fixture
+def clip(tmp_path):
+    return write_clip(str(tmp_path / 'clip.avi'))
+
+def frame_number(frame):
+    """The frame number write_clip drew into the bottom-left corner of `frame`."""
+    return sum(1 << bit for bit in range(8) if frame[-4, bit * 8 + 4].mean() > 128)
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
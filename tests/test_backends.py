@@ -0,0 +1,121 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+import toReel
+
+# Float exports of the model against the SavedModel, on frames with people in them.
+# Point these at the models and a clip to run the parity tests; each one is skipped
+# when its runtime or model is missing.
+SAVEDMODEL_PATH = os.environ.get('REELS_TEST_SAVEDMODEL', toReel.MODEL_PATH)
+TFLITE_PATH = os.environ.get('REELS_TEST_TFLITE_MODEL')
+ONNX_PATH = os.environ.get('REELS_TEST_ONNX_MODEL')
+VIDEO_PATH = os.environ.get('REELS_TEST_VIDEO')
+PARITY_FRAMES = 60
+
+# Normalized coordinates: keypoints the SavedModel is confident about may move by
+# 0.02, the x the crop follows by 0.01 (bench.py backends' default), and every
+# frame must agree on whether anybody was found.
+KEYPOINT_TOLERANCE = 0.02
+FOLLOWED_X_TOLERANCE = 0.01
+
+def installed(*modules):
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+@pytest.fixture(scope='module')
+def frames():
+    if not VIDEO_PATH:
+        pytest.skip('REELS_TEST_VIDEO is not set')
+    return [toReel.resize_for_movenet(frame) for frame in toReel.read_frames(VIDEO_PATH, PARITY_FRAMES)]
+
+@pytest.fixture(scope='module')
+def reference(frames):
+    if not installed('tensorflow'):
+        pytest.skip('TensorFlow is not installed')
+    if not os.path.isfile(os.path.join(SAVEDMODEL_PATH, 'saved_model.pb')):
+        pytest.skip(f'No SavedModel at {SAVEDMODEL_PATH}')
+    model = toReel.load_backend('savedmodel', SAVEDMODEL_PATH)
+    return np.concatenate([model.infer([frame]) for frame in frames])
+
+@pytest.mark.parametrize('backend, model_path, modules', [
+    ('tflite', TFLITE_PATH, ('tflite_runtime', 'tensorflow')),
+    ('onnx', ONNX_PATH, ('onnxruntime',)),
+])
+def test_backend_matches_savedmodel(frames, reference, backend, model_path, modules):
+    if not installed(*modules):
+        pytest.skip(f'No runtime for {backend}')
+    if not model_path or not os.path.isfile(model_path):
+        pytest.skip(f'No {backend} model configured')
+    model = toReel.load_backend(backend, model_path)
+    keypoints = np.concatenate([model.infer([frame]) for frame in frames])
+    assert keypoints.shape == reference.shape and keypoints.dtype == np.float32
+
+    people = reference[:, :, :51].reshape(len(frames), -1, 17, 3)
+    candidate = keypoints[:, :, :51].reshape(len(frames), -1, 17, 3)
+    confident = people[..., 2] > toReel.DETECTION_CONFIDENCE_THRESHOLD
+    assert confident.any(), 'nobody detected in the test clip'
+    assert np.abs(candidate[..., :2] - people[..., :2])[confident].max() <= KEYPOINT_TOLERANCE
+
+    followed_x = toReel.best_clusters(keypoints)[:, 1].astype(np.float64)
+    reference_x = toReel.best_clusters(reference)[:, 1].astype(np.float64)
+    np.testing.assert_array_equal(np.isnan(followed_x), np.isnan(reference_x))
+    assert np.nanmax(np.abs(followed_x - reference_x), initial=0.0) <= FOLLOWED_X_TOLERANCE
+
+@pytest.mark.parametrize('type_name, dtype', list(toReel.ONNXBackend.INPUT_TYPES.items()))
+def test_onnx_input_types(type_name, dtype):
+    assert toReel.ONNXBackend.input_type(type_name) is dtype
+
+@pytest.mark.parametrize('type_name', ['tensor(double)', 'tensor(int64)', 'tensor(float16)'])
+def test_onnx_refuses_other_input_types(type_name):
+    with pytest.raises(ValueError, match='Unsupported ONNX model input type'):
+        toReel.ONNXBackend.input_type(type_name)
+
+# -------------------------------
+# Model identity in analysis cache keys
+# -------------------------------
+@pytest.fixture
+def restore_model():
+    backend, model_path = toReel.MODEL_BACKEND, toReel.MODEL_PATH
+    yield
+    toReel.configure_model(backend=backend, model_path=model_path)
+
+def write_savedmodel(path, graph, variables):
+    os.makedirs(os.path.join(path, 'variables'))
+    with open(os.path.join(path, 'saved_model.pb'), 'wb') as f:
+        f.write(graph)
+    with open(os.path.join(path, 'variables', 'variables.data-00000-of-00001'), 'wb') as f:
+        f.write(variables)
+    return str(path)
+
+def cache_key(cache, clip, backend, model_path):
+    toReel.configure_model(backend=backend, model_path=model_path)
+    return cache.key(clip)
+
+def test_cache_key_follows_the_model_contents(tmp_path, clip, restore_model):
+    cache = toReel.AnalysisCache(str(tmp_path / 'cache'))
+    lightning = write_savedmodel(tmp_path / 'a' / 'lightning', b'graph', b'lightning weights')
+    thunder = write_savedmodel(tmp_path / 'b' / 'thunder', b'graph', b'thunder weights')
+    assert cache_key(cache, clip, 'savedmodel', lightning) != cache_key(cache, clip, 'savedmodel', thunder)
+
+    # Same file name in different directories, different contents
+    (tmp_path / 'fp32').mkdir()
+    (tmp_path / 'int8').mkdir()
+    (tmp_path / 'fp32' / 'model.tflite').write_bytes(b'float weights')
+    (tmp_path / 'int8' / 'model.tflite').write_bytes(b'quantized weights')
+    fp32_key = cache_key(cache, clip, 'tflite', str(tmp_path / 'fp32' / 'model.tflite'))
+    assert fp32_key != cache_key(cache, clip, 'tflite', str(tmp_path / 'int8' / 'model.tflite'))
+    assert fp32_key != cache_key(cache, clip, 'onnx', str(tmp_path / 'fp32' / 'model.tflite'))
+
+    # A copy of a model is the same model
+    (tmp_path / 'copy.tflite').write_bytes(b'float weights')
+    assert cache_key(cache, clip, 'tflite', str(tmp_path / 'copy.tflite')) == fp32_key
+
+def test_model_overwritten_in_place_changes_the_key(tmp_path, clip, restore_model):
+    cache = toReel.AnalysisCache(str(tmp_path / 'cache'))
+    model_path = tmp_path / 'model.onnx'
+    model_path.write_bytes(b'first export')
+    first_key = cache_key(cache, clip, 'onnx', str(model_path))
+    model_path.write_bytes(b'second export, retrained')
+    assert cache_key(cache, clip, 'onnx', str(model_path)) != first_key
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import toReel
+
+THRESHOLD = toReel.DETECTION_CONFIDENCE_THRESHOLD
+MIN_FRAMES = toReel.CLUSTER_VECTORIZE_MIN_FRAMES
+
+def random_keypoints(frames, seed, people=6):
+    """
+    MoveNet-shaped output with people bunched around a few spots, so detections
+    merge, and confidences on both sides of the detection threshold.
+    """
+    rng = np.random.default_rng(seed)
+    keypoints = rng.random((frames, people, 56), dtype=np.float32)
+    spots = rng.random((frames, 3, 2), dtype=np.float32)
+    spot = spots[np.arange(frames)[:, None], rng.integers(0, 3, (frames, people))]
+    keypoints[..., :2] = spot + rng.normal(0, 0.02, (frames, people, 2)).astype(np.float32)
+    keypoints[..., 2] = rng.choice(np.array([0.1, THRESHOLD, 0.5, 0.7, 0.9], dtype=np.float32), (frames, people))
+    return keypoints
+
+def per_frame(keypoints):
+    return [toReel.select_best_cluster(frame_keypoints) for frame_keypoints in keypoints]
+
+def as_rows(clusters):
+    """Clusters as (id, x, y, confidence) rows of Python floats, None where nobody was found."""
+    return [None if cluster is None else tuple(float(value) for value in cluster) for cluster in clusters]
+
+def assert_same_clusters(keypoints):
+    expected = per_frame(keypoints)
+    vectorized = [toReel.cluster_tuple(row) for row in toReel.best_clusters(keypoints)]
+    assert as_rows(vectorized) == as_rows(expected)
+    assert as_rows(toReel.cluster_batch(keypoints)) == as_rows(expected)
+    assert all(type(cluster[0]) is int for cluster in vectorized if cluster is not None)
+
+@pytest.mark.parametrize('frames', [1, MIN_FRAMES - 1, MIN_FRAMES, 500])
+@pytest.mark.parametrize('seed', range(4))
+def test_random_batches(frames, seed):
+    assert_same_clusters(random_keypoints(frames, seed))
+
+@pytest.mark.parametrize('frames', [MIN_FRAMES - 1, MIN_FRAMES])
+def test_nobody_detected(frames):
+    keypoints = random_keypoints(frames, seed=0)
+    keypoints[..., 2] = THRESHOLD  # not above it
+    assert toReel.cluster_batch(keypoints) == [None] * frames
+    assert_same_clusters(keypoints)
+
+@pytest.mark.parametrize('frames', [MIN_FRAMES - 1, MIN_FRAMES])
+def test_no_detection_slots(frames):
+    keypoints = np.zeros((frames, 0, 56), dtype=np.float32)
+    assert toReel.cluster_batch(keypoints) == [None] * frames
+    assert_same_clusters(keypoints)
+
+@pytest.mark.parametrize('frames', [MIN_FRAMES - 1, MIN_FRAMES])
+def test_one_confident_person(frames):
+    keypoints = random_keypoints(frames, seed=1)
+    keypoints[..., 2] = 0.1
+    keypoints[:, 3, 2] = 0.8
+    assert_same_clusters(keypoints)
+    assert [cluster[1] for cluster in toReel.cluster_batch(keypoints)] == keypoints[:, 3, 1].tolist()
+
+@pytest.mark.parametrize('frames', [MIN_FRAMES - 1, MIN_FRAMES])
+def test_equally_confident_clusters(frames):
+    # Three people far apart, all at the same confidence: the first cluster wins
+    keypoints = np.zeros((frames, 6, 56), dtype=np.float32)
+    keypoints[:, :3, 0] = 0.5
+    keypoints[:, :3, 1] = [0.2, 0.5, 0.8]
+    keypoints[:, :3, 2] = 0.6
+    assert_same_clusters(keypoints)
+    assert {cluster[:2] for cluster in toReel.cluster_batch(keypoints)} == {(0, np.float32(0.2))}
+
+@pytest.mark.parametrize('frames', [MIN_FRAMES - 1, MIN_FRAMES])
+def test_tie_with_a_merged_cluster(frames):
+    # A lone person ties a cluster of two merged detections on confidence: the lone one comes first
+    keypoints = np.zeros((frames, 6, 56), dtype=np.float32)
+    keypoints[:, :3, 0] = 0.5
+    keypoints[:, :3, 1] = [0.7, 0.3, 0.32]
+    keypoints[:, :3, 2] = [0.6, 0.4, 0.6]
+    assert_same_clusters(keypoints)
+    assert all(cluster[0] == 0 for cluster in toReel.cluster_batch(keypoints))
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+import toReel
+
+def test_parse_output_ranges():
+    assert toReel.parse_output_ranges(['a.mp4', '0-30', 'b.mp4', '"45-90"']) == [('a.mp4', 0, 30), ('b.mp4', 45, 90)]
+
+@pytest.mark.parametrize('frame_range', ['30-30', '40-30'])
+def test_empty_ranges_are_rejected(frame_range):
+    with pytest.raises(ValueError, match='Empty frame range'):
+        toReel.parse_output_ranges(['a.mp4', frame_range])
+
+def test_ranges_are_checked_against_the_clip(capsys):
+    with pytest.raises(ValueError, match='starts past the end of the video'):
+        toReel.parse_output_ranges(['a.mp4', '90-120'], total_frames=90)
+    assert toReel.parse_output_ranges(['a.mp4', '60-120'], total_frames=90) == [('a.mp4', 60, 90)]
+    assert 'rendering 60-90' in capsys.readouterr().out
+    # Containers that report no frame count leave the ranges as given
+    assert toReel.parse_output_ranges(['a.mp4', '60-120'], total_frames=0) == [('a.mp4', 60, 120)]
+
+def test_range_past_the_end_writes_nothing(clip, tmp_path, stub_model):
+    output = str(tmp_path / 'late.mp4')
+    with pytest.raises(ValueError, match='starts past the end'):
+        toReel.process_multiple_outputs(clip, [output, '800-900'], progress_path=None)
+    assert not os.path.exists(output)
+
+def test_range_end_is_clamped(clip, tmp_path, stub_model):
+    output = str(tmp_path / 'tail.mp4')
+    toReel.process_multiple_outputs(clip, [output, '80-200'], progress_path=None)
+    assert sum(1 for _ in toReel.read_frames(output)) == 10
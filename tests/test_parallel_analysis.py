@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import toReel
+
+@pytest.mark.parametrize('frame_count, chunk_count, min_chunk', [(90, 8, 15), (100, 3, 10), (10, 4, 30), (0, 4, 10)])
+def test_plan_chunks_covers_every_frame_once(frame_count, chunk_count, min_chunk):
+    chunks = toReel.plan_chunks(frame_count, chunk_count, min_chunk)
+    assert chunks[0][0] == 0 and chunks[-1][1] == frame_count
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+    assert len(chunks) == 1 or all(end - start >= min_chunk for start, end in chunks)
+
+def test_parallel_analysis_matches_serial(clip, stub_model, monkeypatch):
+    width, height, fps, total_frames = toReel.get_video_metadata(clip)
+    # Chunks of half a second: the 90-frame clip splits at 15, 30 (a cut), 45, 60 and 75
+    monkeypatch.setattr(toReel, 'ANALYSIS_MIN_CHUNK_SECONDS', 0.5)
+    chunks = toReel.plan_chunks(total_frames, 2 * toReel.ANALYSIS_CHUNKS_PER_WORKER, int(fps * 0.5))
+    assert [start for start, _ in chunks] == [0, 15, 30, 45, 60, 75]
+
+    serial_planner, serial = toReel.analyze_video(clip, fps, total_frames, decoder='opencv',
+                                                  reporter=toReel.ProgressReporter(None))
+    parallel_planner, parallel = toReel.analyze_video(clip, fps, total_frames, decoder='opencv', workers=2,
+                                                      reporter=toReel.ProgressReporter(None))
+
+    assert np.array_equal(parallel['frame_diffs'], serial['frame_diffs'])
+    assert np.array_equal(parallel['scene_changes'], serial['scene_changes'])
+    assert np.count_nonzero(serial['scene_changes']) == 2
+    assert np.array_equal(parallel['keypoints'], serial['keypoints'])
+    assert parallel_planner.frame_data == serial_planner.frame_data
+    assert np.array_equal(parallel_planner.interpolate_and_smooth(total_frames),
+                          serial_planner.interpolate_and_smooth(total_frames))
@@ -0,0 +1,231 @@
+import numpy as np
+import pytest
+
+import toReel
+
+SCENE_THRESHOLD = toReel.SCENE_CHANGE_THRESHOLD
+
+# -------------------------------
+# Reference: the list-based MovementPlanner that the NumPy arrays replaced
+# -------------------------------
+class ListMovementPlanner:
+    def __init__(self, fps):
+        self.frame_data = []
+        self.current_scene_start = 0
+        self.waiting_for_detection = False
+        self.default_x = toReel.DEFAULT_CENTER
+        self.max_movement_per_frame = 0.03
+        self.position_history = []
+        self.history_size = 3
+        self.centering_weight = 0.4
+        self.fast_transition_threshold = 0.1
+        self.stable_frames = 0
+        self.stable_frames_required = int(fps * 0.5)
+        self.is_centering = False
+
+    def plan_movement(self, frame_num, cluster, frame_diff, scene_change_threshold):
+        if frame_diff > scene_change_threshold:
+            self.position_history = []
+            self.stable_frames = 0
+            self.is_centering = False
+            self.frame_data.append((frame_num, self.default_x, True))
+            self.current_scene_start = frame_num
+            self.waiting_for_detection = True
+            return
+
+        if self.waiting_for_detection and cluster:
+            new_x = cluster[1]
+            for i, (f_num, _, is_scene) in enumerate(self.frame_data):
+                if f_num >= self.current_scene_start and not is_scene:
+                    self.frame_data[i] = (f_num, new_x, False)
+            self.waiting_for_detection = False
+            return
+
+        if cluster:
+            target_x = cluster[1]
+        else:
+            target_x = self.default_x if not self.frame_data else self.frame_data[-1][1]
+
+        if self.frame_data:
+            last_x = self.frame_data[-1][1]
+            distance_to_target = abs(target_x - last_x)
+            movement = target_x - last_x
+            if abs(movement) > self.max_movement_per_frame:
+                target_x = last_x + (self.max_movement_per_frame if movement > 0 else -self.max_movement_per_frame)
+            if distance_to_target < self.fast_transition_threshold:
+                self.stable_frames += 1
+                if self.stable_frames >= self.stable_frames_required:
+                    self.is_centering = True
+            else:
+                self.stable_frames = 0
+                self.is_centering = False
+                self.position_history = []
+            if self.is_centering:
+                self.position_history.append(target_x)
+                if len(self.position_history) > self.history_size:
+                    self.position_history.pop(0)
+                if len(self.position_history) > 1:
+                    avg_pos = sum(self.position_history) / len(self.position_history)
+                    target_x = target_x * (1 - self.centering_weight) + avg_pos * self.centering_weight
+
+        self.frame_data.append((frame_num, target_x, False))
+
+    def get_scene_segments(self):
+        segments = []
+        current_segment_start = 0
+        current_positions = []
+        for i, (frame_num, x_pos, is_scene) in enumerate(self.frame_data):
+            if is_scene and i > 0:
+                segments.append((current_segment_start, frame_num - 1, current_positions))
+                current_segment_start = frame_num
+                current_positions = []
+            current_positions.append(x_pos)
+        if current_positions:
+            segments.append((current_segment_start, self.frame_data[-1][0], current_positions))
+        return segments
+
+    def interpolate_and_smooth(self, total_frames, base_alpha=0.1, delta_threshold=0.015):
+        smoothed_centers = [self.default_x] * total_frames
+        for start_frame, end_frame, positions in self.get_scene_segments():
+            last_x = positions[0]
+            for i, frame in enumerate(range(start_frame, end_frame + 1)):
+                if i >= len(positions):
+                    break
+                target_x = positions[i]
+                delta = target_x - last_x
+                if abs(delta) < delta_threshold:
+                    smoothed_x = last_x
+                else:
+                    alpha = base_alpha * min(abs(delta) * 2, 1.0)
+                    if abs(delta) < 0.1:
+                        alpha *= 0.5
+                    smoothed_x = last_x + alpha * delta
+                smoothed_centers[frame] = smoothed_x
+                last_x = smoothed_x
+        return smoothed_centers
+
+# -------------------------------
+# Inputs
+# -------------------------------
+def detections(frames, seed, cut_frames=(), miss_rate=0.2, step=0.01):
+    """(cluster, frame_diff) per frame: a random walk of the subject with misses and the given cuts."""
+    rng = np.random.default_rng(seed)
+    x = 0.5
+    stream = []
+    for frame_num in range(frames):
+        x = min(max(x + rng.normal(0, step), 0.0), 1.0)
+        frame_diff = SCENE_THRESHOLD + 1 if frame_num in cut_frames else 0
+        cluster = None if rng.random() < miss_rate else (0, x, 0.5, 0.9)
+        stream.append((cluster, frame_diff))
+    return stream
+
+def plan_both(stream, fps=10, total_frames=None):
+    planner = toReel.MovementPlanner(fps, len(stream) if total_frames is None else total_frames)
+    reference = ListMovementPlanner(fps)
+    for frame_num, (cluster, frame_diff) in enumerate(stream):
+        planner.plan_movement(frame_num, cluster, frame_diff, SCENE_THRESHOLD)
+        reference.plan_movement(frame_num, cluster, frame_diff, SCENE_THRESHOLD)
+    return planner, reference
+
+# -------------------------------
+# Tests
+# -------------------------------
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_list_planner(seed):
+    stream = detections(600, seed, cut_frames={0, 97, 98, 250, 420})
+    planner, reference = plan_both(stream)
+    assert planner.frame_data == reference.frame_data
+    assert planner.interpolate_and_smooth(len(stream)).tolist() == reference.interpolate_and_smooth(len(stream))
+
+def test_backfill_after_scene_change():
+    # Nobody is found for a while after each cut; the first detection backfills those frames
+    stream = [((0, 0.3, 0.5, 0.9), 0)] * 20
+    stream += [(None, SCENE_THRESHOLD + 1)] + [(None, 0)] * 15 + [((0, 0.8, 0.5, 0.9), 0)] * 10
+    stream += [(None, SCENE_THRESHOLD + 1), ((0, 0.1, 0.5, 0.9), 0)] + [((0, 0.15, 0.5, 0.9), 0)] * 10
+    planner, reference = plan_both(stream)
+    assert planner.frame_data == reference.frame_data
+    backfilled = [x for frame_num, x, _ in planner.frame_data if 21 <= frame_num < 36]
+    assert backfilled == [0.8] * len(backfilled)
+    assert planner.interpolate_and_smooth(len(stream)).tolist() == reference.interpolate_and_smooth(len(stream))
+
+def test_history_ring_buffer_wraps():
+    # Small steady moves keep the planner centering, so the 3-entry history wraps many times
+    stream = detections(400, seed=7, miss_rate=0.0, step=0.004)
+    planner, reference = plan_both(stream, fps=4)
+    assert planner.is_centering and planner.history_len == planner.history_size
+    assert planner.frame_data == reference.frame_data
+
+def test_frame_data_round_trips_through_growth():
+    # total_frames under-reported: the arrays grow past their initial capacity
+    stream = detections(200, seed=3, cut_frames={50, 120})
+    planner, reference = plan_both(stream, total_frames=0)
+    assert planner.count == len(reference.frame_data)
+    frame_data = planner.frame_data
+    assert frame_data == reference.frame_data
+    assert all(type(frame_num) is int and type(x) is float and type(is_scene) is bool
+               for frame_num, x, is_scene in frame_data)
+    assert planner.scene_change_frames() == {frame_num for frame_num, _, is_scene in frame_data if is_scene}
+    segments = planner.get_scene_segments()
+    reference_segments = reference.get_scene_segments()
+    assert [(start, end, positions.tolist()) for start, end, positions in segments] == reference_segments
+
+# -------------------------------
+# StreamingPlanner against the batch path of MovementPlanner
+# -------------------------------
+def plan_streaming(stream, max_lookahead=None, fps=10):
+    """Feed `stream` to a StreamingPlanner; every (frame_num, center) it emitted, in order."""
+    planner = toReel.StreamingPlanner(fps, len(stream), max_lookahead)
+    emitted = []
+    for frame_num, (cluster, frame_diff) in enumerate(stream):
+        planner.plan_movement(frame_num, cluster, frame_diff, SCENE_THRESHOLD)
+        emitted += planner.pop_ready()
+    planner.finish(len(stream))
+    emitted += planner.pop_ready()
+    return emitted
+
+def plan_batch(stream, max_lookahead=None, fps=10):
+    """
+    interpolate_and_smooth of a MovementPlanner fed `stream`, except that a backfill
+    leaves the entries the lookahead limit already let out with their planned value.
+    """
+    planner = toReel.MovementPlanner(fps, len(stream))
+    for frame_num, (cluster, frame_diff) in enumerate(stream):
+        backfill = planner.waiting_for_detection and cluster and frame_diff <= SCENE_THRESHOLD
+        planned = planner.positions[:planner.count].copy()
+        planner.plan_movement(frame_num, cluster, frame_diff, SCENE_THRESHOLD)
+        if backfill and max_lookahead is not None:
+            released = slice(planner.current_scene_index + 1, max(planner.count - max_lookahead, 0))
+            planner.positions[released] = planned[released]
+    return planner.interpolate_and_smooth(len(stream)).tolist()
+
+def late_detections(frames, seed, cut_frames, wait=25):
+    """detections() with nobody found for `wait` frames after each cut."""
+    stream = detections(frames, seed, cut_frames)
+    for cut in cut_frames:
+        for frame_num in range(cut, min(cut + wait, frames)):
+            stream[frame_num] = (None, stream[frame_num][1])
+    return stream
+
+@pytest.mark.parametrize('max_lookahead', [None, 100, 25, 24, 10, 1, 0])
+@pytest.mark.parametrize('seed', range(3))
+def test_streaming_matches_batch_path(seed, max_lookahead):
+    # Cuts at the start, back to back, and one with nobody found until the video ends
+    stream = late_detections(500, seed, cut_frames=[0, 120, 121, 300, 480])
+    emitted = plan_streaming(stream, max_lookahead)
+    assert [frame_num for frame_num, _ in emitted] == list(range(len(stream)))
+    assert [center for _, center in emitted] == plan_batch(stream, max_lookahead)
+
+def test_streaming_without_lookahead_limit_is_the_full_path():
+    stream = late_detections(300, seed=11, cut_frames=[0, 90, 200], wait=60)
+    planner, _ = plan_both(stream)
+    assert [center for _, center in plan_streaming(stream)] == planner.interpolate_and_smooth(len(stream)).tolist()
+
+def test_lookahead_limit_keeps_released_entries():
+    # The first detection comes 30 frames after the cut; with a 10-entry limit the
+    # first 19 frames of that scene have been let out at the default center
+    stream = [((0, 0.3, 0.5, 0.9), 0)] * 20 + [(None, SCENE_THRESHOLD + 1)] + [(None, 0)] * 29
+    stream += [((0, 0.8, 0.5, 0.9), 0)] * 20
+    emitted = dict(plan_streaming(stream, max_lookahead=10))
+    assert [emitted[frame_num] for frame_num in range(20, 40)] == [toReel.DEFAULT_CENTER] * 20
+    assert emitted[40] != toReel.DEFAULT_CENTER
+    assert list(emitted.values()) == plan_batch(stream, max_lookahead=10)
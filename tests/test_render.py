@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import toReel
+from conftest import frame_number, requires_ffmpeg, write_clip
+
+LOSSLESS = {'crf': 0}
+
+def decode(path):
+    return list(toReel.read_frames(path))
+
+@requires_ffmpeg
+def test_parallel_render_matches_serial_crop(clip, tmp_path, monkeypatch):
+    width, height, fps, total_frames = toReel.get_video_metadata(clip)
+    crop_width = int(height * toReel.ASPECT_RATIO)
+    # Hold the crop on the left edge, where the frame numbers are drawn, with a swing in the middle
+    centers = np.zeros(total_frames)
+    centers[40:50] = 0.5
+
+    serial_path = str(tmp_path / 'serial.mp4')
+    writer = toReel.open_video_writer(serial_path, fps, (crop_width, height), LOSSLESS)
+    for frame, center in zip(toReel.read_frames(clip), centers):
+        x_start = toReel.compute_crop_start(center, width, crop_width)
+        writer.write(frame[:, x_start:x_start + crop_width].copy())
+    writer.release()
+
+    # Ranges of half a second: 4 of them, joined at frames 22/23, 45 and 67/68
+    monkeypatch.setattr(toReel, 'RENDER_MIN_CHUNK_SECONDS', 0.5)
+    parallel_path = str(tmp_path / 'parallel.mp4')
+    toReel.render_in_parallel(clip, parallel_path, centers, width, height, fps, total_frames, 2,
+                              encoding=LOSSLESS, reporter=toReel.ProgressReporter(None))
+
+    serial, parallel = decode(serial_path), decode(parallel_path)
+    assert len(parallel) == total_frames
+    # Every join continues with the next frame: nothing dropped or repeated
+    numbered = [frame_number(frame) for i, frame in enumerate(parallel) if not 40 <= i < 50]
+    assert numbered == [i for i in range(total_frames) if not 40 <= i < 50]
+    assert all(np.array_equal(a, b) for a, b in zip(parallel, serial))
+
+@requires_ffmpeg
+@pytest.mark.parametrize('start_frame', [1, 2, 29, 30, 31, 100, 229])
+def test_scaled_reader_seeks_to_the_frame_at_ntsc_rates(tmp_path, start_frame):
+    clip = write_clip(str(tmp_path / 'ntsc.avi'), frames=240, fps=30000 / 1001)
+    width, height, fps, _ = toReel.get_video_metadata(clip)
+    frames = list(toReel.read_scaled_frames(clip, (width, height), fps, 3, start_frame))
+    assert [frame_number(frame) for frame in frames] == [start_frame, start_frame + 1, start_frame + 2]
+
+@requires_ffmpeg
+def test_encoder_failure_reports_ffmpeg_output(tmp_path):
+    writer = toReel.FFmpegWriter(str(tmp_path / 'out.mp4'), 30, (320, 180), codec='no_such_codec')
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+    with pytest.raises(RuntimeError, match='ffmpeg failed writing .*no_such_codec'):
+        for _ in range(100):
+            writer.write(frame)
+        writer.release()
+    # Releasing afterwards (as the callers' finally blocks do) reports the same failure
+    with pytest.raises(RuntimeError, match='no_such_codec'):
+        writer.release()
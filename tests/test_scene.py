@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+
+import toReel
+
+# The scene score before signatures, and the threshold it was tuned for
+FULL_FRAME_THRESHOLD = 3000
+SIZE = (640, 360)
+# Noise amplitude at 1/320, 1/80, 1/20 and 1/5 of the width (as in bench.py scene)
+TEXTURES = {'fine': (60, 20, 10, 5), 'mixed': (60, 35, 20, 10), 'coarse': (20, 30, 40, 30)}
+
+def full_frame_mse(prev_gray, gray):
+    return np.mean((prev_gray.astype(np.float64) - gray.astype(np.float64)) ** 2)
+
+def textured_scene(amplitudes, rng, width=SIZE[0], height=SIZE[1], level=(110, 140)):
+    image = np.zeros((height, width))
+    for divisor, amplitude in zip((320, 80, 20, 5), amplitudes):
+        noise = rng.normal(0, 1, (max(2, height * divisor // width), divisor))
+        image += amplitude * cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    image += rng.uniform(*level) - image.mean()
+    return cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+def cut_frames(frames):
+    """Frames each detector takes for cuts: (full-frame MSE at its old threshold, SceneChangeDetector)."""
+    detector = toReel.SceneChangeDetector()
+    full_cuts, signature_cuts = [], []
+    prev_gray = None
+    for frame_num, frame in enumerate(frames):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if prev_gray is not None and full_frame_mse(prev_gray, gray) > FULL_FRAME_THRESHOLD:
+            full_cuts.append(frame_num)
+        prev_gray = gray
+        if detector.is_scene_change(detector.update(frame)):
+            signature_cuts.append(frame_num)
+    return full_cuts, signature_cuts
+
+def scenes_clip(scenes, rng, scene_frames=10):
+    """Still scenes with sensor noise (two fields in turn), cut every `scene_frames`."""
+    noise = [rng.normal(0, 3, scenes[0].shape) for _ in range(2)]
+    frames = []
+    for scene in scenes:
+        for frame_num in range(scene_frames):
+            frames.append(np.clip(scene + noise[frame_num % 2], 0, 255).astype(np.uint8))
+    return frames
+
+@pytest.mark.parametrize('texture', TEXTURES)
+def test_same_cuts_as_the_full_frame_detector(texture):
+    # Cuts between scenes of the same brightness, the hardest case for thumbnails
+    rng = np.random.default_rng(0)
+    frames = scenes_clip([textured_scene(TEXTURES[texture], rng) for _ in range(8)], rng)
+    full_cuts, signature_cuts = cut_frames(frames)
+    assert full_cuts == list(range(10, 80, 10))
+    assert signature_cuts == full_cuts
+
+def test_same_cuts_across_brightness_changes():
+    rng = np.random.default_rng(1)
+    scenes = [textured_scene(TEXTURES['mixed'], rng, level=(20, 60) if i % 2 else (180, 220)) for i in range(6)]
+    full_cuts, signature_cuts = cut_frames(scenes_clip(scenes, rng))
+    assert signature_cuts == full_cuts == list(range(10, 60, 10))
+
+@pytest.mark.parametrize('texture', TEXTURES)
+def test_slow_pan_is_not_a_cut(texture):
+    # 4 px/frame at 720p; the full-frame MSE took most of these frames for cuts on detailed scenes
+    rng = np.random.default_rng(2)
+    step = 2
+    wide = textured_scene(TEXTURES[texture], rng, width=SIZE[0] + step * 30)
+    frames = [np.ascontiguousarray(wide[:, i * step:i * step + SIZE[0]]) for i in range(31)]
+    _, signature_cuts = cut_frames(frames)
+    assert signature_cuts == []
@@ -1,21 +1,38 @@
 import cv2
-import tensorflow as tf
 import numpy as np
 import argparse
+import collections
 import glob
 import os
 import sys
 import math
 import subprocess
+import hashlib
 import json
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import shutil
+import stat
+import tempfile
+import queue
+import random
+import threading
+import time
 
 # -------------------------------
-# GPU Configuration
+# TensorFlow: imported on first use, since it costs seconds of startup
 # -------------------------------
-gpus = tf.config.experimental.list_physical_devices('GPU')
-if gpus:
-    for gpu in gpus:
-        tf.config.experimental.set_memory_growth(gpu, True)
+tf = None
+
+def load_tensorflow():
+    """Import TensorFlow (once) and let each GPU grow its memory instead of grabbing it all."""
+    global tf
+    if tf is None:
+        import tensorflow
+        for gpu in tensorflow.config.experimental.list_physical_devices('GPU'):
+            tensorflow.config.experimental.set_memory_growth(gpu, True)
+        tf = tensorflow
+    return tf
 
 # -------------------------------
 # Constants
@@ -25,38 +42,671 @@ CONFIDENCE_MARGIN = 0.15
 DEFAULT_CENTER = 0.5  # normalized center (50%)
 ASPECT_RATIO = 9 / 16  # output crop aspect ratio (width based on full height)
 MOVE_NET_INPUT_SIZE = (192, 192)
+# Frames per MoveNet call in the analysis pass. Stays 1: the multipose SavedModel
+# only takes one frame, so a batch is still one signature call per frame inside
+# map_fn and only saves Python dispatch, while it holds the planner back by a batch
+# and multiplies warm-up tracing. Backends that batch natively (ONNX exports with a
+# symbolic batch dimension) can gain; `bench.py batch` measures it per model.
+DEFAULT_BATCH_SIZE = 1
+CLUSTER_VECTORIZE_MIN_FRAMES = 32  # frames from which best_clusters beats clustering frame by frame
+ADAPTIVE_STRIDE_FAST = 0.01  # normalized x per frame between anchors; above this the stride halves
+ADAPTIVE_STRIDE_SLOW = 0.002  # below this the stride grows by one frame
+STRIDE_REFINE_JUMP = 0.05  # normalized x between neighbouring anchors; above this the frames between are inferred too
+MOTION_GATE_THRESHOLD = 10.0  # frame MSE below which MoveNet is skipped and the previous detection reused
+MOTION_GATE_MAX_SKIP = 5  # consecutive frames that may reuse a detection before MoveNet runs again
+PIPELINE_QUEUE_SIZE = 32  # frames buffered between pipeline stages
+DEFAULT_ANALYSIS_DECODER = 'ffmpeg'  # 'ffmpeg' (scaled rawvideo pipe) or 'opencv' (full-resolution VideoCapture)
+ANALYSIS_SHORT_SIDE = 216  # first-pass frames are decoded with this short side, just above MoveNet's 192
+ANALYSIS_DECODE_THREADS = 0  # ffmpeg decoder threads for the first pass (0 = ffmpeg decides)
+ANALYSIS_CHUNKS_PER_WORKER = 4  # parallel analysis splits the video into this many chunks per process
+ANALYSIS_MIN_CHUNK_SECONDS = 10.0  # but never into chunks shorter than this
+RENDER_CHUNKS_PER_WORKER = 2  # parallel rendering splits the output into this many ranges per process
+RENDER_MIN_CHUNK_SECONDS = 5.0  # but never into ranges shorter than this
+STREAM_MAX_LOOKAHEAD_SECONDS = 4.0  # single-pass mode holds frames at most this long waiting for a detection after a cut
+LIVE_QUEUE_SIZE = 2  # frames waiting between a live source and the cropper; the oldest is dropped when full
+LIVE_MAX_LATENCY = 0.5  # seconds; live frames older than this when their turn comes are dropped
+LIVE_STATS_INTERVAL = 2.0  # seconds between live latency/FPS reports
+LIVE_STATS_WINDOW = 300  # frames the live latency percentiles and FPS are computed over
+BATCH_JOBS = 2  # videos processed at once in --batch mode, sharing one loaded model
+BATCH_VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.mkv', '.avi', '.webm')
+BATCH_OUTPUT_SUFFIX = '_reel.mp4'
+PROFILE_MAX_SAMPLES = 10000  # per-stage timings kept (reservoir-sampled) for percentiles
+DEFAULT_PROGRESS_PATH = 'progress.json'
+PROGRESS_MIN_INTERVAL = 0.5  # seconds between progress updates
+PROGRESS_MIN_DELTA = 1.0  # or percentage points, whichever comes first
+# Mean squared gray-level difference between scene signatures. Thumbnails average away
+# fine detail, so a cut scores 0.15-0.8x the full-frame MSE whose threshold was 3000;
+# 600 finds the cuts that did on textured scenes (bench.py scene) and stays clear of
+# pans up to 8 px/frame at 720p, which the full-frame MSE took for cuts
+SCENE_CHANGE_THRESHOLD = 600
+SCENE_SIGNATURE_WIDTH = 64  # frames are compared as grayscale thumbnails this wide, whatever the source resolution
+ANALYSIS_LEAD_IN_SECONDS = 2.0  # extra analysis before each -mo range so the planner settles
+DEFAULT_ENCODING = {
+    'encoder': 'ffmpeg',  # 'ffmpeg' (rawvideo pipe, audio muxed) or 'opencv' (mp4v, no audio)
+    'codec': 'libx264',
+    'preset': 'veryfast',
+    'crf': 23,
+}
+CACHE_DIR = os.environ.get('REELS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'reels', 'analysis'))
+CACHE_MAX_BYTES = int(os.environ.get('REELS_CACHE_MAX_BYTES', 2 * 1024**3))  # disk budget for the analysis cache
 
 # -------------------------------
-# Global variable for previous gray frame (for scene change detection)
+# MoveNet model selection
 # -------------------------------
-prev_gray_frame = None
+# Read from the environment so spawned worker processes pick up configure_model()
+MODEL_BACKENDS = ('savedmodel', 'tflite', 'onnx', 'stub')
+MODEL_BACKEND = os.environ.get('REELS_MODEL_BACKEND', 'auto')  # one of MODEL_BACKENDS, or 'auto' from the model path
+MODEL_PATH = os.environ.get('REELS_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model'))
+MODEL_THREADS = int(os.environ.get('REELS_MODEL_THREADS', 0))  # inference threads (0 = backend default)
+MODEL_XNNPACK = os.environ.get('REELS_MODEL_XNNPACK', '1') != '0'  # TFLite: use the XNNPACK delegate
+# SavedModels are re-saved here with their batched graph already traced (empty to disable)
+MODEL_CACHE_DIR = os.environ.get('REELS_MODEL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'reels', 'models'))
 
 # -------------------------------
-# Load MoveNet model
+# Utility: Preprocess frame for MoveNet
 # -------------------------------
-movenet = tf.saved_model.load('/Users/luis/Developer/Temporal/MediastreamTensor/VideoToShort/model')
-movenet_func = movenet.signatures['serving_default']
+def resize_for_movenet(frame):
+    # Resize with OpenCV first (faster)
+    return cv2.resize(frame, MOVE_NET_INPUT_SIZE, interpolation=cv2.INTER_LINEAR)
 
 # -------------------------------
-# Utility: Preprocess frame for MoveNet
+# MoveNet inference backends
 # -------------------------------
-def prepare_input_tensor(frame):
-    # Resize with OpenCV first (faster)
-    frame = cv2.resize(frame, MOVE_NET_INPUT_SIZE, interpolation=cv2.INTER_LINEAR)
-    
-    # Convert to tensor and add batch dimension
-    input_tensor = tf.convert_to_tensor(frame, dtype=tf.int32)
-    input_tensor = tf.expand_dims(input_tensor, axis=0)
-    return input_tensor
+# Every backend takes frames already resized to MOVE_NET_INPUT_SIZE and returns
+# the multipose output as float32 [frames, 6, 56] (y, x, confidence per keypoint).
+class SavedModelBackend:
+    """
+    The SavedModel's serving_default signature through full TensorFlow. The batched
+    graph is traced once, then saved with the model under MODEL_CACHE_DIR as a
+    'batch' signature, so later loads (new processes, workers) skip the tracing.
+    """
+    name = 'savedmodel'
+
+    def __init__(self, model_path, threads=0):
+        load_tensorflow()
+        if threads:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+        traced_path = self.traced_path(model_path)
+        if traced_path and os.path.isdir(traced_path):
+            try:
+                self.model = tf.saved_model.load(traced_path)
+                self.func = self.model.signatures['serving_default']
+                self.batch_func = self.model.signatures['batch']
+                return
+            except Exception as e:
+                # A broken or foreign artifact: retrace from the original model
+                print(f"Ignoring traced model {traced_path}: {e}")
+        self.model = tf.saved_model.load(model_path)
+        self.func = self.model.signatures['serving_default']
+        batch_graph = tf.function(
+            self._map_batch,
+            input_signature=[tf.TensorSpec([None, MOVE_NET_INPUT_SIZE[1], MOVE_NET_INPUT_SIZE[0], 3], tf.int32)]
+        )
+        self.batch_func = batch_graph.get_concrete_function()
+        if traced_path:
+            self.save_traced(traced_path)
+
+    @staticmethod
+    def traced_path(model_path):
+        """
+        Cache location for this model and TensorFlow version, or None. The key hashes the
+        contents of the graph and of every variable file, so retrained weights saved over
+        the same files never reuse a stale trace.
+        """
+        if not MODEL_CACHE_DIR or not os.path.isfile(os.path.join(model_path, 'saved_model.pb')):
+            return None
+        content_hash = model_content_hash('savedmodel', model_path)
+        digest = hashlib.sha256(f"{content_hash}:{tf.__version__}:{MOVE_NET_INPUT_SIZE}".encode())
+        return os.path.join(MODEL_CACHE_DIR, f"movenet-{digest.hexdigest()[:16]}")
+
+    def save_traced(self, traced_path):
+        # Only costs the speedup when it fails (read-only cache, another process won the race)
+        temp_path = f"{traced_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+            tf.saved_model.save(self.model, temp_path,
+                                signatures={'serving_default': self.func, 'batch': self.batch_func})
+            os.replace(temp_path, traced_path)
+        except Exception as e:
+            print(f"Could not cache the traced model: {e}")
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    def _map_batch(self, batch):
+        # The multipose signature only accepts a batch of one, so map over the batch
+        # inside a single graph call instead of paying Python dispatch per frame.
+        return {'output_0': tf.map_fn(
+            lambda frame: self.func(tf.expand_dims(frame, axis=0))['output_0'][0],
+            batch,
+            fn_output_signature=tf.float32
+        )}
+
+    def infer(self, resized_frames):
+        if len(resized_frames) == 1:
+            input_tensor = tf.expand_dims(tf.convert_to_tensor(resized_frames[0], dtype=tf.int32), axis=0)
+            return self.func(input_tensor)['output_0'].numpy()
+        batch = tf.convert_to_tensor(np.stack(resized_frames), dtype=tf.int32)
+        # Traced and reloaded signatures both take the input by name
+        return self.batch_func(batch=batch)['output_0'].numpy()
+
+def quantize_input(frames, detail):
+    """Cast frames to a TFLite input's dtype, applying its quantization if it has one."""
+    scale, zero_point = detail['quantization']
+    if scale:
+        frames = np.round(frames / scale + zero_point)
+    if np.issubdtype(detail['dtype'], np.integer):
+        info = np.iinfo(detail['dtype'])
+        frames = np.clip(frames, info.min, info.max)
+    return frames.astype(detail['dtype'])
+
+def dequantize_output(values, detail):
+    scale, zero_point = detail['quantization']
+    if scale:
+        return (values.astype(np.float32) - zero_point) * scale
+    return values.astype(np.float32, copy=False)
+
+class TFLiteBackend:
+    """
+    A .tflite model through tflite_runtime (or tf.lite when only TensorFlow is
+    installed), with XNNPACK unless disabled and `threads` interpreter threads.
+    Quantized (int8/uint8) models work as well: inputs and outputs are converted
+    with the model's own quantization parameters. Interpreters are not thread-safe,
+    so each thread gets its own.
+    """
+    name = 'tflite'
+
+    def __init__(self, model_path, threads=0, xnnpack=True):
+        try:
+            from tflite_runtime.interpreter import Interpreter, OpResolverType
+        except ImportError:
+            lite = load_tensorflow().lite
+            Interpreter, OpResolverType = lite.Interpreter, lite.experimental.OpResolverType
+        self.interpreter_options = {
+            'model_path': model_path,
+            'num_threads': threads or None,
+            'experimental_op_resolver_type': OpResolverType.AUTO if xnnpack else OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES,
+        }
+        self.Interpreter = Interpreter
+        self.local = threading.local()
+        self._interpreter()  # fail now on a bad model, not on the first frame
+
+    def _interpreter(self):
+        interpreter = getattr(self.local, 'interpreter', None)
+        if interpreter is None:
+            interpreter = self.Interpreter(**self.interpreter_options)
+            # Multipose models have a dynamic input size; fix it to ours
+            input_index = interpreter.get_input_details()[0]['index']
+            interpreter.resize_tensor_input(input_index, [1, MOVE_NET_INPUT_SIZE[1], MOVE_NET_INPUT_SIZE[0], 3])
+            interpreter.allocate_tensors()
+            self.local.interpreter = interpreter
+        return interpreter
+
+    def infer(self, resized_frames):
+        interpreter = self._interpreter()
+        input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+        outputs = []
+        for frame in resized_frames:
+            interpreter.set_tensor(input_detail['index'], quantize_input(frame[np.newaxis], input_detail))
+            interpreter.invoke()
+            outputs.append(dequantize_output(interpreter.get_tensor(output_detail['index']), output_detail)[0])
+        return np.stack(outputs)
+
+class ONNXBackend:
+    """An .onnx export of the model through ONNX Runtime on the CPU."""
+    name = 'onnx'
+    INPUT_TYPES = {'tensor(int32)': np.int32, 'tensor(uint8)': np.uint8, 'tensor(float)': np.float32}
+
+    def __init__(self, model_path, threads=0):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = self.input_type(model_input.type)
+        # Exports with a symbolic batch dimension take the whole batch in one run
+        self.batched = model_input.shape[0] != 1
+
+    @classmethod
+    def input_type(cls, type_name):
+        """NumPy dtype for an ONNX input type; anything else would be fed wrong values, so it is refused."""
+        if type_name not in cls.INPUT_TYPES:
+            raise ValueError(f"Unsupported ONNX model input type {type_name} (supported: {', '.join(cls.INPUT_TYPES)})")
+        return cls.INPUT_TYPES[type_name]
+
+    def infer(self, resized_frames):
+        batch = np.stack(resized_frames).astype(self.input_dtype)
+        if self.batched:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: frame[np.newaxis]})[0] for frame in batch])
+        return outputs.astype(np.float32, copy=False)
+
+class StubBackend:
+    """
+    Deterministic stand-in for benchmarks and offline runs: every strongly coloured
+    blob (like the shapes bench.py draws on grey backgrounds) becomes a person whose
+    skeleton fills the blob's bounding box. Needs no model file.
+    """
+    name = 'stub'
+    MIN_SATURATION = 80  # max - min channel value of a subject pixel
+    MIN_AREA = 24  # pixels at the 192x192 input size
+    # (y, x) of the 17 keypoints as fractions of the bounding box, in MoveNet order
+    SKELETON = np.array([
+        (0.08, 0.50), (0.05, 0.45), (0.05, 0.55), (0.07, 0.40), (0.07, 0.60),
+        (0.25, 0.30), (0.25, 0.70), (0.40, 0.20), (0.40, 0.80), (0.55, 0.15), (0.55, 0.85),
+        (0.55, 0.38), (0.55, 0.62), (0.75, 0.38), (0.75, 0.62), (0.95, 0.38), (0.95, 0.62),
+    ], dtype=np.float32)
+
+    def __init__(self, model_path=None, threads=0):
+        pass
+
+    def infer(self, resized_frames):
+        outputs = np.zeros((len(resized_frames), 6, 56), dtype=np.float32)
+        for frame_num, frame in enumerate(resized_frames):
+            frame_height, frame_width = frame.shape[:2]
+            saturation = frame.max(axis=2) - frame.min(axis=2)
+            mask = (saturation > self.MIN_SATURATION).astype(np.uint8)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            # Largest blobs first; label 0 is the background
+            blobs = sorted(range(1, count), key=lambda label: -stats[label, cv2.CC_STAT_AREA])
+            blobs = [label for label in blobs if stats[label, cv2.CC_STAT_AREA] >= self.MIN_AREA][:6]
+            for slot, label in enumerate(blobs):
+                x, y, w, h = stats[label, :4]
+                ymin, xmin, ymax, xmax = y / frame_height, x / frame_width, (y + h) / frame_height, (x + w) / frame_width
+                person = outputs[frame_num, slot]
+                keypoints = person[:51].reshape(17, 3)
+                keypoints[:, 0] = ymin + self.SKELETON[:, 0] * (ymax - ymin)
+                keypoints[:, 1] = xmin + self.SKELETON[:, 1] * (xmax - xmin)
+                keypoints[:, 2] = 0.9
+                person[51:] = (ymin, xmin, ymax, xmax, 0.9)
+        return outputs
+
+def resolve_backend(backend, model_path):
+    """'auto' picks the backend from the model path: .tflite, .onnx, else a SavedModel directory."""
+    if backend != 'auto':
+        return backend
+    extension = os.path.splitext(model_path)[1].lower()
+    return {'.tflite': 'tflite', '.onnx': 'onnx'}.get(extension, 'savedmodel')
+
+def load_backend(backend, model_path, threads=0, xnnpack=True):
+    backend = resolve_backend(backend, model_path)
+    if backend == 'savedmodel':
+        return SavedModelBackend(model_path, threads)
+    if backend == 'tflite':
+        return TFLiteBackend(model_path, threads, xnnpack)
+    if backend == 'onnx':
+        return ONNXBackend(model_path, threads)
+    if backend == 'stub':
+        return StubBackend(model_path, threads)
+    raise ValueError(f"Unknown model backend: {backend}")
+
+def model_files(backend, model_path):
+    """Files a backend loads from `model_path`: the model file, or a SavedModel's graph and variables."""
+    if backend != 'savedmodel':
+        return [model_path]
+    files = [os.path.join(model_path, 'saved_model.pb')]
+    variables_dir = os.path.join(model_path, 'variables')
+    if os.path.isdir(variables_dir):
+        files += [os.path.join(variables_dir, name) for name in sorted(os.listdir(variables_dir))]
+    return files
+
+# ((path, mtime, size) of every model file) -> their content hash, so each model is read once per process
+_model_hashes = {}
+
+def model_content_hash(backend, model_path):
+    """SHA-256 over the contents of the model's files (missing files are left out)."""
+    files = []
+    for path in model_files(backend, model_path):
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((os.path.abspath(path), stat_result.st_mtime_ns, stat_result.st_size))
+    stamp = tuple(files)
+    content_hash = _model_hashes.get(stamp)
+    if content_hash is None:
+        digest = hashlib.sha256()
+        for path, _, _ in files:
+            # A SavedModel's files are told apart by name; a single model file is only its contents
+            name = os.path.relpath(path, os.path.abspath(model_path)) if backend == 'savedmodel' else ''
+            digest.update(f"{name}:{file_sha256(path)}".encode())
+        content_hash = _model_hashes[stamp] = digest.hexdigest()
+    return content_hash
+
+def model_id():
+    """Identifies the keypoint source in cache keys: the backend and the contents of the model it loads."""
+    backend = resolve_backend(MODEL_BACKEND, MODEL_PATH)
+    if backend == 'stub':
+        return 'movenet-stub'
+    return f"movenet-multipose-{backend}-{model_content_hash(backend, MODEL_PATH)[:16]}"
+
+_movenet = None
+_movenet_lock = threading.Lock()
+
+def configure_model(backend=None, model_path=None, threads=None, xnnpack=None):
+    """
+    Select the MoveNet backend, model and thread count before the model is first
+    used. Settings go through the environment so spawned worker processes match.
+    """
+    global MODEL_BACKEND, MODEL_PATH, MODEL_THREADS, MODEL_XNNPACK, _movenet
+    if backend is not None:
+        MODEL_BACKEND = os.environ['REELS_MODEL_BACKEND'] = backend
+    if model_path is not None:
+        MODEL_PATH = os.environ['REELS_MODEL_PATH'] = os.path.abspath(model_path)
+    if threads is not None:
+        MODEL_THREADS = threads
+        os.environ['REELS_MODEL_THREADS'] = str(threads)
+    if xnnpack is not None:
+        MODEL_XNNPACK = xnnpack
+        os.environ['REELS_MODEL_XNNPACK'] = '1' if xnnpack else '0'
+    with _movenet_lock:
+        _movenet = None
+
+def get_movenet():
+    """The configured backend, loaded on first use and shared by all threads."""
+    global _movenet
+    with _movenet_lock:
+        if _movenet is None:
+            _movenet = load_backend(MODEL_BACKEND, MODEL_PATH, MODEL_THREADS, MODEL_XNNPACK)
+        return _movenet
+
+def run_movenet_batch(resized_frames):
+    """
+    Run MoveNet on a list of frames already resized to MOVE_NET_INPUT_SIZE.
+    Returns a numpy array with one keypoint array per frame, in input order.
+    """
+    return get_movenet().infer(resized_frames)
+
+def warm_up_model(batch_size=DEFAULT_BATCH_SIZE):
+    """Trace the single-frame and batched inference paths once on blank frames."""
+    blank = np.zeros((MOVE_NET_INPUT_SIZE[1], MOVE_NET_INPUT_SIZE[0], 3), dtype=np.uint8)
+    run_movenet_batch([blank])
+    if batch_size > 1:
+        run_movenet_batch([blank] * batch_size)
+
+# -------------------------------
+# Utility: Scene change detection
+# -------------------------------
+class SceneChangeDetector:
+    """
+    Scores each frame against the previous one on a small grayscale signature
+    (SCENE_SIGNATURE_WIDTH wide, source aspect ratio) instead of the full frame.
+    The score is the mean squared gray-level difference of the signatures: the units
+    of the full-frame grayscale MSE it replaced, without its dependence on the source
+    resolution (or most of its response to fine detail, see SCENE_CHANGE_THRESHOLD),
+    computed with uint8 OpenCV ops only. Keeps the time spent per frame.
+    """
+    def __init__(self, signature_width=SCENE_SIGNATURE_WIDTH, threshold=SCENE_CHANGE_THRESHOLD):
+        self.signature_width = signature_width
+        self.threshold = threshold
+        self.prev_signature = None
+        self.signature = None
+        self.frames = 0
+        self.seconds = 0.0
+
+    def make_signature(self, frame):
+        height, width = frame.shape[:2]
+        signature_size = (self.signature_width, max(1, round(height * self.signature_width / width)))
+        # Skip pixels down to ~4x the signature before area-averaging; converting to
+        # gray after shrinking only touches the thumbnail
+        step = max(1, width // (self.signature_width * 4))
+        small = cv2.resize(frame[::step, ::step], signature_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def update(self, frame):
+        """Return the frame's difference score (0 for the first frame)."""
+        start = time.perf_counter()
+        self.prev_signature, self.signature = self.signature, self.make_signature(frame)
+        score = 0
+        if self.prev_signature is not None:
+            score = self.difference(self.prev_signature, self.signature)
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+        return score
+
+    @staticmethod
+    def difference(prev_signature, signature):
+        """Score of `signature` against the signature of the frame before it."""
+        return cv2.norm(prev_signature, signature, cv2.NORM_L2SQR) / signature.size
+
+    def is_scene_change(self, score):
+        return score > self.threshold
+
+    def reset(self):
+        self.prev_signature = None
+        self.signature = None
+
+    def report(self):
+        per_frame = self.seconds / self.frames * 1e6 if self.frames else 0.0
+        return f"scene detection: {per_frame:.1f} us/frame over {self.frames} frames"
+
+def signature_band_score(prev_signature, signature, norm_center):
+    """Difference score of two signatures over the crop-wide band around a normalized center."""
+    height, width = signature.shape
+    band_width = max(1, min(width, int(height * ASPECT_RATIO)))
+    start = compute_crop_start(norm_center, width, band_width)
+    band = slice(start, start + band_width)
+    return cv2.norm(prev_signature[:, band], signature[:, band], cv2.NORM_L2SQR) / (height * band_width)
 
 # -------------------------------
-# Utility: Mean Squared Error
+# Utility: Progress reporting and cancellation
 # -------------------------------
-def mse(imageA, imageB):
-    """Compute Mean Squared Error between two images."""
-    err = np.sum((imageA.astype("float") - imageB.astype("float")) ** 2)
-    err /= float(imageA.shape[0] * imageA.shape[1])
-    return err
+class JobCancelled(Exception):
+    """Raised inside a processing loop when the job's cancel event is set."""
+
+def write_json_atomic(path, data):
+    # Write then rename so readers never see a half-written file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+def write_progress(progress_path, progress, status):
+    write_json_atomic(progress_path, {
+        'progress': progress,
+        'status': status
+    })
+
+class ProgressReporter:
+    """
+    Throttled progress sink for the processing loops. An update is only emitted
+    (console line unless not `console`, progress file and/or callback) when at least
+    `min_interval` seconds or `min_delta` percent have passed since the last one, or
+    when forced.
+    """
+    def __init__(self, progress_path=DEFAULT_PROGRESS_PATH, callback=None,
+                 min_interval=PROGRESS_MIN_INTERVAL, min_delta=PROGRESS_MIN_DELTA, console=True):
+        self.progress_path = progress_path
+        self.callback = callback
+        self.console = console
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.last_time = None
+        self.last_progress = None
+
+    def update(self, progress, status, force=False):
+        now = time.monotonic()
+        if not force and self.last_time is not None:
+            if now - self.last_time < self.min_interval and abs(progress - self.last_progress) < self.min_delta:
+                return False
+        self.last_time = now
+        self.last_progress = progress
+
+        if self.console:
+            print(status, end='\r')
+        if self.progress_path:
+            write_progress(self.progress_path, progress, status)
+        if self.callback is not None:
+            self.callback(progress, status)
+        return True
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled("Job cancelled")
+
+# -------------------------------
+# Utility: Per-stage profiling
+# -------------------------------
+class StageStats:
+    """Count, total and max of one stage's timings, plus a uniform sample of them for percentiles."""
+    __slots__ = ('count', 'total', 'max', 'samples', 'rng')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.rng = random.Random(0)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < PROFILE_MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = self.rng.randrange(self.count)
+            if slot < PROFILE_MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+    def summary(self):
+        p50, p95, p99 = np.percentile(self.samples, [50, 95, 99]) if self.samples else (0.0, 0.0, 0.0)
+        return {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': float(p50) * 1000,
+            'p95_ms': float(p95) * 1000,
+            'p99_ms': float(p99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+class _StageTimer:
+    __slots__ = ('stats', 'start')
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.add(time.perf_counter() - self.start)
+
+class _NullStage:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+def peak_rss_bytes(children=False):
+    """Peak RSS of this process, or of its waited-for children, in bytes; None without the resource module (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageProfiler:
+    """
+    Wall-clock timings of the hot-path stages of one job ("analysis.movenet",
+    "crop.write", ...), frames per second of each pass and peak RSS. Stages are
+    timed with `with profiler.stage(name):` or by wrapping an iterator in
+    `profiler.timed(name, items)`. A disabled profiler (NULL_PROFILER, the default
+    everywhere) returns a shared no-op context and the iterator itself, so the
+    instrumented code pays about one method call per stage.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.passes = {}
+        self.start_time = time.perf_counter()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages.setdefault(name, StageStats())
+        return _StageTimer(stats)
+
+    def timed(self, name, items):
+        """Yield from `items`, timing how long each item takes to produce."""
+        if not self.enabled:
+            return items
+        return self._timed(self.stage(name), items)
+
+    @staticmethod
+    def _timed(timer, items):
+        iterator = iter(items)
+        while True:
+            with timer:
+                item = next(iterator, _END_OF_STREAM)
+            if item is _END_OF_STREAM:
+                return
+            yield item
+
+    def begin_pass(self, name):
+        """Start timing a pass; a pass run several times (one per -mo window) accumulates."""
+        if self.enabled:
+            entry = self.passes.setdefault(name, {'start': None, 'seconds': 0.0, 'frames': 0})
+            entry['start'] = time.perf_counter()
+
+    def end_pass(self, name, frames):
+        entry = self.passes.get(name)
+        if entry is not None and entry['start'] is not None:
+            entry['seconds'] += time.perf_counter() - entry['start']
+            entry['frames'] += frames
+            entry['start'] = None
+
+    def report(self, **info):
+        passes = {}
+        for name, entry in self.passes.items():
+            # A pass still running (the job failed or was cancelled) counts up to now
+            seconds = entry['seconds'] + (time.perf_counter() - entry['start'] if entry['start'] is not None else 0.0)
+            passes[name] = {'seconds': seconds, 'frames': entry['frames'],
+                            'fps': entry['frames'] / seconds if seconds else 0.0}
+        return {
+            **info,
+            'wall_s': time.perf_counter() - self.start_time,
+            'passes': passes,
+            'stages': {name: stats.summary() for name, stats in self.stages.items()},
+            'peak_rss_bytes': peak_rss_bytes(),
+            'peak_rss_children_bytes': peak_rss_bytes(children=True),
+        }
+
+    @staticmethod
+    def format(report):
+        lines = [f"{'stage':<22} {'calls':>8} {'total s':>9} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for name, stats in report['stages'].items():
+            lines.append(f"{name:<22} {stats['count']:>8} {stats['total_s']:>9.2f} {stats['mean_ms']:>9.2f} "
+                         f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['max_ms']:>8.2f}")
+        for name, entry in report['passes'].items():
+            lines.append(f"{name} pass: {entry['frames']} frames in {entry['seconds']:.2f} s ({entry['fps']:.1f} fps)")
+        if report['peak_rss_bytes'] is not None:
+            lines.append(f"peak RSS {report['peak_rss_bytes'] / 1024**2:.0f} MB "
+                         f"(ffmpeg children {report['peak_rss_children_bytes'] / 1024**2:.0f} MB)")
+        return '\n'.join(lines)
+
+    def finish(self, profile_path, **info):
+        """Print the report and write it to `profile_path` as JSON (no-op when disabled)."""
+        if not self.enabled:
+            return None
+        report = self.report(**info)
+        print(f"\n{self.format(report)}")
+        if profile_path:
+            write_json_atomic(profile_path, report)
+        return report
+
+NULL_PROFILER = StageProfiler(enabled=False)
 
 # -------------------------------
 # Utility: Find default video input
@@ -83,6 +733,92 @@ def get_video_metadata(video_path):
     video.release()
     return width, height, fps, frame_count
 
+# -------------------------------
+# Utility: Content hash of a file
+# -------------------------------
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# -------------------------------
+# Analysis cache: per-frame keypoints and frame diffs on disk, LRU under a byte budget
+# -------------------------------
+class AnalysisCache:
+    """
+    Stores the first-pass results (raw keypoints, frame diffs, scene-change flags)
+    as one .npz per video. Keys combine the video content hash, the model identity
+    and the thresholds used, so a hit can be replayed through MovementPlanner
+    without running MoveNet. Least recently used entries are evicted once the
+    directory exceeds `max_bytes`.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.known_hashes = {}  # path -> SHA-256 of content-addressed inputs, which never change
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def remember_hash(self, video_path, content_hash):
+        """Use `content_hash` for `video_path` instead of reading the whole file again."""
+        self.known_hashes[os.path.abspath(video_path)] = content_hash
+
+    def key(self, video_path, scene_change_threshold=SCENE_CHANGE_THRESHOLD, decoder=DEFAULT_ANALYSIS_DECODER):
+        parts = [
+            self.known_hashes.get(os.path.abspath(video_path)) or file_sha256(video_path),
+            model_id(),
+            f"in{MOVE_NET_INPUT_SIZE[0]}x{MOVE_NET_INPUT_SIZE[1]}",
+            f"det{DETECTION_CONFIDENCE_THRESHOLD}",
+            f"scene{scene_change_threshold}",
+            f"sig{SCENE_SIGNATURE_WIDTH}",
+            f"dec{decoder}{ANALYSIS_SHORT_SIDE if decoder == 'ffmpeg' else ''}",
+        ]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        # Loading counts as a use for LRU purposes
+        os.utime(path)
+        return entry
+
+    def store(self, key, keypoints, frame_diffs, scene_changes):
+        path = self.path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, keypoints=keypoints, frame_diffs=frame_diffs, scene_changes=scene_changes)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
 # -------------------------------
 # Utility: Cluster close detections
 # -------------------------------
@@ -119,21 +855,116 @@ def cluster_people(people, threshold=0.05):
         merged_people.append((i, avg_x, avg_y, cluster["max_conf"]))
     return merged_people
 
+def best_clusters(keypoints, threshold=0.05):
+    """
+    Vectorized select_best_cluster over a [frames, people, 56] keypoint array.
+    Returns a (frames, 4) float32 array of (cluster_id, avg_x, avg_y, max_confidence)
+    rows, NaN where nobody is detected. Detections are merged exactly like
+    cluster_people (in order, into the first cluster whose running center is
+    within `threshold`), one detection slot at a time across all frames.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    frame_count, people = keypoints.shape[:2]
+    if people == 0:
+        return np.full((frame_count, 4), np.nan, dtype=np.float32)
+    y_pos, x_pos, confidence = keypoints[..., 0], keypoints[..., 1], keypoints[..., 2]
+    detected = confidence > DETECTION_CONFIDENCE_THRESHOLD
+
+    # Up to one cluster per detection slot, per frame
+    sum_x = np.zeros((frame_count, people), dtype=np.float32)
+    sum_y = np.zeros((frame_count, people), dtype=np.float32)
+    count = np.zeros((frame_count, people), dtype=np.float32)
+    max_conf = np.full((frame_count, people), -np.inf, dtype=np.float32)
+    cluster_count = np.zeros(frame_count, dtype=np.intp)
+    slots = np.arange(people)
+    for person in range(people):
+        rows = np.flatnonzero(detected[:, person])
+        active = slots < cluster_count[rows, None]
+        center_count = np.where(active, count[rows], 1)
+        dx = x_pos[rows, person, None] - sum_x[rows] / center_count
+        dy = y_pos[rows, person, None] - sum_y[rows] / center_count
+        # Squared in float32 and rooted in float64, like math.sqrt on the float32 scalars
+        close = active & (np.sqrt((dx * dx + dy * dy).astype(np.float64)) < threshold)
+        joins = close.any(axis=1)
+        target = np.where(joins, close.argmax(axis=1), cluster_count[rows])
+        sum_x[rows, target] += x_pos[rows, person]
+        sum_y[rows, target] += y_pos[rows, person]
+        count[rows, target] += 1
+        max_conf[rows, target] = np.maximum(max_conf[rows, target], confidence[rows, person])
+        cluster_count[rows] += ~joins
+
+    # argmax keeps the first of equally confident clusters, like max()
+    frames = np.flatnonzero(cluster_count)
+    best = max_conf[frames].argmax(axis=1)
+    best_count = count[frames, best]
+    clusters = np.full((frame_count, 4), np.nan, dtype=np.float32)
+    clusters[frames] = np.stack([
+        best.astype(np.float32),
+        sum_x[frames, best] / best_count,
+        sum_y[frames, best] / best_count,
+        max_conf[frames, best],
+    ], axis=1)
+    return clusters
+
+def cluster_tuple(row):
+    """A best_clusters row as the (cluster_id, x, y, confidence) tuple the planners take, or None."""
+    if np.isnan(row[0]):
+        return None
+    return (int(row[0]), row[1], row[2], row[3])
+
+def select_best_cluster(keypoints):
+    """
+    Filter raw MoveNet detections by confidence, merge close ones and return the
+    most confident cluster, or None when nobody is detected.
+    """
+    confident = np.flatnonzero(keypoints[:, 2] > DETECTION_CONFIDENCE_THRESHOLD)
+    if len(confident) == 0:
+        return None
+    if len(confident) == 1:
+        # A single detection is its own cluster
+        y_pos, x_pos, confidence = keypoints[confident[0], :3]
+        return (0, x_pos, y_pos, confidence)
+    merged_people = cluster_people([(i, keypoints[i]) for i in confident], threshold=0.05)
+    return max(merged_people, key=lambda c: c[3])
+
+def cluster_batch(keypoints):
+    """select_best_cluster for each frame of a keypoint array, vectorized once the batch is large enough to pay off."""
+    if len(keypoints) >= CLUSTER_VECTORIZE_MIN_FRAMES:
+        return [cluster_tuple(row) for row in best_clusters(keypoints)]
+    return [select_best_cluster(frame_keypoints) for frame_keypoints in keypoints]
+
 # -------------------------------
 # Movement Planner: collects normalized x centers per frame and scene changes
 # -------------------------------
 class MovementPlanner:
-    def __init__(self, fps):
-        # List of tuples (frame_num, x_pos, is_scene_change)
-        self.frame_data = []
+    """
+    Planned x positions are kept in preallocated NumPy arrays (sized from
+    `total_frames`, grown by doubling if the container under-reports its frame
+    count). One entry is recorded per plan_movement call that produces a position,
+    in call order; scene-change entries are additionally indexed in `scene_indices`.
+    """
+    def __init__(self, fps, total_frames=0):
+        capacity = max(int(total_frames), 16)
+        self.frame_nums = np.empty(capacity, dtype=np.int64)
+        self.positions = np.empty(capacity, dtype=np.float64)
+        self.scene_flags = np.zeros(capacity, dtype=bool)
+        self.count = 0
+        self.last_x = None  # positions[count - 1] as a plain float, for the per-frame math
+        # Entry indices of scene-change markers, in order
+        self.scene_indices = np.empty(16, dtype=np.int64)
+        self.scene_count = 0
         self.fps = fps
         self.current_scene_start = 0
+        self.current_scene_index = 0
         self.waiting_for_detection = False
         self.default_x = DEFAULT_CENTER
         self.smoothing_rate = 0.05
         self.max_movement_per_frame = 0.03
-        self.position_history = []
         self.history_size = 3
+        # Ring buffer of the last `history_size` centered positions
+        self.position_history = np.empty(self.history_size, dtype=np.float64)
+        self.history_start = 0
+        self.history_len = 0
         self.centering_weight = 0.4
         self.fast_transition_threshold = 0.1
         self.in_transition = False
@@ -141,40 +972,80 @@ class MovementPlanner:
         self.stable_frames_required = int(fps * 0.5)  # Half a second worth of frames
         self.is_centering = False
 
+    @property
+    def frame_data(self):
+        """List of (frame_num, x_pos, is_scene_change) tuples, built on demand."""
+        return list(zip(self.frame_nums[:self.count].tolist(),
+                        self.positions[:self.count].tolist(),
+                        self.scene_flags[:self.count].tolist()))
+
+    def _append(self, frame_num, x_pos, is_scene):
+        if self.count == len(self.positions):
+            capacity = len(self.positions) * 2
+            self.frame_nums = np.resize(self.frame_nums, capacity)
+            self.positions = np.resize(self.positions, capacity)
+            self.scene_flags = np.resize(self.scene_flags, capacity)
+        self.frame_nums[self.count] = frame_num
+        self.positions[self.count] = x_pos
+        self.scene_flags[self.count] = is_scene
+        self.last_x = x_pos
+        if is_scene:
+            if self.scene_count == len(self.scene_indices):
+                self.scene_indices = np.resize(self.scene_indices, self.scene_count * 2)
+            self.scene_indices[self.scene_count] = self.count
+            self.scene_count += 1
+        self.count += 1
+
+    def _push_history(self, x_pos):
+        if self.history_len < self.history_size:
+            self.position_history[(self.history_start + self.history_len) % self.history_size] = x_pos
+            self.history_len += 1
+        else:
+            # Overwrite the oldest entry
+            self.position_history[self.history_start] = x_pos
+            self.history_start = (self.history_start + 1) % self.history_size
+
+    def _history_average(self):
+        # Summed oldest to newest, like sum() over the list this replaces
+        total = 0
+        for i in range(self.history_len):
+            total += self.position_history[(self.history_start + i) % self.history_size]
+        return total / self.history_len
+
     def plan_movement(self, frame_num, cluster, frame_diff, scene_change_threshold):
         if frame_diff > scene_change_threshold:
-            self.position_history = []
+            self.history_len = 0
             self.in_transition = False
             self.stable_frames = 0
             self.is_centering = False
             # Reset history on scene change
-            self.frame_data.append((frame_num, self.default_x, True))
+            self.current_scene_index = self.count
+            self._append(frame_num, self.default_x, True)
             self.current_scene_start = frame_num
             self.waiting_for_detection = True
             return
 
         if self.waiting_for_detection and cluster:
             # Found first detection after scene change
-            new_x = cluster[1]  # Normalized x position from cluster
-            
-            # Go back and update all frames since scene change
-            for i, (f_num, _, is_scene) in enumerate(self.frame_data):
-                if f_num >= self.current_scene_start:
-                    if is_scene:
-                        continue  # Keep scene change marker
-                    self.frame_data[i] = (f_num, new_x, False)
-            
+            new_x = float(cluster[1])  # Normalized x position from cluster
+
+            # Go back and update all frames since scene change; they are the
+            # entries after the scene marker, so this is a single slice
+            self.positions[self.current_scene_index + 1:self.count] = new_x
+            if self.count > self.current_scene_index + 1:
+                self.last_x = new_x
+
             self.waiting_for_detection = False
             return
 
         # Get the target position
         if cluster:
-            target_x = cluster[1]
+            target_x = float(cluster[1])
         else:
-            target_x = self.default_x if not self.frame_data else self.frame_data[-1][1]
+            target_x = self.default_x if not self.count else self.last_x
 
-        if self.frame_data:
-            last_x = self.frame_data[-1][1]
+        if self.count:
+            last_x = self.last_x
             distance_to_target = abs(target_x - last_x)
             
             # Always apply normal movement first
@@ -191,92 +1062,156 @@ class MovementPlanner:
             else:
                 self.stable_frames = 0
                 self.is_centering = False
-                self.position_history = []
+                self.history_len = 0
 
             # Only apply centering after we've been stable long enough
             if self.is_centering:
-                self.position_history.append(target_x)
-                if len(self.position_history) > self.history_size:
-                    self.position_history.pop(0)
+                self._push_history(target_x)
 
-                if len(self.position_history) > 1:
-                    avg_pos = sum(self.position_history) / len(self.position_history)
+                if self.history_len > 1:
+                    avg_pos = self._history_average()
                     target_x = target_x * (1 - self.centering_weight) + avg_pos * self.centering_weight
 
-        self.frame_data.append((frame_num, target_x, False))
+        self._append(frame_num, target_x, False)
+
+    def positions_by_frame(self, total_frames):
+        """Planned x per frame number (NaN for frames without an entry), for O(1) lookups."""
+        by_frame = np.full(total_frames, np.nan, dtype=np.float64)
+        frame_nums = self.frame_nums[:self.count]
+        in_range = (frame_nums >= 0) & (frame_nums < total_frames)
+        by_frame[frame_nums[in_range]] = self.positions[:self.count][in_range]
+        return by_frame
+
+    def scene_change_frames(self):
+        """Set of frame numbers marked as scene changes."""
+        return set(self.frame_nums[self.scene_indices[:self.scene_count]].tolist())
 
     def get_scene_segments(self):
         """
         Returns a list of scene segments, where each segment is a tuple:
-        (start_frame, end_frame, [positions])
+        (start_frame, end_frame, positions) with positions as an array view
         """
-        segments = []
-        current_segment_start = 0
-        current_positions = []
-
-        for i, (frame_num, x_pos, is_scene) in enumerate(self.frame_data):
-            if is_scene and i > 0:
-                # End current segment
-                segments.append((
-                    current_segment_start,
-                    frame_num - 1,
-                    current_positions
-                ))
-                # Start new segment
-                current_segment_start = frame_num
-                current_positions = []
-            
-            current_positions.append(x_pos)
-
-        # Add final segment
-        if current_positions:
-            segments.append((
-                current_segment_start,
-                self.frame_data[-1][0],
-                current_positions
-            ))
+        if not self.count:
+            return []
+        # Every scene marker after the first entry starts a new segment
+        boundaries = [int(i) for i in self.scene_indices[:self.scene_count] if i > 0]
+        starts = [0] + boundaries
+        ends = boundaries + [self.count]
 
+        segments = []
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            start_frame = 0 if i == 0 else int(self.frame_nums[start])
+            end_frame = int(self.frame_nums[end] - 1) if end < self.count else int(self.frame_nums[self.count - 1])
+            segments.append((start_frame, end_frame, self.positions[start:end]))
         return segments
 
+    @staticmethod
+    def smooth_step(last_x, target_x, base_alpha=0.1, delta_threshold=0.015):
+        """One step of the per-scene smoothing recurrence in interpolate_and_smooth."""
+        delta = target_x - last_x
+        
+        if abs(delta) < delta_threshold:
+            return last_x
+        # Variable smoothing rate based on distance to target
+        # Slower smoothing (smaller alpha) as we get closer
+        distance_factor = min(abs(delta) * 2, 1.0)  # Scale based on distance
+        deceleration_alpha = base_alpha * distance_factor
+        
+        # Even slower for final approach
+        if abs(delta) < 0.1:  # Within 10% of target
+            deceleration_alpha *= 0.5  # Half speed for final approach
+        
+        return last_x + deceleration_alpha * delta
+
     def interpolate_and_smooth(self, total_frames, base_alpha=0.1, delta_threshold=0.015):
         """
         Smooth each scene segment independently with variable smoothing rates
         - Faster for large movements
         - Slower as it approaches target (deceleration)
+        Returns an array of total_frames normalized centers.
         """
-        smoothed_centers = [self.default_x] * total_frames
+        smoothed_centers = np.full(total_frames, self.default_x, dtype=np.float64)
         segments = self.get_scene_segments()
 
         for start_frame, end_frame, positions in segments:
+            # Plain floats are much faster than NumPy scalars in this recurrence
+            positions = positions.tolist()
+            count = min(len(positions), end_frame + 1 - start_frame, total_frames - start_frame)
+            smoothed = [0.0] * max(count, 0)
             last_x = positions[0]
-            for i, frame in enumerate(range(start_frame, end_frame + 1)):
-                if i >= len(positions):
-                    break
-                
-                target_x = positions[i]
-                delta = target_x - last_x
-                
-                if abs(delta) < delta_threshold:
-                    smoothed_x = last_x
-                else:
-                    # Variable smoothing rate based on distance to target
-                    # Slower smoothing (smaller alpha) as we get closer
-                    distance_factor = min(abs(delta) * 2, 1.0)  # Scale based on distance
-                    deceleration_alpha = base_alpha * distance_factor
-                    
-                    # Even slower for final approach
-                    if abs(delta) < 0.1:  # Within 10% of target
-                        deceleration_alpha *= 0.5  # Half speed for final approach
-                    
-                    smoothed_x = last_x + deceleration_alpha * delta
-                
-                smoothed_centers[frame] = smoothed_x
-                last_x = smoothed_x
+            for i in range(count):
+                last_x = smoothed[i] = self.smooth_step(last_x, positions[i], base_alpha, delta_threshold)
+            if count > 0:
+                smoothed_centers[start_frame:start_frame + count] = smoothed
 
         return smoothed_centers
 
+class StreamingPlanner(MovementPlanner):
+    """
+    MovementPlanner that hands out smoothed centers while planning, instead of
+    after the whole video. An entry is final once nothing can rewrite it: always,
+    except while waiting for the first detection after a scene change (that
+    detection backfills the scene so far). Final entries are smoothed with the same
+    per-scene recurrence as interpolate_and_smooth and their (frame_num, center)
+    pairs are appended to `ready` in frame order; the values are the same as
+    interpolate_and_smooth would give. `max_lookahead` caps how many entries may
+    wait for that detection; past it they are emitted as planned and a late
+    backfill no longer reaches them.
+    """
+    def __init__(self, fps, total_frames=0, max_lookahead=None, base_alpha=0.1, delta_threshold=0.015):
+        super().__init__(fps, total_frames)
+        self.max_lookahead = max_lookahead
+        self.base_alpha = base_alpha
+        self.delta_threshold = delta_threshold
+        self.ready = []
+        self.next_entry = 0  # first entry not yet smoothed
+        self.next_frame = 0  # first frame not yet emitted
+        self.segment_start_frame = 0
+        self.segment_entries = 0
+        self.segment_last_x = None
+
+    def plan_movement(self, frame_num, cluster, frame_diff, scene_change_threshold):
+        super().plan_movement(frame_num, cluster, frame_diff, scene_change_threshold)
+        final_count = self.count
+        if self.waiting_for_detection:
+            final_count = self.current_scene_index + 1
+            if self.max_lookahead is not None:
+                final_count = max(final_count, self.count - self.max_lookahead)
+        self._emit(max(final_count, self.next_entry))
+
+    def _emit(self, final_count):
+        for i in range(self.next_entry, final_count):
+            if self.scene_flags[i] and i > 0:
+                # New scene: frames of the previous one without an entry keep the default
+                self._emit_default(int(self.frame_nums[i]))
+                self.segment_start_frame = self.next_frame
+                self.segment_entries = 0
+                self.segment_last_x = None
+            target_x = float(self.positions[i])
+            if self.segment_last_x is None:
+                self.segment_last_x = target_x
+            self.segment_last_x = self.smooth_step(self.segment_last_x, target_x, self.base_alpha, self.delta_threshold)
+            self.ready.append((self.segment_start_frame + self.segment_entries, self.segment_last_x))
+            self.segment_entries += 1
+            self.next_frame += 1
+        self.next_entry = max(self.next_entry, final_count)
+
+    def _emit_default(self, end_frame):
+        while self.next_frame < end_frame:
+            self.ready.append((self.next_frame, self.default_x))
+            self.next_frame += 1
+
+    def finish(self, total_frames):
+        """Emit everything left, up to `total_frames` frames in all."""
+        self._emit(self.count)
+        self._emit_default(total_frames)
+
+    def pop_ready(self):
+        ready, self.ready = self.ready, []
+        return ready
+
 # -------------------------------
-# PersonTracker (for real-time processing; unchanged)
+# PersonTracker (for real-time processing; one per stream)
 # -------------------------------
 class PersonTracker:
     def __init__(self):
@@ -384,174 +1319,1127 @@ class PersonTracker:
         self.state['new_target'] = {'id': None, 'confidence': None, 'frames': 0}
 
 # -------------------------------
-# Main Processing: Two-pass Video Processing
+# Pipeline: bounded queues between decode, analysis and encode stages
 # -------------------------------
-def process_video(input_video, output_video, debug=False):
-    global prev_gray_frame
-    width, height, fps, total_frames = get_video_metadata(input_video)
-    
-    # First Pass: Detect and plan movements
-    planner = MovementPlanner(fps)
-    video = cv2.VideoCapture(input_video)
-    frame_count = 0
-    prev_gray_frame = None
+class PipelineQueue:
+    """Bounded queue between two pipeline stages that records how full it gets."""
+    def __init__(self, name, maxsize=PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.max_depth = 0
+        self.depth_total = 0
+        self.samples = 0
+
+    def put(self, item, stop_event=None):
+        # Poll so a producer blocked on a full queue notices when the consumer quits
+        while True:
+            try:
+                self.queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self.depth_total += depth
+        self.samples += 1
+        return True
 
-    print("Initializing...")
-    while video.isOpened():
-        success, frame = video.read()
-        if not success:
-            break
+    def get(self):
+        return self.queue.get()
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        frame_diff = mse(prev_gray_frame, gray) if prev_gray_frame is not None else 0
-        prev_gray_frame = gray
+    def report(self):
+        avg_depth = self.depth_total / self.samples if self.samples else 0
+        return f"{self.name} queue: avg depth {avg_depth:.1f}, max {self.max_depth}/{self.maxsize}"
 
-        # Run MoveNet
-        input_tensor = prepare_input_tensor(frame)
-        outputs = movenet_func(input_tensor)
-        keypoints = outputs['output_0'].numpy()[0]
+_END_OF_STREAM = object()
 
-        people = [(i, kp) for i, kp in enumerate(keypoints) if kp[2] > DETECTION_CONFIDENCE_THRESHOLD]
-        merged_people = cluster_people(people, threshold=0.05)
+def threaded_stage(source, stage_queue):
+    """
+    Run the `source` iterable on a background thread and yield its items through
+    `stage_queue`. The producer blocks when the queue is full (backpressure) and
+    exceptions raised by it are re-raised in the consumer.
+    """
+    stop_event = threading.Event()
 
-        if merged_people:
-            best_cluster = max(merged_people, key=lambda c: c[3])
-            planner.plan_movement(frame_count, best_cluster, frame_diff, scene_change_threshold=3000)
+    def produce():
+        try:
+            for item in source:
+                if not stage_queue.put(item, stop_event):
+                    return
+            stage_queue.put(_END_OF_STREAM, stop_event)
+        except BaseException as e:
+            stage_queue.put(e, stop_event)
+
+    thread = threading.Thread(target=produce, name=f"{stage_queue.name}-stage", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = stage_queue.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        thread.join()
+
+class ThreadedWriter:
+    """Wraps a video writer so frames are handed to the encoder on a background thread."""
+    def __init__(self, writer, stage_queue):
+        self.writer = writer
+        self.stage_queue = stage_queue
+        self.error = None
+        self.thread = threading.Thread(target=self._encode, name=f"{stage_queue.name}-stage", daemon=True)
+        self.thread.start()
+
+    def _encode(self):
+        while True:
+            frame = self.stage_queue.get()
+            if frame is _END_OF_STREAM:
+                return
+            if self.error is None:
+                try:
+                    self.writer.write(frame)
+                except BaseException as e:
+                    self.error = e
+
+    def write(self, frame):
+        if self.error is not None:
+            raise self.error
+        self.stage_queue.put(frame)
+
+    def release(self):
+        self.stage_queue.put(_END_OF_STREAM)
+        self.thread.join()
+        self.writer.release()
+        if self.error is not None:
+            raise self.error
+
+class FFmpegWriter:
+    """
+    Streams BGR frames as rawvideo into one long-lived ffmpeg process, so each output
+    is encoded exactly once. When `audio_source` is given, its audio for the same
+    time range is muxed in the same step. Odd crop dimensions are trimmed by one
+    pixel because yuv420p needs even sizes.
+    """
+    def __init__(self, output_path, fps, frame_size, codec=DEFAULT_ENCODING['codec'],
+                 preset=DEFAULT_ENCODING['preset'], crf=DEFAULT_ENCODING['crf'],
+                 audio_source=None, audio_start=0.0, audio_duration=None):
+        width, height = frame_size
+        self.output_path = output_path
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+        ]
+        if audio_source:
+            cmd += ['-ss', f'{audio_start:.6f}']
+            if audio_duration is not None:
+                cmd += ['-t', f'{audio_duration:.6f}']
+            # Trailing '?' keeps sources without an audio stream working
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a:0?', '-c:a', 'aac', '-shortest']
         else:
-            planner.plan_movement(frame_count, None, frame_diff, scene_change_threshold=3000)
-        
-        frame_count += 1
-        print(f"Analyzing: {(frame_count / total_frames) * 100:.2f}%", end='\r')
-
-        # Update progress
-        progress = (frame_count / total_frames) * 100
-        with open('progress.json', 'w') as f:
-            json.dump({
-                'progress': progress,
-                'status': f"Analyzing: {progress:.2f}%"
-            }, f)
-    video.release()
-
-    # Get smoothed centers, now processed per scene
-    smoothed_centers = planner.interpolate_and_smooth(total_frames)
-
-    # Second Pass: Use the smoothed centers to crop each frame.
-    print("\nSecond pass: Cropping video based on smoothed centers...")
+            cmd += ['-an']
+        cmd += ['-vf', 'crop=trunc(iw/2)*2:trunc(ih/2)*2', '-c:v', codec, '-pix_fmt', 'yuv420p']
+        if preset:
+            cmd += ['-preset', preset]
+        if crf is not None:
+            cmd += ['-crf', str(crf)]
+        cmd += ['-movflags', '+faststart', output_path]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.returncode = None
+        self.stderr = ''
+
+    def write(self, frame):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            # ffmpeg exited early (bad codec or preset, full disk): raise with what it said
+            self._wait()
+            raise RuntimeError(f"ffmpeg stopped reading frames for {self.output_path}: {self.stderr.strip()}")
+
+    def release(self):
+        self._wait()
+
+    def _wait(self):
+        """Close ffmpeg's input and wait for it to exit; raises with its output when it failed."""
+        if self.returncode is None:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.stderr = self.process.stderr.read().decode(errors='replace')
+            self.returncode = self.process.wait()
+        if self.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.output_path}: {self.stderr.strip()}")
+
+def open_video_writer(output_path, fps, frame_size, encoding=None, audio_source=None, audio_start=0.0, audio_duration=None):
+    """
+    Open the configured encoder backend. `encoding` overrides DEFAULT_ENCODING:
+    'ffmpeg' pipes into ffmpeg (codec/preset/crf, audio muxing); 'opencv' is the
+    old cv2.VideoWriter mp4v path, which has no audio.
+    """
+    encoding = {**DEFAULT_ENCODING, **(encoding or {})}
+    if encoding['encoder'] == 'opencv':
+        return cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+    if encoding['encoder'] != 'ffmpeg':
+        raise ValueError(f"Unknown encoder: {encoding['encoder']}")
+    return FFmpegWriter(output_path, fps, frame_size, codec=encoding['codec'], preset=encoding['preset'],
+                        crf=encoding['crf'], audio_source=audio_source, audio_start=audio_start,
+                        audio_duration=audio_duration)
+
+def read_frames(input_video, max_frames=None, start_frame=0):
+    """Yield decoded BGR frames from `input_video` in order, starting at `start_frame`."""
     video = cv2.VideoCapture(input_video)
-    crop_width = int(height * ASPECT_RATIO)
-    output_height = height
-    output_width = crop_width
-    writer = cv2.VideoWriter(output_video, cv2.VideoWriter_fourcc(*'mp4v'), fps, (output_width, output_height))
-    frame_count = 0
+    if start_frame > 0:
+        video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        if int(video.get(cv2.CAP_PROP_POS_FRAMES)) != start_frame:
+            # The container cannot seek to that frame exactly: decode up to it instead
+            video.release()
+            video = cv2.VideoCapture(input_video)
+            for _ in range(start_frame):
+                if not video.grab():
+                    break
+    try:
+        frames_read = 0
+        while video.isOpened():
+            if max_frames is not None and frames_read >= max_frames:
+                break
+            success, frame = video.read()
+            if not success:
+                break
+            frames_read += 1
+            yield frame
+    finally:
+        video.release()
+
+def analysis_frame_size(width, height, short_side=ANALYSIS_SHORT_SIDE):
+    """Even (width, height) with the shorter side scaled to `short_side`, never upscaling."""
+    scale = min(1.0, short_side / min(width, height))
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
 
-    while video.isOpened():
-        success, frame = video.read()
-        if not success:
-            break
+def read_scaled_frames(input_video, frame_size, fps, max_frames=None, start_frame=0, threads=ANALYSIS_DECODE_THREADS):
+    """
+    Yield BGR frames of `frame_size` from an ffmpeg rawvideo pipe that decodes and
+    scales with its own threads, so full-resolution frames never reach Python.
+    Frames match read_frames() one to one: every decoded frame is passed through
+    and seeking to `start_frame` is frame-accurate for constant frame rate input.
+    """
+    width, height = frame_size
+    cmd = ['ffmpeg', '-loglevel', 'error', '-threads', str(threads)]
+    filters = f'scale={width}:{height}:flags=bilinear'
+    if start_frame > 0:
+        # A seek time of start_frame / fps is rounded at NTSC rates, and demuxers differ on
+        # whether the frame at that time is kept. Seek a frame early with the original
+        # timestamps, then select frames by their nearest frame index.
+        cmd += ['-copyts', '-start_at_zero', '-ss', f'{(start_frame - 1) / fps:.6f}']
+        filters = f'select=gte(t*{fps!r}+0.5\\,{start_frame}),' + filters
+    cmd += ['-i', input_video, '-an', '-sn', '-vf', filters, '-vsync', 'passthrough']
+    if max_frames is not None:
+        cmd += ['-frames:v', str(max_frames)]
+    cmd += ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+
+    frame_bytes = width * height * 3
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=frame_bytes)
+    try:
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+        stderr = process.stderr.read().decode(errors='replace')
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed decoding {input_video}: {stderr.strip()}")
+    finally:
+        # Stopped early (cancel, max_frames reached by the consumer): do not leave ffmpeg behind
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+def read_analysis_frames(input_video, fps, max_frames=None, start_frame=0, decoder=DEFAULT_ANALYSIS_DECODER):
+    """Frames for the first pass: downscaled by ffmpeg when available, else full resolution from OpenCV."""
+    if decoder == 'ffmpeg' and shutil.which('ffmpeg') is None:
+        print("ffmpeg not found, decoding the analysis pass with OpenCV")
+        decoder = 'opencv'
+    if decoder == 'opencv':
+        return read_frames(input_video, max_frames, start_frame)
+    width, height, _, _ = get_video_metadata(input_video)
+    return read_scaled_frames(input_video, analysis_frame_size(width, height), fps, max_frames, start_frame)
+
+def compute_crop_start(norm_center, width, crop_width):
+    """Convert a normalized center to the left pixel column of the crop window."""
+    x_center = int(norm_center * width)
+    x_start = x_center - (crop_width // 2)
+    if x_start < 0:
+        x_start = 0
+    elif x_start + crop_width > width:
+        x_start = width - crop_width
+    return x_start
 
-        # Use the smoothed center for this frame (or default)
-        if frame_count < len(smoothed_centers):
-            norm_center = smoothed_centers[frame_count]
+# -------------------------------
+# Frame analyzer: decides which frames go to MoveNet and feeds the planner in order
+# -------------------------------
+def interpolate_cluster(start_cluster, end_cluster, t):
+    """Linear blend of two (id, x, y, confidence) clusters at fraction t of the way."""
+    return (
+        start_cluster[0],
+        start_cluster[1] + (end_cluster[1] - start_cluster[1]) * t,
+        start_cluster[2] + (end_cluster[2] - start_cluster[2]) * t,
+        min(start_cluster[3], end_cluster[3]),
+    )
+
+class PendingFrame:
+    """A frame waiting in FrameAnalyzer until the anchors around it are inferred."""
+    __slots__ = ('frame_num', 'frame_diff', 'resized', 'is_anchor', 'reused', 'keypoints', 'cluster')
+
+    def __init__(self, frame_num, frame_diff, resized, is_anchor, reused=False):
+        self.frame_num = frame_num
+        self.frame_diff = frame_diff
+        self.resized = resized
+        self.is_anchor = is_anchor
+        self.reused = reused
+        self.keypoints = None
+        self.cluster = None
+
+class FrameAnalyzer:
+    """
+    Receives every analyzed frame in order as (frame_num, frame_diff, resized_frame)
+    and feeds one best cluster per frame to the planner, also in order.
+
+    Only "anchor" frames are sent to MoveNet, `batch_size` anchors per call. With
+    stride 1 every frame is an anchor. With a larger stride, anchors are every
+    `stride` frames plus both sides of every scene cut, so interpolation never spans
+    a detected cut; frames in between get clusters interpolated from the surrounding
+    anchors. When two neighbouring anchors are more than STRIDE_REFINE_JUMP apart
+    (a fast move or a cut the frame diff missed), the frames between them are
+    inferred too. With `adaptive_stride`, the stride halves when the subject moves
+    fast between anchors and grows back (up to `stride`) when it is slow.
+
+    With a `motion_threshold`, an anchor whose motion (passed to push) is below it
+    reuses the last inferred detection instead of running MoveNet, at most
+    `max_skip` anchors in a row and never on a cut. The x distance between the
+    reused detection and the next real one is recorded as the drift of that run.
+    Keypoints are recorded for inferred and reused frames (NaN elsewhere).
+    """
+    def __init__(self, planner, batch_size=DEFAULT_BATCH_SIZE, stride=1, adaptive_stride=False,
+                 scene_change_threshold=SCENE_CHANGE_THRESHOLD, on_planned=None,
+                 motion_threshold=None, max_skip=MOTION_GATE_MAX_SKIP, profiler=NULL_PROFILER):
+        self.planner = planner
+        self.profiler = profiler
+        self.batch_size = batch_size
+        self.max_stride = stride
+        self.stride = stride
+        self.adaptive_stride = adaptive_stride
+        self.scene_change_threshold = scene_change_threshold
+        self.on_planned = on_planned
+        self.pending = []
+        self.pending_anchors = 0
+        self.last_anchor_num = None
+        # (frame_num, cluster) of the most recent anchor already fed to the planner
+        self.prev_anchor = None
+        self.keypoints = []
+        self.clusters = []
+        self.frame_diffs = []
+        self.inferred_frames = 0
+        self.motion_threshold = motion_threshold
+        self.max_skip = max_skip
+        self.consecutive_skips = 0
+        self.skipped_frames = 0
+        # (keypoints, cluster) of the last inferred frame fed to the planner, for reuse
+        self.last_inferred = None
+        self.last_detection_x = None
+        self.held_cluster = None
+        self.drifts = []
+
+    def push(self, frame_num, frame_diff, resized, motion=None):
+        is_cut = frame_diff > self.scene_change_threshold
+        if is_cut and self.pending and not self.pending[-1].is_anchor:
+            # Close the interval before the cut with a real detection
+            self.pending[-1].is_anchor = True
+            self.pending_anchors += 1
+
+        is_anchor = (self.last_anchor_num is None or is_cut
+                     or frame_num - self.last_anchor_num >= self.stride)
+        reused = False
+        if is_anchor:
+            reused = not is_cut and self._can_skip(motion)
+            if reused:
+                self.consecutive_skips += 1
+                self.skipped_frames += 1
+                resized = None
+            else:
+                self.consecutive_skips = 0
+            self.last_anchor_num = frame_num
+            self.pending_anchors += 1
+        self.pending.append(PendingFrame(frame_num, frame_diff, resized, is_anchor, reused))
+
+        if self.pending_anchors >= self.batch_size:
+            self.flush()
+
+    def finish(self):
+        self.flush(final=True)
+
+    def _can_skip(self, motion):
+        return (self.motion_threshold is not None and motion is not None
+                and motion < self.motion_threshold and self.consecutive_skips < self.max_skip
+                and self.last_anchor_num is not None)
+
+    def flush(self, final=False):
+        self._infer([frame for frame in self.pending
+                     if frame.is_anchor and not frame.reused and frame.keypoints is None])
+        self._reuse_detections()
+        self._infer(self._refine_jumps())
+
+        # Frames after the last anchor wait for the next one, unless this is the end
+        resolve_count = len(self.pending)
+        if not final:
+            while resolve_count and not self.pending[resolve_count - 1].is_anchor:
+                resolve_count -= 1
+
+        next_anchor = None
+        for i in range(resolve_count):
+            frame = self.pending[i]
+            if frame.is_anchor:
+                cluster = frame.cluster
+                if frame.reused:
+                    self.held_cluster = cluster
+                else:
+                    self._record_drift(cluster)
+                    self._adapt_stride(frame.frame_num, cluster)
+                    self.last_inferred = (frame.keypoints, cluster)
+                self.prev_anchor = (frame.frame_num, cluster)
+                next_anchor = None
+            else:
+                if next_anchor is None:
+                    next_anchor = next(((later.frame_num, later.cluster)
+                                        for later in self.pending[i + 1:resolve_count] if later.is_anchor), None)
+                cluster = self._interpolated_cluster(frame.frame_num, next_anchor)
+
+            with self.profiler.stage('analysis.plan'):
+                self.planner.plan_movement(frame.frame_num, cluster, frame.frame_diff, scene_change_threshold=self.scene_change_threshold)
+            self.keypoints.append(frame.keypoints)
+            self.clusters.append(cluster)
+            self.frame_diffs.append(frame.frame_diff)
+            if self.on_planned is not None:
+                self.on_planned()
+
+        del self.pending[:resolve_count]
+        self.pending_anchors = sum(1 for frame in self.pending if frame.is_anchor)
+
+    def _infer(self, frames):
+        for i in range(0, len(frames), self.batch_size):
+            batch = frames[i:i + self.batch_size]
+            with self.profiler.stage('analysis.movenet'):
+                batch_keypoints = run_movenet_batch([frame.resized for frame in batch])
+            with self.profiler.stage('analysis.cluster'):
+                batch_clusters = cluster_batch(batch_keypoints)
+            for frame, keypoints, cluster in zip(batch, batch_keypoints, batch_clusters):
+                frame.keypoints = keypoints
+                frame.cluster = cluster
+                frame.resized = None
+                if frame.cluster is not None:
+                    self.last_detection_x = frame.cluster[1]
+        self.inferred_frames += len(frames)
+
+    def _reuse_detections(self):
+        """Give gated anchors the keypoints and cluster of the last inferred frame before them."""
+        source = self.last_inferred
+        for frame in self.pending:
+            if not frame.is_anchor:
+                continue
+            if not frame.reused:
+                if frame.keypoints is None:
+                    break
+                source = (frame.keypoints, frame.cluster)
+            elif frame.keypoints is None and source is not None:
+                frame.keypoints, frame.cluster = source
+
+    def _record_drift(self, cluster):
+        if self.held_cluster is not None and cluster is not None:
+            self.drifts.append(abs(cluster[1] - self.held_cluster[1]))
+        self.held_cluster = None
+
+    def gating_report(self, frame_count):
+        """One-line summary of how many frames reused a detection and how far it drifted."""
+        skip_rate = self.skipped_frames / frame_count * 100 if frame_count else 0.0
+        report = f"motion gate: reused detections on {self.skipped_frames} of {frame_count} frames ({skip_rate:.1f}%)"
+        if self.drifts:
+            report += (f", drift at resume max {max(self.drifts) * 100:.2f}% / mean "
+                       f"{sum(self.drifts) / len(self.drifts) * 100:.2f}% of width over {len(self.drifts)} runs")
+        return report
+
+    def _refine_jumps(self):
+        """Promote to anchors the frames between two inferred anchors that jump apart."""
+        promoted = []
+        between = []
+        prev_cluster = self.prev_anchor[1] if self.prev_anchor is not None else None
+        for frame in self.pending:
+            if not frame.is_anchor:
+                between.append(frame)
+                continue
+            if frame.keypoints is None:
+                break
+            if (between and prev_cluster is not None and frame.cluster is not None
+                    and abs(frame.cluster[1] - prev_cluster[1]) > STRIDE_REFINE_JUMP):
+                promoted.extend(between)
+            between = []
+            prev_cluster = frame.cluster
+        for frame in promoted:
+            frame.is_anchor = True
+        return promoted
+
+    def _interpolated_cluster(self, frame_num, next_anchor):
+        prev_cluster = self.prev_anchor[1] if self.prev_anchor is not None else None
+        if prev_cluster is None or next_anchor is None or next_anchor[1] is None:
+            # Hold the last detection (or keep "no detection") when an end is missing
+            return prev_cluster
+        prev_num = self.prev_anchor[0]
+        t = (frame_num - prev_num) / (next_anchor[0] - prev_num)
+        return interpolate_cluster(prev_cluster, next_anchor[1], t)
+
+    def _adapt_stride(self, frame_num, cluster):
+        if not self.adaptive_stride or cluster is None or self.prev_anchor is None or self.prev_anchor[1] is None:
+            return
+        gap = frame_num - self.prev_anchor[0]
+        if gap <= 0:
+            return
+        speed = abs(cluster[1] - self.prev_anchor[1][1]) / gap
+        if speed > ADAPTIVE_STRIDE_FAST:
+            self.stride = max(1, self.stride // 2)
+        elif speed < ADAPTIVE_STRIDE_SLOW:
+            self.stride = min(self.max_stride, self.stride + 1)
+
+    def cluster_array(self):
+        """The clusters fed to the planner as an (n, 4) float64 array, NaN rows for no detection."""
+        clusters = np.full((len(self.clusters), 4), np.nan)
+        for i, cluster in enumerate(self.clusters):
+            if cluster is not None:
+                clusters[i] = [float(value) for value in cluster]
+        return clusters
+
+    def analysis(self):
+        """Per-frame keypoints (NaN where not inferred), frame diffs and scene-change flags."""
+        template = next((kp for kp in self.keypoints if kp is not None), None)
+        if template is None:
+            keypoints = np.zeros((len(self.keypoints), 0), dtype=np.float32)
         else:
-            norm_center = DEFAULT_CENTER
-
-        # Convert normalized center to pixel coordinates.
-        x_center = int(norm_center * width)
-        x_start = x_center - (crop_width // 2)
-        if x_start < 0:
-            x_start = 0
-        elif x_start + crop_width > width:
-            x_start = width - crop_width
-        x_end = x_start + crop_width
+            blank = np.full_like(template, np.nan, dtype=np.float32)
+            keypoints = np.asarray([blank if kp is None else kp for kp in self.keypoints], dtype=np.float32)
+        frame_diffs = np.asarray(self.frame_diffs, dtype=np.float64)
+        return {
+            'keypoints': keypoints,
+            'frame_diffs': frame_diffs,
+            'scene_changes': frame_diffs > self.scene_change_threshold,
+        }
 
-        cropped_frame = frame[:, x_start:x_end].copy()
+# -------------------------------
+# Main Processing: Two-pass Video Processing
+# -------------------------------
+def plan_from_analysis(keypoints, frame_diffs, fps, scene_change_threshold=SCENE_CHANGE_THRESHOLD):
+    """Replay stored first-pass results through a fresh MovementPlanner, without MoveNet."""
+    if len(keypoints) == 0 or np.ndim(keypoints) < 3:
+        clusters = np.full((len(frame_diffs), 4), np.nan)
+    else:
+        clusters = best_clusters(keypoints)
+    return plan_from_clusters(clusters, frame_diffs, fps, scene_change_threshold)
+
+def plan_from_clusters(clusters, frame_diffs, fps, scene_change_threshold=SCENE_CHANGE_THRESHOLD):
+    """Replay per-frame planner inputs (FrameAnalyzer.cluster_array rows) through a fresh MovementPlanner."""
+    planner = MovementPlanner(fps, len(frame_diffs))
+    for frame_num, (cluster, frame_diff) in enumerate(zip(clusters, frame_diffs)):
+        best_cluster = None if np.isnan(cluster[0]) else tuple(float(value) for value in cluster)
+        planner.plan_movement(frame_num, best_cluster, frame_diff, scene_change_threshold=scene_change_threshold)
+    return planner
+
+def decode_for_analysis(input_video, fps, max_frames, start_frame, decoder, scene_detector, pipelined,
+                        profiler=NULL_PROFILER):
+    """
+    Decode stage of the first pass: frame -> (scene score, its signature, MoveNet input).
+    The signature travels with the frame because the detector itself runs ahead on
+    the decode thread when pipelined. Returns the iterator and its queue (or None).
+    """
+    def decode():
+        frames = read_analysis_frames(input_video, fps, max_frames, start_frame, decoder)
+        for frame in profiler.timed('analysis.decode', frames):
+            with profiler.stage('analysis.scene_detect'):
+                frame_diff = scene_detector.update(frame)
+            with profiler.stage('analysis.preprocess'):
+                resized = resize_for_movenet(frame)
+            yield frame_diff, scene_detector.signature, resized
+
+    decoded = decode()
+    decode_queue = None
+    if pipelined:
+        decode_queue = PipelineQueue("decode")
+        decoded = threaded_stage(decoded, decode_queue)
+    return decoded, decode_queue
+
+def feed_analyzer(analyzer, decoded, motion_gate=None, cancel_event=None):
+    """Push every decoded frame into the analyzer."""
+    prev_signature = None
+    for frame_num, (frame_diff, signature, resized) in enumerate(decoded):
+        check_cancelled(cancel_event)
+
+        motion = None
+        if motion_gate == 'subject' and prev_signature is not None and analyzer.last_detection_x is not None:
+            motion = signature_band_score(prev_signature, signature, analyzer.last_detection_x)
+        elif motion_gate:
+            motion = frame_diff
+        prev_signature = signature
+
+        analyzer.push(frame_num, frame_diff, resized, motion)
+    analyzer.finish()
+
+def analyze_video(input_video, fps, total_frames, batch_size=DEFAULT_BATCH_SIZE, max_frames=None, pipelined=True,
+                  reporter=None, cancel_event=None, cache=None, start_frame=0, progress_offset=0,
+                  stride=1, adaptive_stride=False, motion_gate=None, motion_threshold=MOTION_GATE_THRESHOLD,
+                  max_skip=MOTION_GATE_MAX_SKIP, decoder=DEFAULT_ANALYSIS_DECODER, workers=1, profiler=NULL_PROFILER):
+    """
+    First pass: run MoveNet over the video and feed the best cluster of every frame
+    to a MovementPlanner. With batch_size > 1, resized frames are collected and
+    inferred together; the planner still receives them in frame order.
+    With stride > 1 only every stride-th frame (and both sides of each cut) is
+    inferred and the rest are interpolated, see FrameAnalyzer.
+    With motion_gate 'global' (whole-frame MSE) or 'subject' (MSE around the last
+    detected subject), frames that barely changed reuse the previous detection.
+    When pipelined, decoding and preprocessing run on their own thread. With the
+    'ffmpeg' decoder, frames arrive already scaled down (see read_analysis_frames).
+    With workers > 1, chunks of the video are analyzed in parallel processes, see
+    analyze_in_parallel.
+    Returns the planner and the per-frame analysis (keypoints, frame_diffs, scene_changes).
+    With an AnalysisCache, a previous analysis of the same content is replayed instead.
+    `start_frame`/`max_frames` restrict the analysis to a window; frame numbers in the
+    planner are then relative to `start_frame` and the cache is not used. Progress is
+    reported as (progress_offset + frames analyzed) / total_frames. Stages are timed
+    into `profiler` (in this process only; parallel chunks count as one pass).
+    """
+    if reporter is None:
+        reporter = ProgressReporter()
+    profiler.begin_pass('analysis')
+
+    cache_key = None
+    if cache is not None and max_frames is None and start_frame == 0:
+        cache_key = cache.key(input_video, decoder=decoder)
+        cached = cache.load(cache_key)
+        if cached is not None:
+            print("Analysis cache hit, replaying stored keypoints...")
+            with profiler.stage('analysis.replay'):
+                planner = plan_from_analysis(cached['keypoints'], cached['frame_diffs'], fps)
+            reporter.update(100, "Analyzing: 100.00%", force=True)
+            profiler.end_pass('analysis', len(cached['frame_diffs']))
+            return planner, cached
+
+    analyzer_options = {'batch_size': batch_size, 'stride': stride, 'adaptive_stride': adaptive_stride,
+                        'motion_threshold': motion_threshold if motion_gate else None, 'max_skip': max_skip}
+    if workers > 1:
+        planner, analysis = analyze_in_parallel(input_video, fps, total_frames, workers, analyzer_options,
+                                                motion_gate=motion_gate, decoder=decoder, max_frames=max_frames,
+                                                start_frame=start_frame, reporter=reporter,
+                                                cancel_event=cancel_event, progress_offset=progress_offset)
+    else:
+        planner = MovementPlanner(fps, max_frames if max_frames is not None else total_frames)
+        frame_count = 0
+        scene_detector = SceneChangeDetector()
+
+        def report_planned():
+            nonlocal frame_count
+            frame_count += 1
+
+            # Update progress
+            progress = ((progress_offset + frame_count) / total_frames) * 100
+            reporter.update(progress, f"Analyzing: {progress:.2f}%", force=progress_offset + frame_count == total_frames)
+
+        analyzer = FrameAnalyzer(planner, on_planned=report_planned, profiler=profiler, **analyzer_options)
+        decoded, decode_queue = decode_for_analysis(input_video, fps, max_frames, start_frame, decoder,
+                                                    scene_detector, pipelined, profiler)
+        print("Initializing...")
+        feed_analyzer(analyzer, decoded, motion_gate, cancel_event)
+
+        if decode_queue is not None:
+            print(f"\n{decode_queue.report()}")
+        print(f"\n{scene_detector.report()}")
+        if stride > 1:
+            print(f"\nMoveNet ran on {analyzer.inferred_frames} of {frame_count} frames")
+        if motion_gate:
+            print(f"\n{analyzer.gating_report(frame_count)}")
+        analysis = analyzer.analysis()
+
+    profiler.end_pass('analysis', len(analysis['frame_diffs']))
+    # Only full-rate analyses are complete enough to replay later
+    if cache_key is not None and stride == 1 and not motion_gate:
+        cache.store(cache_key, **analysis)
+    return planner, analysis
+
+# -------------------------------
+# Parallel analysis: chunks of the video in worker processes
+# -------------------------------
+_process_pools = {}
+
+def get_process_pool(workers, initializer=None):
+    """
+    Process pool created on first use and kept for the life of the process, so
+    workers (and the MoveNet they load) are reused across jobs. Workers are spawned,
+    not forked, because TensorFlow does not survive a fork.
+    """
+    key = (workers, initializer)
+    if key not in _process_pools:
+        _process_pools[key] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                                  initializer=initializer)
+    return _process_pools[key]
+
+def get_analysis_pool(workers):
+    """Pool for parallel analysis; each worker warms MoveNet up once when it starts."""
+    return get_process_pool(workers, warm_up_model)
+
+def plan_chunks(frame_count, chunk_count, min_chunk):
+    """
+    Split [0, frame_count) into about `chunk_count` contiguous (start, end) ranges of
+    equal length, none shorter than `min_chunk` frames.
+    """
+    chunk_count = max(1, min(chunk_count, frame_count // max(1, min_chunk)))
+    boundaries = [round(i * frame_count / chunk_count) for i in range(chunk_count + 1)]
+    return list(zip(boundaries[:-1], boundaries[1:]))
 
+def analyze_chunk(input_video, fps, start_frame, max_frames, analyzer_options, motion_gate, decoder):
+    """
+    Worker process side: analyze up to `max_frames` frames from `start_frame` (None:
+    to the end of the video) with their own scene scores, and return what the planner
+    needs (clusters, scene scores), the keypoints, the scene signatures of the first
+    and last frame (to score the chunk boundary) and the number of MoveNet calls
+    saved by stride/gating. The first frame is scored 0, like the start of a video.
+    """
+    analyzer = FrameAnalyzer(MovementPlanner(fps, max_frames or 0), **analyzer_options)
+    decoded, _ = decode_for_analysis(input_video, fps, max_frames, start_frame, decoder,
+                                     SceneChangeDetector(), pipelined=True)
+    edge_signatures = [None, None]
+
+    def keep_edge_signatures(decoded):
+        for frame_diff, signature, resized in decoded:
+            if edge_signatures[0] is None:
+                edge_signatures[0] = signature
+            edge_signatures[1] = signature
+            yield frame_diff, signature, resized
+
+    feed_analyzer(analyzer, keep_edge_signatures(decoded), motion_gate)
+    analysis = analyzer.analysis()
+    return (analyzer.cluster_array(), analysis['frame_diffs'], analysis['keypoints'], edge_signatures,
+            analyzer.inferred_frames, analyzer.skipped_frames)
+
+def analyze_in_parallel(input_video, fps, total_frames, workers, analyzer_options, motion_gate=None,
+                        decoder=DEFAULT_ANALYSIS_DECODER, max_frames=None, start_frame=0, reporter=None,
+                        cancel_event=None, progress_offset=0):
+    """
+    Parallel first pass. The frames are split into equal chunks and each chunk is
+    decoded, scored for scene changes and run through a FrameAnalyzer in a worker
+    process, so no frame is decoded twice. The first frame of each chunk is then
+    rescored against the last frame of the chunk before it, the per-frame clusters
+    are stitched and replayed through one planner in frame order, so with stride 1
+    and no motion gate the result is the same as a serial run. With stride or
+    gating each chunk starts with an inferred frame, which a serial run would not
+    always have.
+    """
+    if reporter is None:
+        reporter = ProgressReporter()
+    frame_count = max_frames if max_frames is not None else total_frames
+    chunks = plan_chunks(frame_count, workers * ANALYSIS_CHUNKS_PER_WORKER, int(fps * ANALYSIS_MIN_CHUNK_SECONDS))
+    print(f"Analyzing {frame_count} frames in {len(chunks)} chunks on {workers} processes")
+
+    pool = get_analysis_pool(workers)
+    futures = {}
+    for chunk_num, (chunk_start, chunk_end) in enumerate(chunks):
+        # The last chunk reads to the end, in case the container under-reports its frame count
+        chunk_frames = None if max_frames is None and chunk_num == len(chunks) - 1 else chunk_end - chunk_start
+        futures[pool.submit(analyze_chunk, input_video, fps, start_frame + chunk_start, chunk_frames,
+                            analyzer_options, motion_gate, decoder)] = chunk_start
+    results = {}
+    analyzed = 0
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            check_cancelled(cancel_event)
+            for future in done:
+                results[futures[future]] = future.result()
+                analyzed += len(results[futures[future]][0])
+                progress = min((progress_offset + analyzed) / total_frames, 1.0) * 100
+                reporter.update(progress, f"Analyzing: {progress:.2f}%", force=progress_offset + analyzed >= total_frames)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    ordered = [results[chunk_start] for chunk_start, _ in chunks if len(results[chunk_start][0])]
+    # Chunk boundaries: score each first frame against the previous chunk's last frame
+    prev_signature = None
+    for _, chunk_diffs, _, (first_signature, last_signature), _, _ in ordered:
+        if prev_signature is not None:
+            chunk_diffs[0] = SceneChangeDetector.difference(prev_signature, first_signature)
+        prev_signature = last_signature
+    clusters = np.concatenate([result[0] for result in ordered])
+    frame_diffs = np.concatenate([result[1] for result in ordered])
+    keypoints = np.concatenate([result[2] for result in ordered])
+    inferred = sum(result[4] for result in ordered)
+    skipped = sum(result[5] for result in ordered)
+    scene_changes = frame_diffs > SCENE_CHANGE_THRESHOLD
+    print(f"\n{np.count_nonzero(scene_changes)} scene changes")
+    if inferred != len(frame_diffs):
+        print(f"\nMoveNet ran on {inferred} of {len(frame_diffs)} frames ({skipped} reused by the motion gate)")
+
+    planner = plan_from_clusters(clusters, frame_diffs, fps)
+    analysis = {
+        'keypoints': keypoints,
+        'frame_diffs': frame_diffs,
+        'scene_changes': scene_changes,
+    }
+    return planner, analysis
+
+def process_video(input_video, output_video, debug=False, batch_size=DEFAULT_BATCH_SIZE, pipelined=True,
+                  progress_path=DEFAULT_PROGRESS_PATH, progress_callback=None, cancel_event=None, cache=None,
+                  encoding=None, stride=1, adaptive_stride=False, motion_gate=None,
+                  motion_threshold=MOTION_GATE_THRESHOLD, max_skip=MOTION_GATE_MAX_SKIP,
+                  analysis_decoder=DEFAULT_ANALYSIS_DECODER, analysis_workers=1, render_workers=1,
+                  single_pass=False, max_lookahead_seconds=STREAM_MAX_LOOKAHEAD_SECONDS, profile_path=None,
+                  progress_console=True):
+    """
+    Crop `input_video` to a 9:16 reel following the detected subject. With a
+    `profile_path`, per-stage timings, per-pass fps and peak RSS are printed and
+    written there as JSON when the job ends (also when it fails). Without
+    `progress_console`, progress only goes to `progress_path` and `progress_callback`.
+    """
+    profiler = StageProfiler() if profile_path else NULL_PROFILER
+    try:
+        width, height, fps, total_frames = get_video_metadata(input_video)
+        reporter = ProgressReporter(progress_path, progress_callback, console=progress_console)
+        if single_pass and not debug:
+            process_video_single_pass(input_video, output_video, batch_size=batch_size, pipelined=pipelined,
+                                      reporter=reporter, cancel_event=cancel_event, encoding=encoding,
+                                      stride=stride, adaptive_stride=adaptive_stride, motion_gate=motion_gate,
+                                      motion_threshold=motion_threshold, max_skip=max_skip,
+                                      max_lookahead_seconds=max_lookahead_seconds, profiler=profiler)
+            return
+    
+        # First Pass: Detect and plan movements
+        planner, analysis = analyze_video(input_video, fps, total_frames, batch_size=batch_size, pipelined=pipelined,
+                                          reporter=reporter, cancel_event=cancel_event, cache=cache,
+                                          stride=stride, adaptive_stride=adaptive_stride, motion_gate=motion_gate,
+                                          motion_threshold=motion_threshold, max_skip=max_skip,
+                                          decoder=analysis_decoder, workers=analysis_workers, profiler=profiler)
+
+        # Get smoothed centers, now processed per scene
+        with profiler.stage('plan.smooth'):
+            smoothed_centers = planner.interpolate_and_smooth(total_frames)
+        if render_workers > 1 and not debug:
+            print(f"\nSecond pass: Cropping video in {render_workers} processes...")
+            profiler.begin_pass('crop')
+            render_in_parallel(input_video, output_video, smoothed_centers, width, height, fps, total_frames,
+                               render_workers, encoding, reporter, cancel_event)
+            profiler.end_pass('crop', total_frames)
+            print("\nProcessing complete.")
+            return
         if debug:
-        # Draw purple dots for raw x-axis positions from key_frames
-            for key_frame in planner.frame_data:
-                key_frame_num, key_frame_x, _ = key_frame
-                if key_frame_num == frame_count:  # Only draw for the current frame
-                    # Convert normalized x position to pixel coordinates
-                    raw_x_center = int(key_frame_x * width) - x_start
-                    cv2.circle(cropped_frame, (raw_x_center, height // 2), 5, (255, 0, 255), -1)  # Purple dot
+            # Frame-indexed lookups for the overlay instead of scanning the plan every frame
+            raw_positions = planner.positions_by_frame(total_frames)
+            scene_frames = planner.scene_change_frames()
+
+        # Second Pass: Use the smoothed centers to crop each frame.
+        print("\nSecond pass: Cropping video based on smoothed centers...")
+        crop_width = int(height * ASPECT_RATIO)
+        output_height = height
+        output_width = crop_width
+        writer = open_video_writer(output_video, fps, (output_width, output_height), encoding, audio_source=input_video)
+        profiler.begin_pass('crop')
+        frames = profiler.timed('crop.decode', read_frames(input_video))
+        decode_queue = encode_queue = None
+        if pipelined:
+            decode_queue = PipelineQueue("decode")
+            encode_queue = PipelineQueue("encode")
+            frames = threaded_stage(frames, decode_queue)
+            writer = ThreadedWriter(writer, encode_queue)
+        frame_count = 0
 
-        
-            # Overlay previous (red), current (green), and next (blue) center dots.
-            if frame_count > 0:
-                prev_center = smoothed_centers[frame_count - 1]
-                prev_x = int(prev_center * width) - x_start
-                cv2.circle(cropped_frame, (prev_x, height // 2), 5, (0, 0, 255), -1)
-            curr_x = int(norm_center * width) - x_start
-            cv2.circle(cropped_frame, (curr_x, height // 2), 5, (0, 255, 0), -1)
-            if frame_count < len(smoothed_centers) - 1:
-                next_center = smoothed_centers[frame_count + 1]
-                next_x = int(next_center * width) - x_start
-                cv2.circle(cropped_frame, (next_x, height // 2), 5, (255, 0, 0), -1)
+        try:
+            for frame in frames:
+                check_cancelled(cancel_event)
+
+                # Use the smoothed center for this frame (or default)
+                if frame_count < len(smoothed_centers):
+                    norm_center = smoothed_centers[frame_count]
+                else:
+                    norm_center = DEFAULT_CENTER
+
+                # Convert normalized center to pixel coordinates.
+                x_start = compute_crop_start(norm_center, width, crop_width)
+                x_end = x_start + crop_width
+
+                with profiler.stage('crop.crop'):
+                    cropped_frame = frame[:, x_start:x_end].copy()
+
+                if debug:
+                    # Draw purple dot for the raw planned x position of this frame
+                    if frame_count < len(raw_positions) and not np.isnan(raw_positions[frame_count]):
+                        # Convert normalized x position to pixel coordinates
+                        raw_x_center = int(raw_positions[frame_count] * width) - x_start
+                        cv2.circle(cropped_frame, (raw_x_center, height // 2), 5, (255, 0, 255), -1)  # Purple dot
+
+                    # Overlay previous (red), current (green), and next (blue) center dots.
+                    if frame_count > 0:
+                        prev_center = smoothed_centers[frame_count - 1]
+                        prev_x = int(prev_center * width) - x_start
+                        cv2.circle(cropped_frame, (prev_x, height // 2), 5, (0, 0, 255), -1)
+                    curr_x = int(norm_center * width) - x_start
+                    cv2.circle(cropped_frame, (curr_x, height // 2), 5, (0, 255, 0), -1)
+                    if frame_count < len(smoothed_centers) - 1:
+                        next_center = smoothed_centers[frame_count + 1]
+                        next_x = int(next_center * width) - x_start
+                        cv2.circle(cropped_frame, (next_x, height // 2), 5, (255, 0, 0), -1)
             
-            # If this frame was marked as a new scene, display "New Scene" in the center.
-            if frame_count in [f_num for f_num, _, is_scene in planner.frame_data if is_scene]:
-                cv2.putText(cropped_frame, "New Scene", (crop_width // 2 - 50, height // 2),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+                    # If this frame was marked as a new scene, display "New Scene" in the center.
+                    if frame_count in scene_frames:
+                        cv2.putText(cropped_frame, "New Scene", (crop_width // 2 - 50, height // 2),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
             
-            # Also, run MoveNet on the frame and overlay the detected keypoints (in yellow).
-            input_tensor = prepare_input_tensor(frame)
-            outputs = movenet_func(input_tensor)
-            keypoints = outputs['output_0'].numpy()[0]
-            for kp in keypoints:
-                y, x, conf = kp[:3]
-                if conf > DETECTION_CONFIDENCE_THRESHOLD:
-                    x_pixel = int((x * width) - x_start)
-                    y_pixel = int(y * height)
-                    cv2.circle(cropped_frame, (x_pixel, y_pixel), 3, (0, 255, 255), -1)
-
-        writer.write(cropped_frame)
-        frame_count += 1
-        print(f"Cropping: {(frame_count / total_frames) * 100:.2f}%", end='\r')
-
-        # Update progress
-        progress = (frame_count / total_frames) * 100
-        with open('progress.json', 'w') as f:
-            json.dump({
-                'progress': progress,
-                'status': f"Generating reels... {progress:.2f}%"
-            }, f)
-    video.release()
-    writer.release()
+                    # Overlay the keypoints detected in the first pass (in yellow).
+                    if frame_count < len(analysis['keypoints']):
+                        for kp in analysis['keypoints'][frame_count]:
+                            y, x, conf = kp[:3]
+                            if conf > DETECTION_CONFIDENCE_THRESHOLD:
+                                x_pixel = int((x * width) - x_start)
+                                y_pixel = int(y * height)
+                                cv2.circle(cropped_frame, (x_pixel, y_pixel), 3, (0, 255, 255), -1)
+
+                # Pipelined, this is the wait for room in the encode queue
+                with profiler.stage('crop.write'):
+                    writer.write(cropped_frame)
+                frame_count += 1
+
+                # Update progress
+                progress = (frame_count / total_frames) * 100
+                reporter.update(progress, f"Generating reels... {progress:.2f}%", force=frame_count == total_frames)
+        finally:
+            with profiler.stage('crop.release'):
+                writer.release()
+        profiler.end_pass('crop', frame_count)
+        if pipelined:
+            print(f"\n{decode_queue.report()}\n{encode_queue.report()}")
+        print("\nProcessing complete.")
+    finally:
+        profiler.finish(profile_path, input=input_video, output=output_video)
+
+# -------------------------------
+# Single pass: analyze and crop from one decode
+# -------------------------------
+def process_video_single_pass(input_video, output_video, batch_size=DEFAULT_BATCH_SIZE, pipelined=True,
+                              reporter=None, cancel_event=None, encoding=None, stride=1, adaptive_stride=False,
+                              motion_gate=None, motion_threshold=MOTION_GATE_THRESHOLD, max_skip=MOTION_GATE_MAX_SKIP,
+                              max_lookahead_seconds=STREAM_MAX_LOOKAHEAD_SECONDS, profiler=NULL_PROFILER):
+    """
+    Decode the video once and crop each frame as soon as a StreamingPlanner has
+    finalized its center. Only the frames between decode and finalization are held
+    (MoveNet batch, stride, and the wait for a detection after a cut, capped at
+    `max_lookahead_seconds`), so output starts after a few frames instead of after
+    the whole analysis. With no cap hit, the crop path is the one process_video
+    computes from a full-resolution analysis. The analysis cache is not used.
+    """
+    if reporter is None:
+        reporter = ProgressReporter()
+    width, height, fps, total_frames = get_video_metadata(input_video)
+    crop_width = int(height * ASPECT_RATIO)
+    max_lookahead = None if max_lookahead_seconds is None else int(fps * max_lookahead_seconds)
+    planner = StreamingPlanner(fps, total_frames, max_lookahead)
+    scene_detector = SceneChangeDetector()
+
+    writer = open_video_writer(output_video, fps, (crop_width, height), encoding, audio_source=input_video)
+    def decode():
+        for frame in profiler.timed('stream.decode', read_frames(input_video)):
+            with profiler.stage('stream.scene_detect'):
+                frame_diff = scene_detector.update(frame)
+            with profiler.stage('stream.preprocess'):
+                resized = resize_for_movenet(frame)
+            yield frame, frame_diff, scene_detector.signature, resized
+
+    decoded = decode()
+    decode_queue = encode_queue = None
+    if pipelined:
+        decode_queue = PipelineQueue("decode")
+        encode_queue = PipelineQueue("encode")
+        decoded = threaded_stage(decoded, decode_queue)
+        writer = ThreadedWriter(writer, encode_queue)
+
+    # Full frames waiting for their center, oldest first
+    held = collections.deque()
+    max_held = 0
+    frame_count = 0
+    first_output = None
+    start_time = time.perf_counter()
+
+    def hold(decoded):
+        nonlocal max_held
+        for frame, frame_diff, signature, resized in decoded:
+            held.append(frame)
+            max_held = max(max_held, len(held))
+            yield frame_diff, signature, resized
+
+    def write_ready():
+        nonlocal frame_count, first_output
+        for _, norm_center in planner.pop_ready():
+            frame = held.popleft()
+            x_start = compute_crop_start(norm_center, width, crop_width)
+            with profiler.stage('stream.write'):
+                writer.write(frame[:, x_start:x_start + crop_width].copy())
+            frame_count += 1
+            if first_output is None:
+                first_output = time.perf_counter() - start_time
+
+            # Update progress
+            progress = min(frame_count / total_frames, 1.0) * 100
+            reporter.update(progress, f"Generating reels... {progress:.2f}%", force=frame_count == total_frames)
+
+    analyzer = FrameAnalyzer(planner, batch_size=batch_size, stride=stride, adaptive_stride=adaptive_stride,
+                             on_planned=write_ready, profiler=profiler,
+                             motion_threshold=motion_threshold if motion_gate else None, max_skip=max_skip)
+    print("Analyzing and cropping in a single pass...")
+    profiler.begin_pass('stream')
+    try:
+        feed_analyzer(analyzer, hold(decoded), motion_gate, cancel_event)
+        planner.finish(len(analyzer.frame_diffs))
+        write_ready()
+    finally:
+        writer.release()
+    profiler.end_pass('stream', frame_count)
+
+    if pipelined:
+        print(f"\n{decode_queue.report()}\n{encode_queue.report()}")
+    if first_output is not None:
+        print(f"\nfirst frame written after {first_output:.2f} s; at most {max_held} frames held")
     print("\nProcessing complete.")
 
+# -------------------------------
+# Parallel rendering: contiguous frame ranges in worker processes, then concat
+# -------------------------------
+def render_range(input_video, output_path, start_frame, centers, width, height, fps, encoding=None):
+    """
+    Worker process side: crop frames [start_frame, start_frame + len(centers)) with
+    their smoothed centers into a video-only file. Frames are decoded by read_frames,
+    like the serial crop pass, which seeks to `start_frame` exactly. Returns the
+    number of frames written.
+    """
+    crop_width = int(height * ASPECT_RATIO)
+    writer = open_video_writer(output_path, fps, (crop_width, height), encoding)
+    written = 0
+    try:
+        for frame_num, frame in enumerate(read_frames(input_video, len(centers), start_frame)):
+            x_start = compute_crop_start(centers[frame_num], width, crop_width)
+            writer.write(frame[:, x_start:x_start + crop_width].copy())
+            written += 1
+    finally:
+        writer.release()
+    return written
+
+def concatenate_segments(segment_files, final_output, audio_source=None):
+    """
+    Join segments with the concat demuxer and stream copy, like
+    concatenate_videos_with_audio, but frame-accurate: every segment is a
+    separately encoded range that starts on a keyframe, so nothing is re-encoded
+    and no frame is dropped or repeated at the joins. Audio for the whole output
+    is muxed from `audio_source` in the same step.
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix='.txt', dir=os.path.dirname(os.path.abspath(final_output)))
+    try:
+        with os.fdopen(list_fd, 'w') as f:
+            for segment in segment_files:
+                escaped = os.path.abspath(segment).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_source:
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a:0?', '-c:a', 'aac', '-shortest']
+        cmd += ['-c:v', 'copy', '-movflags', '+faststart', final_output]
+        subprocess.run(cmd, check=True)
+    finally:
+        os.remove(list_path)
+
+def render_in_parallel(input_video, output_video, smoothed_centers, width, height, fps, total_frames, workers,
+                       encoding=None, reporter=None, cancel_event=None):
+    """
+    Second pass split into contiguous frame ranges, each decoded, cropped and encoded
+    by its own worker process, then joined by concatenate_segments. Every range but
+    the last must write all of its frames, or the joins would skip or shift frames.
+    """
+    if reporter is None:
+        reporter = ProgressReporter()
+    encoding = {**DEFAULT_ENCODING, **(encoding or {})}
+    centers = np.full(total_frames, DEFAULT_CENTER)
+    centers[:min(total_frames, len(smoothed_centers))] = smoothed_centers[:total_frames]
+
+    range_count = max(1, min(workers * RENDER_CHUNKS_PER_WORKER, total_frames // max(1, int(fps * RENDER_MIN_CHUNK_SECONDS))))
+    boundaries = [round(i * total_frames / range_count) for i in range(range_count + 1)]
+    ranges = list(zip(boundaries[:-1], boundaries[1:]))
+
+    part_dir = tempfile.mkdtemp(prefix='render_', dir=os.path.dirname(os.path.abspath(output_video)))
+    extension = os.path.splitext(output_video)[1] or '.mp4'
+    part_paths = [os.path.join(part_dir, f"part_{i:04d}{extension}") for i in range(len(ranges))]
+    pool = get_process_pool(workers)
+    try:
+        futures = {pool.submit(render_range, input_video, part_path, start, centers[start:end], width, height, fps, encoding):
+                   range_num for range_num, (part_path, (start, end)) in enumerate(zip(part_paths, ranges))}
+        rendered = 0
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                check_cancelled(cancel_event)
+                for future in done:
+                    written = future.result()
+                    range_num = futures[future]
+                    start, end = ranges[range_num]
+                    # Only the last range may run short, when the container over-reports its frame count
+                    if written != end - start and range_num != len(ranges) - 1:
+                        raise RuntimeError(f"Rendering frames {start}-{end} of {input_video} wrote {written} frames")
+                    rendered += end - start
+                    progress = (rendered / total_frames) * 100
+                    reporter.update(progress, f"Generating reels... {progress:.2f}%", force=rendered == total_frames)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        audio_source = input_video if encoding['encoder'] == 'ffmpeg' else None
+        concatenate_segments(part_paths, output_video, audio_source)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
 # -------------------------------
 # Process single frame (for real-time or alternative pipelines)
 # -------------------------------
-def process_frame(frame, width, height, output_width, output_height, tracker, merge_distance, frame_count, debug):
-    global prev_gray_frame
+def process_frame(frame, width, height, output_width, output_height, tracker, merge_distance, frame_count, debug,
+                  scene_detector, profiler=NULL_PROFILER):
+    # The caller owns `scene_detector` (one per stream, like `tracker`)
     max_movement = 30  # maximum allowed movement in pixels
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    frame_diff = mse(prev_gray_frame, gray) if prev_gray_frame is not None else 0
-    prev_gray_frame = gray
-    input_tensor = prepare_input_tensor(frame)
-    outputs = movenet_func(input_tensor)
-    keypoints = outputs['output_0'].numpy()[0]
-    people = [(i, kp) for i, kp in enumerate(keypoints) if kp[2] > DETECTION_CONFIDENCE_THRESHOLD]
-    merged_people = cluster_people(people, threshold=0.05)
-    if not merged_people:
-        state_text = tracker.handle_no_detection(frame_diff, scene_change_threshold=3000)
-    else:
-        best_cluster = max(merged_people, key=lambda c: c[3])
-        state_text = tracker.update(best_cluster, frame_diff, scene_change_threshold=3000, movement_threshold=max_movement)
+    with profiler.stage('frame.scene_detect'):
+        frame_diff = scene_detector.update(frame)
+    with profiler.stage('frame.preprocess'):
+        resized = resize_for_movenet(frame)
+    with profiler.stage('frame.movenet'):
+        keypoints = run_movenet_batch([resized])[0]
+    with profiler.stage('frame.cluster'):
+        best_cluster = select_best_cluster(keypoints)
+    with profiler.stage('frame.track'):
+        if best_cluster is None:
+            state_text = tracker.handle_no_detection(frame_diff, scene_change_threshold=scene_detector.threshold)
+        else:
+            state_text = tracker.update(best_cluster, frame_diff, scene_change_threshold=scene_detector.threshold, movement_threshold=max_movement)
     
-    crop_width = int(height * ASPECT_RATIO)
-    x_center = int(tracker.get_position()[0] * width)
-    x_start = x_center - (crop_width // 2)
-    if x_start < 0:
-        x_start = 0
-    elif x_start + crop_width > width:
-        x_start = width - crop_width
-    x_end = x_start + crop_width
-    cropped_frame = frame[:, x_start:x_end].copy()
-    if cropped_frame.shape[1] != output_width or cropped_frame.shape[0] != output_height:
-        frame_resized = cv2.resize(cropped_frame, (output_width, output_height), interpolation=cv2.INTER_LINEAR)
-    else:
-        frame_resized = cropped_frame
+    with profiler.stage('frame.crop'):
+        crop_width = int(height * ASPECT_RATIO)
+        x_start = compute_crop_start(tracker.get_position()[0], width, crop_width)
+        x_end = x_start + crop_width
+        cropped_frame = frame[:, x_start:x_end].copy()
+        if cropped_frame.shape[1] != output_width or cropped_frame.shape[0] != output_height:
+            frame_resized = cv2.resize(cropped_frame, (output_width, output_height), interpolation=cv2.INTER_LINEAR)
+        else:
+            frame_resized = cropped_frame
     if debug:
         for kp in keypoints:
             y, x, conf = kp[:3]
@@ -564,54 +2452,616 @@ def process_frame(frame, width, height, output_width, output_height, tracker, me
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
     return frame_resized, state_text
 
+# -------------------------------
+# Live mode: crop frames from a pipe or stream as they arrive
+# -------------------------------
+def parse_frame_size(text):
+    """'1280x720' -> (1280, 720)."""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def read_raw_frames(stream, frame_size):
+    """Yield bgr24 frames of `frame_size` from a binary stream until it ends."""
+    width, height = frame_size
+    frame_bytes = width * height * 3
+    while True:
+        data = stream.read(frame_bytes)
+        if len(data) < frame_bytes:
+            return
+        yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+def read_fifo_frames(path, frame_size):
+    """read_raw_frames() from a FIFO, which is closed when the frames end or the generator is closed."""
+    with open(path, 'rb') as stream:
+        yield from read_raw_frames(stream, frame_size)
+
+def read_paced_frames(input_video, frame_size, fps, loop=False):
+    """
+    Yield frames of a video file no faster than `fps`, as a stand-in for a camera or
+    network stream. With `loop` the file repeats until the consumer stops.
+    """
+    # Paced here rather than with ffmpeg -re, whose initial burst would arrive all at once
+    width, height = frame_size
+    cmd = ['ffmpeg', '-loglevel', 'error']
+    if loop:
+        cmd += ['-stream_loop', '-1']
+    cmd += ['-i', input_video, '-an', '-sn', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=width * height * 3)
+    try:
+        start_time = time.perf_counter()
+        for frame_index, frame in enumerate(read_raw_frames(process.stdout, frame_size)):
+            delay = start_time + frame_index / fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield frame
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+def open_live_source(source, frame_size=None, fps=None, loop=False):
+    """
+    Returns (frames, width, height, fps) for a live source:
+    '-' (stdin) or a FIFO carrying raw bgr24 frames of `frame_size` at `fps`,
+    or a video file replayed in real time (and looped with `loop`).
+    """
+    if source == '-' or stat.S_ISFIFO(os.stat(source).st_mode):
+        if frame_size is None or fps is None:
+            raise ValueError("Raw live sources (stdin, FIFOs) need a frame size and fps")
+        if source == '-':
+            frames = read_raw_frames(sys.stdin.buffer, frame_size)
+        else:
+            frames = read_fifo_frames(source, frame_size)
+        return frames, frame_size[0], frame_size[1], fps
+    width, height, file_fps, _ = get_video_metadata(source)
+    fps = fps or file_fps
+    return read_paced_frames(source, (width, height), fps, loop), width, height, fps
+
+class DroppingQueue:
+    """
+    Bounded queue for live frames. A full queue drops its oldest item instead of
+    blocking the producer, so a slow consumer always works on recent frames.
+    """
+    def __init__(self, maxsize=LIVE_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                raise queue.Empty
+            return self.items.popleft()
+
+class LiveStats:
+    """Latency (arrival to written) and throughput of a live stream over its last `window` frames."""
+    def __init__(self, window=LIVE_STATS_WINDOW):
+        self.latencies = collections.deque(maxlen=window)
+        self.write_times = collections.deque(maxlen=window)
+        self.frames_written = 0
+        self.dropped_late = 0
+
+    def record(self, arrival_time):
+        now = time.perf_counter()
+        self.latencies.append(now - arrival_time)
+        self.write_times.append(now)
+        self.frames_written += 1
+
+    def snapshot(self, dropped_queued=0):
+        span = self.write_times[-1] - self.write_times[0] if len(self.write_times) > 1 else 0
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'frames_written': self.frames_written,
+            'dropped': self.dropped_late + dropped_queued,
+            'fps': (len(self.write_times) - 1) / span if span else 0.0,
+            'latency_ms_p50': float(np.percentile(latencies, 50)),
+            'latency_ms_p95': float(np.percentile(latencies, 95)),
+            'latency_ms_max': float(latencies.max()),
+        }
+
+    @staticmethod
+    def format(snapshot):
+        return (f"live: {snapshot['fps']:.1f} fps, latency p50 {snapshot['latency_ms_p50']:.0f} ms, "
+                f"p95 {snapshot['latency_ms_p95']:.0f} ms, max {snapshot['latency_ms_max']:.0f} ms, "
+                f"{snapshot['frames_written']} written, {snapshot['dropped']} dropped")
+
+class LiveCropper:
+    """
+    Per-stream live state: its own PersonTracker and scene detector, so several
+    streams can be cropped in one process (MoveNet itself is shared).
+    """
+    def __init__(self, width, height, debug=False, profiler=NULL_PROFILER):
+        self.width = width
+        self.height = height
+        self.output_size = (int(height * ASPECT_RATIO), height)
+        self.debug = debug
+        self.tracker = PersonTracker()
+        self.scene_detector = SceneChangeDetector()
+        self.frame_count = 0
+        self.state_text = None
+        self.profiler = profiler
+
+    def crop(self, frame):
+        cropped, self.state_text = process_frame(frame, self.width, self.height, *self.output_size, self.tracker,
+                                                 0.05, self.frame_count, self.debug, scene_detector=self.scene_detector,
+                                                 profiler=self.profiler)
+        self.frame_count += 1
+        return cropped
+
+def process_live(source, output, frame_size=None, fps=None, loop=False, max_latency=LIVE_MAX_LATENCY,
+                 queue_size=LIVE_QUEUE_SIZE, encoding=None, debug=False, max_frames=None, cancel_event=None,
+                 stats_path=None, stats_callback=None, stats_interval=LIVE_STATS_INTERVAL, profile_path=None):
+    """
+    Crop a live source frame by frame with PersonTracker and write the output as it
+    goes. A reader thread keeps at most `queue_size` frames waiting (dropping the
+    oldest), and frames that are already `max_latency` seconds old when their turn
+    comes are dropped too, so latency stays bounded when cropping cannot keep up.
+    Dropped frames are left out of the output. Latency/FPS stats are printed every
+    `stats_interval` seconds, written to `stats_path` and passed to `stats_callback`.
+    Runs until the source ends, `max_frames` are written or the job is cancelled;
+    returns the final stats. With `profile_path`, per-stage timings are written there at the end.
+    """
+    profiler = StageProfiler() if profile_path else NULL_PROFILER
+    frames, width, height, fps = open_live_source(source, frame_size, fps, loop)
+    cropper = LiveCropper(width, height, debug, profiler)
+    writer = open_video_writer(output, fps, cropper.output_size, encoding)
+    frame_queue = DroppingQueue(queue_size)
+    stats = LiveStats()
+    stop_event = threading.Event()
+
+    def read():
+        try:
+            for frame in frames:
+                frame_queue.put((time.perf_counter(), frame))
+                if stop_event.is_set():
+                    break
+            frame_queue.put(_END_OF_STREAM)
+        except BaseException as e:
+            frame_queue.put(e)
+        finally:
+            frames.close()
+
+    # Daemon: a reader blocked on an idle pipe must not keep the process alive
+    reader = threading.Thread(target=read, name="live-source", daemon=True)
+    reader.start()
+    profiler.begin_pass('live')
+    print(f"Live: {source} ({width}x{height} @ {fps:.2f} fps) -> {output}")
+    last_report = time.monotonic()
+
+    def report(final=False):
+        snapshot = stats.snapshot(frame_queue.dropped)
+        print(LiveStats.format(snapshot), end='\n' if final else '\r')
+        if stats_path:
+            write_json_atomic(stats_path, snapshot)
+        if stats_callback is not None:
+            stats_callback(snapshot)
+        return snapshot
+
+    try:
+        while max_frames is None or stats.frames_written < max_frames:
+            check_cancelled(cancel_event)
+            try:
+                item = frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            arrival_time, frame = item
+            if time.perf_counter() - arrival_time > max_latency:
+                stats.dropped_late += 1
+                continue
+            cropped = cropper.crop(frame)
+            with profiler.stage('live.write'):
+                writer.write(cropped)
+            stats.record(arrival_time)
+            if time.monotonic() - last_report >= stats_interval:
+                report()
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nStopping live mode...")
+    finally:
+        stop_event.set()
+        writer.release()
+        profiler.end_pass('live', stats.frames_written)
+        profiler.finish(profile_path, input=source, output=output)
+    return report(final=True)
+
+# -------------------------------
+# Batch mode: many videos on one loaded model
+# -------------------------------
+def list_batch_inputs(source):
+    """
+    Input videos named by `source`: a directory (its videos, not recursive), a
+    manifest file (one path per line, relative to the manifest, '#' comments),
+    a single video or a glob pattern ('**' recurses).
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if os.path.splitext(name)[1].lower() in BATCH_VIDEO_EXTENSIONS]
+    elif os.path.isfile(source) and os.path.splitext(source)[1].lower() in BATCH_VIDEO_EXTENSIONS:
+        paths = [source]
+    elif os.path.isfile(source):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r') as f:
+            lines = [line.strip() for line in f]
+        paths = [os.path.join(base_dir, line) for line in lines if line and not line.startswith('#')]
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            raise ValueError(f"Manifest {source} lists {len(missing)} missing file(s), e.g. {missing[0]}")
+    else:
+        paths = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+    return sorted({os.path.abspath(path) for path in paths})
+
+def batch_output_paths(input_paths, output_dir):
+    """Map each input to output_dir, mirroring subdirectories below the inputs' common root."""
+    if not input_paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(path) for path in input_paths])
+    outputs = {}
+    for input_path in input_paths:
+        relative = os.path.splitext(os.path.relpath(input_path, root))[0]
+        outputs[input_path] = os.path.join(os.path.abspath(output_dir), relative + BATCH_OUTPUT_SUFFIX)
+    if len(set(outputs.values())) != len(outputs):
+        seen = {}
+        for input_path, output_path in outputs.items():
+            if output_path in seen:
+                raise ValueError(f"{seen[output_path]} and {input_path} would both be written to {output_path}")
+            seen[output_path] = input_path
+    return outputs
+
+def is_up_to_date(input_path, output_path):
+    # Outputs only appear under their final name once complete (see run_batch_item)
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+def run_batch_item(input_path, output_path, cancel_event, options, progress_callback=None):
+    """
+    Process one video into a .part file and move it into place; returns the result entry.
+    Its progress goes to `progress_callback` only, as several items run at once.
+    """
+    root, extension = os.path.splitext(output_path)
+    partial_path = f"{root}.part{extension}"
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    _, _, _, total_frames = get_video_metadata(input_path)
+    start = time.perf_counter()
+    try:
+        process_video(input_path, partial_path, progress_path=None, progress_callback=progress_callback,
+                      progress_console=False, cancel_event=cancel_event, **options)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    elapsed = time.perf_counter() - start
+    return {'status': 'done', 'seconds': round(elapsed, 3), 'frames': total_frames,
+            'fps': round(total_frames / elapsed, 2) if elapsed > 0 else None}
+
+def process_batch(source, output_dir, jobs=BATCH_JOBS, results_path=None, force=False,
+                  progress_path=DEFAULT_PROGRESS_PATH, cancel_event=None, **options):
+    """
+    Crop every video named by `source` (see list_batch_inputs) into `output_dir`,
+    `jobs` at a time on threads that share the one loaded model, largest input first.
+    Inputs whose output is newer than they are are skipped unless `force`. Per-file
+    status, timings and errors go to `results_path` (default: results.json in the
+    output directory) after every file, so an interrupted batch resumes by running
+    it again. Remaining keyword arguments are passed to process_video.
+    Returns the results dict.
+    """
+    input_paths = list_batch_inputs(source)
+    outputs = batch_output_paths(input_paths, output_dir)
+    results_path = results_path or os.path.join(output_dir, 'results.json')
+    os.makedirs(output_dir, exist_ok=True)
+    results = {'source': source, 'output_dir': os.path.abspath(output_dir), 'files': {}}
+    if os.path.exists(results_path):
+        with open(results_path, 'r') as f:
+            results['files'] = json.load(f).get('files', {})
+    results_lock = threading.Lock()
+    cancel_event = cancel_event or threading.Event()
+    reporter = ProgressReporter(progress_path)
+
+    def record(input_path, entry):
+        with results_lock:
+            results['files'][input_path] = {'output': outputs[input_path], 'input_bytes': os.path.getsize(input_path),
+                                            **entry, 'finished_at': time.time()}
+            results['updated_at'] = time.time()
+            write_json_atomic(results_path, results)
+
+    pending = []
+    for input_path in input_paths:
+        if not force and is_up_to_date(input_path, outputs[input_path]):
+            if results['files'].get(input_path, {}).get('status') != 'done':
+                record(input_path, {'status': 'skipped'})
+        else:
+            pending.append(input_path)
+    # Longest jobs first, so the last ones to finish are short and the pool stays busy
+    pending.sort(key=os.path.getsize, reverse=True)
+    print(f"Batch: {len(input_paths)} input(s), {len(input_paths) - len(pending)} up to date, "
+          f"{len(pending)} to process with {jobs} job(s)")
+    if not pending:
+        return results
+
+    warm_up_model(batch_size=options.get('batch_size', DEFAULT_BATCH_SIZE))
+    finished = 0
+    # Per-item progress, folded into the one batch progress line
+    item_progress = dict.fromkeys(pending, 0.0)
+
+    def report(force=False):
+        progress = sum(item_progress.values()) / len(pending)
+        reporter.update(progress, f"Batch: {finished}/{len(pending)} files, {progress:.1f}%", force=force)
+
+    def run(input_path):
+        nonlocal finished
+
+        def item_progress_callback(progress, status):
+            # Analysis and cropping each count 0-100%; the single-pass mode only crops
+            if not options.get('single_pass'):
+                progress = progress / 2 if status.startswith('Analyzing') else 50 + progress / 2
+            with results_lock:
+                item_progress[input_path] = progress
+                report()
+
+        try:
+            entry = run_batch_item(input_path, outputs[input_path], cancel_event, options, item_progress_callback)
+        except JobCancelled:
+            entry = {'status': 'cancelled'}
+        except Exception as e:
+            print(f"\nFailed: {input_path}: {e}")
+            entry = {'status': 'failed', 'error': str(e)}
+        record(input_path, entry)
+        with results_lock:
+            finished += 1
+            item_progress[input_path] = 100.0
+            report(force=True)
+
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        futures = [executor.submit(run, input_path) for input_path in pending]
+        wait(futures)
+    except KeyboardInterrupt:
+        print("\nStopping batch; run the same command again to resume...")
+        cancel_event.set()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    counts = collections.Counter(entry['status'] for path, entry in results['files'].items() if path in outputs)
+    print(f"\nBatch finished: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    print(f"Results: {results_path}")
+    return results
+
 # -------------------------------
 # Main Entry Point
 # -------------------------------
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Process video for Instagram Reels/TikTok format')
-    parser.add_argument('-i', '--input', required=True, help='Input video file')
+    parser.add_argument('-i', '--input', help='Input video file')
     parser.add_argument('-o', '--output', help='Output video file (single output)')
     parser.add_argument('-mo', '--multiple-outputs', nargs='+', help='Multiple outputs with frame ranges (format: output1.mp4 "start-end" output2.mp4 "start-end" ...)')
+    parser.add_argument('-b', '--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Frames per MoveNet call during analysis (default: 1)')
+    parser.add_argument('--stride', type=int, default=1, help='Run MoveNet on every Nth frame and interpolate the rest (default: 1, every frame)')
+    parser.add_argument('--adaptive-stride', action='store_true', help='Shrink the stride while the subject moves fast, up to --stride when it is still')
+    parser.add_argument('--motion-gate', choices=['global', 'subject'], help='Reuse the previous detection when the whole frame (global) or the area around the subject barely changed')
+    parser.add_argument('--motion-threshold', type=float, default=MOTION_GATE_THRESHOLD, help=f'Frame MSE below which --motion-gate skips MoveNet (default: {MOTION_GATE_THRESHOLD})')
+    parser.add_argument('--max-skip', type=int, default=MOTION_GATE_MAX_SKIP, help=f'Most consecutive frames --motion-gate may skip (default: {MOTION_GATE_MAX_SKIP})')
+    parser.add_argument('--analysis-decoder', choices=['ffmpeg', 'opencv'], default=DEFAULT_ANALYSIS_DECODER, help='Decode the analysis pass downscaled through ffmpeg (default) or at full resolution with OpenCV')
+    parser.add_argument('-w', '--analysis-workers', type=int, default=1, help='Processes for the analysis pass; more than 1 analyzes chunks of the video in parallel (default: 1)')
+    parser.add_argument('--render-workers', type=int, default=1, help='Processes for the crop pass of -o; more than 1 renders ranges in parallel and joins them (default: 1, ignored with debug)')
+    parser.add_argument('--single-pass', action='store_true', help='For -o: decode once and crop while analyzing, with output starting after a short lookahead (ignored with debug)')
+    parser.add_argument('--max-lookahead', type=float, default=STREAM_MAX_LOOKAHEAD_SECONDS, help=f'Seconds --single-pass may hold frames waiting for a detection after a cut (default: {STREAM_MAX_LOOKAHEAD_SECONDS})')
+    parser.add_argument('--batch', metavar='SOURCE', help='Crop many videos on one loaded model: a directory, a glob pattern or a manifest file with one path per line')
+    parser.add_argument('--output-dir', help='With --batch: where the *_reel.mp4 outputs go')
+    parser.add_argument('-j', '--jobs', type=int, default=BATCH_JOBS, help=f'With --batch: videos processed at once (default: {BATCH_JOBS})')
+    parser.add_argument('--results', help='With --batch: per-file results JSON (default: results.json in --output-dir)')
+    parser.add_argument('--force', action='store_true', help='With --batch: also redo inputs whose output is up to date')
+    parser.add_argument('--live', action='store_true', help="Crop a live source frame by frame as it arrives: -i is '-' (stdin) or a FIFO with raw bgr24 frames, or a video file replayed in real time")
+    parser.add_argument('--live-size', type=parse_frame_size, help='Frame size of raw live input, e.g. 1280x720')
+    parser.add_argument('--live-fps', type=float, help='Frame rate of raw live input (files default to their own)')
+    parser.add_argument('--loop', action='store_true', help='With --live and a file: replay it forever')
+    parser.add_argument('--max-latency', type=float, default=LIVE_MAX_LATENCY, help=f'With --live: drop frames older than this many seconds (default: {LIVE_MAX_LATENCY})')
+    parser.add_argument('--stats-file', help='With --live: write latency/FPS stats here as JSON')
+    parser.add_argument('--backend', choices=('auto',) + MODEL_BACKENDS, default=MODEL_BACKEND, help='MoveNet inference backend (default: $REELS_MODEL_BACKEND or auto, from the model path)')
+    parser.add_argument('--model-path', default=MODEL_PATH, help='SavedModel directory, .tflite or .onnx file (default: $REELS_MODEL_PATH or ./model)')
+    parser.add_argument('--model-threads', type=int, default=MODEL_THREADS, help='Inference threads (default: $REELS_MODEL_THREADS or 0, the backend default)')
+    parser.add_argument('--no-xnnpack', action='store_true', help='TFLite: run without the XNNPACK delegate')
+    parser.add_argument('--profile-file', help='Time every pipeline stage and write the report (percentiles, fps per pass, peak RSS) here as JSON')
+    parser.add_argument('--serial', action='store_true', help='Run decode, analysis and encode on one thread instead of pipelining them')
+    parser.add_argument('--progress-file', default=DEFAULT_PROGRESS_PATH, help='Where to write progress updates (default: progress.json)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directory for cached analysis results (default: $REELS_CACHE_DIR or ~/.cache/reels/analysis)')
+    parser.add_argument('--no-cache', action='store_true', help='Always run MoveNet instead of reusing cached analysis results')
+    parser.add_argument('--encoder', choices=['ffmpeg', 'opencv'], default=DEFAULT_ENCODING['encoder'], help='ffmpeg pipe with audio (default) or OpenCV mp4v without audio')
+    parser.add_argument('--codec', default=DEFAULT_ENCODING['codec'], help='ffmpeg video codec (default: libx264)')
+    parser.add_argument('--preset', default=DEFAULT_ENCODING['preset'], help='ffmpeg encoder preset (default: veryfast)')
+    parser.add_argument('--crf', type=int, default=DEFAULT_ENCODING['crf'], help='ffmpeg constant rate factor (default: 23)')
     
     args = parser.parse_args()
     
     # Validate arguments
-    if not args.output and not args.multiple_outputs:
+    if args.batch:
+        if args.input or args.output or args.multiple_outputs or args.live:
+            parser.error("--batch replaces -i, -o, -mo and --live")
+        if not args.output_dir:
+            parser.error("--batch needs --output-dir")
+        if args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+    elif not args.input:
+        parser.error("-i is required (or --batch)")
+    elif not args.output and not args.multiple_outputs:
         parser.error("Either -o or -mo argument must be provided")
     if args.output and args.multiple_outputs:
         parser.error("Cannot use both -o and -mo arguments")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.stride < 1:
+        parser.error("--stride must be at least 1")
+    if args.render_workers < 1:
+        parser.error("--render-workers must be at least 1")
+    if args.analysis_workers < 1:
+        parser.error("--analysis-workers must be at least 1")
+    if args.max_skip < 0:
+        parser.error("--max-skip cannot be negative")
+    if args.model_threads < 0:
+        parser.error("--model-threads cannot be negative")
+    if args.backend != 'stub' and not os.path.exists(args.model_path):
+        parser.error(f"Model not found: {args.model_path}")
+    if args.live:
+        if not args.output:
+            parser.error("--live needs -o")
+        raw_source = args.input == '-' or (os.path.exists(args.input) and stat.S_ISFIFO(os.stat(args.input).st_mode))
+        if raw_source and (args.live_size is None or args.live_fps is None):
+            parser.error("--live from stdin or a FIFO needs --live-size and --live-fps")
+        if args.max_latency <= 0:
+            parser.error("--max-latency must be positive")
     
     return args
 
-def process_multiple_outputs(input_file, outputs_and_ranges):
+def parse_output_ranges(outputs_and_ranges, total_frames=None):
+    """
+    Turn ["out1.mp4", "start-end", ...] into [(output_file, start_frame, end_frame), ...].
+    Empty ranges are rejected. With the clip's `total_frames` (when the container reports
+    it), ranges starting past the end are rejected too, and ends past it are clamped.
+    """
     if len(outputs_and_ranges) % 2 != 0:
         raise ValueError("Multiple outputs must be provided in pairs of output file and frame range")
-    
-    # First, process the video as usual with a temporary output
-    temp_output = "temp_processed.mp4"
-    process_video(input_file, temp_output)
-    
-    # Then create multiple segments from the processed video
+
+    clips = []
     for i in range(0, len(outputs_and_ranges), 2):
         output_file = outputs_and_ranges[i]
         frame_range = outputs_and_ranges[i + 1]
-        
         try:
             start_frame, end_frame = map(int, frame_range.strip('"').split('-'))
         except ValueError:
             raise ValueError(f"Invalid frame range format: {frame_range}. Must be 'start-end'")
-        
-        # Now trim the processed video
-        trim_command = [
-            'ffmpeg', '-i', temp_output,
-            '-vf', f'trim=start_frame={start_frame}:end_frame={end_frame},setpts=PTS-STARTPTS',
-            '-an', '-c:v', 'libx264',
-            output_file
-        ]
-        subprocess.run(trim_command, check=True)
-    
-    # Clean up temporary file
-    os.remove(temp_output)
+        if start_frame >= end_frame:
+            raise ValueError(f"Empty frame range for {output_file}: {start_frame}-{end_frame}")
+        if total_frames:
+            if start_frame >= total_frames:
+                raise ValueError(f"Frame range {start_frame}-{end_frame} for {output_file} starts past the "
+                                 f"end of the video ({total_frames} frames)")
+            if end_frame > total_frames:
+                print(f"Frame range {start_frame}-{end_frame} for {output_file} ends past the end of the video; "
+                      f"rendering {start_frame}-{total_frames}")
+                end_frame = total_frames
+        clips.append((output_file, start_frame, end_frame))
+    return clips
+
+def merge_analysis_windows(clips, lead_in, total_frames):
+    """
+    Group clips into disjoint analysis windows: each clip needs [start - lead_in, end),
+    and clips whose windows overlap or touch share one window (and its decoded frames).
+    Returns [(window_start, window_end, [clip, ...]), ...] sorted by start.
+    """
+    windows = []
+    for clip in sorted(clips, key=lambda c: c[1]):
+        _, start_frame, end_frame = clip
+        window_start = max(0, start_frame - lead_in)
+        window_end = min(end_frame, total_frames)
+        if windows and window_start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], window_end)
+            windows[-1][2].append(clip)
+        else:
+            windows.append([window_start, window_end, [clip]])
+    return [tuple(window) for window in windows]
+
+def process_multiple_outputs(input_file, outputs_and_ranges, batch_size=DEFAULT_BATCH_SIZE, pipelined=True,
+                             progress_path=DEFAULT_PROGRESS_PATH, progress_callback=None, cancel_event=None, cache=None,
+                             encoding=None, stride=1, adaptive_stride=False, motion_gate=None,
+                             motion_threshold=MOTION_GATE_THRESHOLD, max_skip=MOTION_GATE_MAX_SKIP,
+                             analysis_decoder=DEFAULT_ANALYSIS_DECODER, analysis_workers=1, profile_path=None):
+    """
+    Render each "start-end" frame range (end exclusive) straight to its own output.
+    Only the frames the ranges need are analyzed, plus ANALYSIS_LEAD_IN_SECONDS before
+    each range so the planner has settled by the first output frame; overlapping
+    ranges share one analysis and one decode. `profile_path` works as in process_video.
+    """
+    profiler = StageProfiler() if profile_path else NULL_PROFILER
+    try:
+        width, height, fps, total_frames = get_video_metadata(input_file)
+        clips = parse_output_ranges(outputs_and_ranges, total_frames)
+        reporter = ProgressReporter(progress_path, progress_callback)
+        windows = merge_analysis_windows(clips, int(fps * ANALYSIS_LEAD_IN_SECONDS), total_frames)
+
+        # A cached full analysis can be sliced per window instead of running MoveNet
+        cached = cache.load(cache.key(input_file, decoder=analysis_decoder)) if cache is not None else None
+
+        # First Pass: plan each window independently
+        frames_to_analyze = sum(window_end - window_start for window_start, window_end, _ in windows)
+        analyzed = 0
+        window_centers = []
+        for window_start, window_end, _ in windows:
+            if cached is not None:
+                frame_diffs = cached['frame_diffs'][window_start:window_end].copy()
+                if len(frame_diffs):
+                    frame_diffs[0] = 0  # same as a fresh window: no previous frame to compare
+                with profiler.stage('analysis.replay'):
+                    planner = plan_from_analysis(cached['keypoints'][window_start:window_end], frame_diffs, fps)
+            else:
+                planner, _ = analyze_video(input_file, fps, frames_to_analyze, batch_size=batch_size,
+                                           max_frames=window_end - window_start, pipelined=pipelined,
+                                           reporter=reporter, cancel_event=cancel_event,
+                                           start_frame=window_start, progress_offset=analyzed,
+                                           stride=stride, adaptive_stride=adaptive_stride, motion_gate=motion_gate,
+                                           motion_threshold=motion_threshold, max_skip=max_skip,
+                                           decoder=analysis_decoder, workers=analysis_workers, profiler=profiler)
+            analyzed += window_end - window_start
+            with profiler.stage('plan.smooth'):
+                window_centers.append(planner.interpolate_and_smooth(window_end - window_start))
+
+        # Second Pass: decode each window once from its first output frame and write
+        # every clip covering that frame
+        print("\nSecond pass: Cropping clips based on smoothed centers...")
+        crop_width = int(height * ASPECT_RATIO)
+        frames_to_crop = sum(max(0, min(end, total_frames) - start) for _, start, end in clips)
+        cropped = 0
+        profiler.begin_pass('crop')
+        for (window_start, window_end, window_clips), smoothed_centers in zip(windows, window_centers):
+            crop_start = min(start for _, start, _ in window_clips)
+            writers = {output_file: open_video_writer(output_file, fps, (crop_width, height), encoding,
+                                                      audio_source=input_file, audio_start=start_frame / fps,
+                                                      audio_duration=(end_frame - start_frame) / fps)
+                       for output_file, start_frame, end_frame in window_clips}
+            frames = profiler.timed('crop.decode', read_frames(input_file, window_end - crop_start, crop_start))
+            if pipelined:
+                frames = threaded_stage(frames, PipelineQueue("decode"))
+
+            try:
+                for frame_num, frame in enumerate(frames, start=crop_start):
+                    check_cancelled(cancel_event)
+                    offset = frame_num - window_start
+                    norm_center = smoothed_centers[offset] if offset < len(smoothed_centers) else DEFAULT_CENTER
+                    x_start = compute_crop_start(norm_center, width, crop_width)
+                    cropped_frame = frame[:, x_start:x_start + crop_width]
+
+                    for output_file, start_frame, end_frame in window_clips:
+                        if start_frame <= frame_num < end_frame:
+                            with profiler.stage('crop.write'):
+                                writers[output_file].write(cropped_frame)
+                            cropped += 1
+
+                    # Update progress
+                    progress = (cropped / frames_to_crop) * 100 if frames_to_crop else 100
+                    reporter.update(progress, f"Generating reels... {progress:.2f}%", force=cropped == frames_to_crop)
+            finally:
+                errors = []
+                for writer in writers.values():
+                    try:
+                        writer.release()
+                    except RuntimeError as e:
+                        errors.append(e)
+                if errors:
+                    raise errors[0]
+        profiler.end_pass('crop', cropped)
+        print("\nProcessing complete.")
+    finally:
+        profiler.finish(profile_path, input=input_file, outputs=outputs_and_ranges[::2])
 
 def process_video_with_audio(input_file, output_file, start_time, duration):
     """Process a video segment while preserving audio"""
@@ -669,13 +3119,41 @@ def process_all_segments(input_file, frame_cuts):
 
 def main():
     args = parse_arguments()
+    configure_model(args.backend, args.model_path, args.model_threads, not args.no_xnnpack)
+    cache = None if args.no_cache else AnalysisCache(args.cache_dir)
+    encoding = {'encoder': args.encoder, 'codec': args.codec, 'preset': args.preset, 'crf': args.crf}
     
-    if args.multiple_outputs:
+    if args.batch:
+        results = process_batch(args.batch, args.output_dir, jobs=args.jobs, results_path=args.results, force=args.force,
+                                progress_path=args.progress_file, batch_size=args.batch_size, pipelined=not args.serial,
+                                cache=cache, encoding=encoding, stride=args.stride, adaptive_stride=args.adaptive_stride,
+                                motion_gate=args.motion_gate, motion_threshold=args.motion_threshold, max_skip=args.max_skip,
+                                analysis_decoder=args.analysis_decoder, analysis_workers=args.analysis_workers,
+                                render_workers=args.render_workers, single_pass=args.single_pass,
+                                max_lookahead_seconds=args.max_lookahead)
+        if any(entry['status'] in ('failed', 'cancelled') for entry in results['files'].values()):
+            sys.exit(1)
+    elif args.live:
+        process_live(args.input, args.output, frame_size=args.live_size, fps=args.live_fps, loop=args.loop,
+                     max_latency=args.max_latency, encoding=encoding, stats_path=args.stats_file,
+                     profile_path=args.profile_file)
+    elif args.multiple_outputs:
         # Handle multiple outputs with frame ranges
-        process_multiple_outputs(args.input, args.multiple_outputs)
+        process_multiple_outputs(args.input, args.multiple_outputs, batch_size=args.batch_size, pipelined=not args.serial,
+                                 progress_path=args.progress_file, cache=cache, encoding=encoding,
+                                 stride=args.stride, adaptive_stride=args.adaptive_stride,
+                                 motion_gate=args.motion_gate, motion_threshold=args.motion_threshold, max_skip=args.max_skip,
+                                 analysis_decoder=args.analysis_decoder, analysis_workers=args.analysis_workers,
+                                 profile_path=args.profile_file)
     else:
         # Original single output processing
-        process_video(args.input, args.output)
+        process_video(args.input, args.output, batch_size=args.batch_size, pipelined=not args.serial,
+                      progress_path=args.progress_file, cache=cache, encoding=encoding,
+                      stride=args.stride, adaptive_stride=args.adaptive_stride,
+                      motion_gate=args.motion_gate, motion_threshold=args.motion_threshold, max_skip=args.max_skip,
+                      analysis_decoder=args.analysis_decoder, analysis_workers=args.analysis_workers,
+                      render_workers=args.render_workers, single_pass=args.single_pass,
+                      max_lookahead_seconds=args.max_lookahead, profile_path=args.profile_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
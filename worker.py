@@ -0,0 +1,182 @@
+import argparse
+import logging
+import os
+import threading
+import traceback
+from multiprocessing.connection import Client, Listener
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Constants
+# -------------------------------
+WORKER_HOST = os.environ.get('REELS_WORKER_HOST', 'localhost')
+WORKER_PORT = int(os.environ.get('REELS_WORKER_PORT', 6000))
+WORKER_AUTHKEY = os.environ.get('REELS_WORKER_AUTHKEY', 'reels').encode()
+MAX_CONCURRENT_JOBS = int(os.environ.get('REELS_MAX_JOBS', 2))
+
+# -------------------------------
+# Client side (used by server.py; does not import TensorFlow)
+# -------------------------------
+class WorkerJobCancelled(Exception):
+    """Raised by submit_job when the worker stopped the job on request."""
+
+def submit_job(job, address=None, on_progress=None):
+    """
+    Send a job to the long-lived worker and block until it finishes.
+    Progress messages streamed back by the worker are passed to
+    `on_progress(progress, status)` as they arrive.
+    Raises ConnectionRefusedError when no worker is listening,
+    WorkerJobCancelled when the job was cancelled and RuntimeError when
+    the job fails inside the worker.
+    """
+    address = address or (WORKER_HOST, WORKER_PORT)
+    with Client(address, authkey=WORKER_AUTHKEY) as conn:
+        conn.send(job)
+        while True:
+            reply = conn.recv()
+            if reply.get('type') != 'progress':
+                break
+            if on_progress is not None:
+                on_progress(reply['progress'], reply['status'])
+    if reply.get('status') == 'cancelled':
+        raise WorkerJobCancelled(reply.get('error', 'Job cancelled'))
+    if reply.get('status') != 'ok':
+        raise RuntimeError(reply.get('error', 'Worker job failed'))
+    return reply
+
+def request_cancel(job_id, address=None):
+    """Ask the worker to stop a running job. Returns True if the job was found."""
+    return submit_job({'command': 'cancel', 'job_id': job_id}, address).get('cancelled', False)
+
+def ping(address=None):
+    """Return True when a worker is listening and answers."""
+    try:
+        return submit_job({'command': 'ping'}, address).get('status') == 'ok'
+    except (ConnectionRefusedError, OSError, EOFError):
+        return False
+
+def worker_model(address=None):
+    """The model settings of the listening worker (see model_settings), or None when none answers."""
+    try:
+        return submit_job({'command': 'ping'}, address).get('model')
+    except (ConnectionRefusedError, OSError, EOFError):
+        return None
+
+def model_settings(backend, model_path):
+    """What identifies the model a job ran on, for keys of stored results."""
+    return {'backend': backend, 'model_path': os.path.abspath(model_path)}
+
+# -------------------------------
+# Worker side: load MoveNet once and serve jobs
+# -------------------------------
+# Cancel events of running jobs, keyed by job ID
+active_jobs = {}
+active_jobs_lock = threading.Lock()
+
+def run_job(toReel, job, cancel_event, progress_callback, cache):
+    batch_size = job.get('batch_size', toReel.DEFAULT_BATCH_SIZE)
+    # Progress goes back over the connection; a file is only written if asked for
+    progress_path = job.get('progress_path')
+    encoding = job.get('encoding')
+    stride = job.get('stride', 1)
+    adaptive_stride = job.get('adaptive_stride', False)
+    if cache is not None and job.get('content_hash'):
+        # Uploads are stored by content hash; the cache key reuses it
+        cache.remember_hash(job['input'], job['content_hash'])
+    analysis_options = {key: job[key] for key in ('motion_gate', 'motion_threshold', 'max_skip', 'analysis_decoder', 'analysis_workers', 'profile_path') if key in job}
+    if job.get('multiple_outputs'):
+        toReel.process_multiple_outputs(job['input'], job['multiple_outputs'], batch_size=batch_size,
+                                        progress_path=progress_path, progress_callback=progress_callback,
+                                        cancel_event=cancel_event, cache=cache, encoding=encoding,
+                                        stride=stride, adaptive_stride=adaptive_stride, **analysis_options)
+    else:
+        toReel.process_video(job['input'], job['output'], batch_size=batch_size,
+                             progress_path=progress_path, progress_callback=progress_callback,
+                             cancel_event=cancel_event, cache=cache, encoding=encoding,
+                             stride=stride, adaptive_stride=adaptive_stride,
+                             render_workers=job.get('render_workers', 1), single_pass=job.get('single_pass', False),
+                             max_lookahead_seconds=job.get('max_lookahead_seconds', toReel.STREAM_MAX_LOOKAHEAD_SECONDS),
+                             **analysis_options)
+
+def cancel_job(job_id):
+    with active_jobs_lock:
+        cancel_event = active_jobs.get(job_id)
+    if cancel_event is None:
+        return False
+    cancel_event.set()
+    return True
+
+def handle_connection(toReel, conn, job_slots, cache):
+    with conn:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        model = model_settings(toReel.MODEL_BACKEND, toReel.MODEL_PATH)
+        if job.get('command') == 'ping':
+            conn.send({'status': 'ok', 'model': model})
+            return
+        if job.get('command') == 'cancel':
+            conn.send({'status': 'ok', 'cancelled': cancel_job(job.get('job_id'))})
+            return
+
+        job_id = job.get('job_id')
+        cancel_event = threading.Event()
+        with active_jobs_lock:
+            active_jobs[job_id] = cancel_event
+        try:
+            with job_slots:
+                toReel.check_cancelled(cancel_event)
+                logger.info(f"Running job: {job}")
+                run_job(toReel, job, cancel_event,
+                        lambda progress, status: conn.send({'type': 'progress', 'progress': progress, 'status': status}),
+                        cache)
+            conn.send({'status': 'ok', 'model': model})
+        except toReel.JobCancelled:
+            logger.info(f"Job cancelled: {job_id}")
+            conn.send({'status': 'cancelled', 'error': 'Job cancelled'})
+        except Exception as e:
+            logger.error(f"Job failed: {e}\n{traceback.format_exc()}")
+            conn.send({'status': 'error', 'error': str(e)})
+        finally:
+            with active_jobs_lock:
+                active_jobs.pop(job_id, None)
+
+def serve(host=WORKER_HOST, port=WORKER_PORT, jobs=MAX_CONCURRENT_JOBS, backend=None, model_path=None, model_threads=None):
+    # Heavy imports happen here so clients can import this module cheaply
+    import toReel
+    toReel.configure_model(backend, model_path, model_threads)
+
+    logger.info(f"Warming up MoveNet ({toReel.MODEL_BACKEND}: {toReel.MODEL_PATH})...")
+    toReel.warm_up_model(batch_size=toReel.DEFAULT_BATCH_SIZE)
+
+    job_slots = threading.BoundedSemaphore(jobs)
+    # Re-runs on the same upload (new crop ranges, retries) skip MoveNet entirely
+    cache = toReel.AnalysisCache()
+    with Listener((host, port), authkey=WORKER_AUTHKEY) as listener:
+        logger.info(f"Worker listening on {host}:{port} ({jobs} concurrent job(s))")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=handle_connection, args=(toReel, conn, job_slots, cache), daemon=True).start()
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Long-lived toReel worker that keeps MoveNet loaded between jobs')
+    parser.add_argument('--host', default=WORKER_HOST, help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=WORKER_PORT, help='Port to listen on')
+    parser.add_argument('-j', '--jobs', type=int, default=MAX_CONCURRENT_JOBS, help='Jobs to run concurrently (default: $REELS_MAX_JOBS or 2)')
+    parser.add_argument('--backend', choices=['auto', 'savedmodel', 'tflite', 'onnx', 'stub'], help='MoveNet inference backend (default: $REELS_MODEL_BACKEND or auto)')
+    parser.add_argument('--model-path', help='SavedModel directory, .tflite or .onnx file (default: $REELS_MODEL_PATH or ./model)')
+    parser.add_argument('--model-threads', type=int, help='Inference threads per job (default: $REELS_MODEL_THREADS or the backend default)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    # progress.json and relative paths resolve next to the scripts, like server.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    serve(args.host, args.port, args.jobs, args.backend, args.model_path, args.model_threads)
+
+if __name__ == "__main__":
+    main()